@@ -2,6 +2,10 @@
 #include <stdlib.h>
 #include <string.h>
 #include <locale.h>
+#include <stdarg.h>
+#include <ctype.h>
+#include <limits.h>
+#include <sys/stat.h>
 
 #ifdef __cplusplus
 extern "C" {
@@ -17,9 +21,48 @@ extern "C" {
     #define EXPORT
 #endif
 
+// Verrou lecteurs/redacteur d'un contexte, et variable propre a chaque thread
+#ifdef _WIN32
+    #include <windows.h>
+    typedef SRWLOCK Verrou;
+    #define VERROU_INITIAL SRWLOCK_INIT
+#else
+    #include <pthread.h>
+    typedef pthread_rwlock_t Verrou;
+    #define VERROU_INITIAL PTHREAD_RWLOCK_INITIALIZER
+#endif
+
+// Threads et projection de fichier en memoire, pour parser_texte
+#ifdef _WIN32
+    typedef HANDLE Fil;
+#else
+    #include <fcntl.h>
+    #include <sys/mman.h>
+    #include <unistd.h>
+    typedef pthread_t Fil;
+#endif
+
+#ifdef _MSC_VER
+    #define LOCAL_THREAD __declspec(thread)
+#else
+    #define LOCAL_THREAD _Thread_local
+#endif
+
+#define ACCES_LECTURE 0
+#define ACCES_ECRITURE 1
+
 #define MAX_STRING_LENGTH 50
 #define MAX_BUFFER_SIZE 1024
 
+// Cles de tri
+#define CLE_NOM 0
+#define CLE_CNE 1
+#define CLE_MOYENNE 2
+#define CLE_NOTE1 3
+#define CLE_NOTE2 4
+#define CLE_NOTE3 5
+#define CLE_NOTE4 6
+
 typedef struct Etudiant {
     char nom[MAX_STRING_LENGTH];
     char prenom[MAX_STRING_LENGTH];
@@ -27,18 +70,219 @@ typedef struct Etudiant {
     float notes[4];
     float moyenne;
     struct Etudiant *suivant;
+    struct Etudiant *precedent;
+    int partition;
 } Etudiant;
 
-typedef struct PileAnnulation {
-    Etudiant *etudiant;
-    struct PileAnnulation *precedent;
-} PileAnnulation;
-
 typedef struct FileAttente {
     Etudiant *debut;
     Etudiant *fin;
 } FileAttente;
 
+// Reserve de noeuds: les etudiants sont alloues dans des blocs contigus de
+// taille croissante. Un noeud libere est chaine par `suivant` dans `libres`
+// et reutilise avant d'entamer le bloc courant (le premier de la liste).
+// Vider la reserve libere tous ses noeuds en une fois, bloc par bloc.
+#define RESERVE_BLOC_MIN 256
+#define RESERVE_BLOC_MAX 65536
+
+typedef struct BlocNoeuds {
+    struct BlocNoeuds *suivant;
+    size_t capacite;
+    size_t utilises;
+    Etudiant noeuds[];
+} BlocNoeuds;
+
+typedef struct Reserve {
+    BlocNoeuds *blocs;
+    Etudiant *libres;
+    size_t vivants;
+    size_t capacite;
+    size_t nb_blocs;
+} Reserve;
+
+// Memoire tenue par la bibliotheque, pour empreinte_memoire
+typedef struct EmpreinteMemoire {
+    long etudiants;
+    long en_attente;
+    long noeuds_reserves;
+    long blocs;
+    long octets_noeuds;
+    long octets_index;
+    long octets_historique;
+} EmpreinteMemoire;
+
+typedef struct EntreeIndex {
+    int CNE;
+    Etudiant *etudiant;
+} EntreeIndex;
+
+typedef struct IndexCNE {
+    EntreeIndex *cases;
+    size_t capacite;
+    size_t taille;
+    int actif;
+} IndexCNE;
+
+// Index des noms: trie sur nom et prenom normalises (minuscules, sans accents).
+// Les noeuds et les entrees sont dans des tableaux, relies par indices.
+typedef struct NoeudNom {
+    char c;
+    int fils;
+    int frere;
+    int entrees;
+} NoeudNom;
+
+typedef struct EntreeNom {
+    Etudiant *etudiant;
+    int suivante;
+} EntreeNom;
+
+typedef struct IndexNoms {
+    NoeudNom *noeuds;
+    int nb_noeuds;
+    int capacite_noeuds;
+    EntreeNom *entrees;
+    int nb_entrees;
+    int capacite_entrees;
+    int libres;
+    int valide;
+} IndexNoms;
+
+typedef struct CritereTri {
+    int cle;
+    int ordre;
+    int cle_secondaire;
+} CritereTri;
+
+// Critere du dernier tri reussi; tant qu'il est actif, les insertions
+// se font a leur place au lieu d'en tete
+typedef struct TriActif {
+    int actif;
+    CritereTri critere;
+} TriActif;
+
+// Format binaire: une entete suivie d'enregistrements de taille fixe
+typedef struct EnregistrementEtudiant {
+    char nom[MAX_STRING_LENGTH];
+    char prenom[MAX_STRING_LENGTH];
+    int CNE;
+    float notes[4];
+    float moyenne;
+} EnregistrementEtudiant;
+
+// Types d'actions de l'historique
+#define ACTION_AJOUT 0
+#define ACTION_SUPPRESSION 1
+#define ACTION_TRI 2
+#define ACTION_INSCRIPTION 3
+#define ACTION_IMPORT 4
+
+#define HISTORIQUE_ACTIONS_DEFAUT 100
+#define HISTORIQUE_OCTETS_DEFAUT (16 * 1024 * 1024)
+
+// Action annulable. Ajouts, suppressions, inscriptions et imports gardent les
+// enregistrements concernes; un tri ne garde que l'ordre precedent (un CNE par
+// etudiant) et le tri actif avant lui.
+typedef struct Action {
+    int type;
+    int nombre;
+    EnregistrementEtudiant *enregistrements;
+    int *ordre;
+    CritereTri critere;
+    TriActif tri_precedent;
+    int partition;
+    size_t octets;
+    struct Action *precedente;
+    struct Action *suivante;
+} Action;
+
+// Actions de la plus ancienne a la plus recente; celles apres `courante` ont
+// ete annulees et peuvent etre retablies. max_octets nul: pas de limite.
+typedef struct Historique {
+    Action *premiere;
+    Action *courante;
+    Action *derniere;
+    int nombre;
+    size_t octets;
+    int max_actions;
+    size_t max_octets;
+} Historique;
+
+typedef struct EnteteBinaire {
+    char magie[4];
+    int version;
+    int nombre;
+    int taille_enregistrement;
+} EnteteBinaire;
+
+// Dernier noeud atteint par extraire_page, pour paginer sans repartir de la tete
+typedef struct CurseurPage {
+    Etudiant *tete;
+    Etudiant *noeud;
+    int position;
+    unsigned long generation;
+} CurseurPage;
+
+// Tampon de rendu: extensible (alloue par la bibliotheque) ou fourni par l'appelant.
+// Un tampon fixe trop petit est tronque mais longueur compte toujours la taille requise.
+typedef struct Tampon {
+    char *donnees;
+    size_t longueur;
+    size_t capacite;
+    int extensible;
+} Tampon;
+
+// Rappel par etudiant; une valeur non nulle interrompt le parcours
+typedef int (*RappelEtudiant)(const Etudiant *etudiant, int position, void *donnees);
+
+// Avancement de l'operation longue en cours (chargement ou tri), lisible
+// depuis un autre thread; annulation est levee par demander_annulation
+typedef struct Progression {
+    volatile long fait;
+    volatile long total;
+    volatile int annulation;
+} Progression;
+
+// Fichier d'origine d'une partie de la liste. Chaque noeud garde l'indice de
+// sa partition: une mutation n'est journalisee et ecrite que dans ce fichier.
+// taille et date decrivent le fichier tel que la bibliotheque l'a lu ou
+// ecrit en dernier: resynchroniser_fichier ne relit que s'il a change depuis.
+typedef struct Partition {
+    char fichier[FILENAME_MAX];
+    size_t entrees;
+    long taille;
+    long long date;
+} Partition;
+
+// Ligne ignoree a la lecture d'un fichier texte; partition designe le
+// fichier apres assembler_partitions (0 pour un fichier seul)
+typedef struct ErreurLecture {
+    long ligne;
+    int code;
+    int partition;
+    char extrait[MAX_STRING_LENGTH];
+} ErreurLecture;
+
+// Lignes ignorees par un chargement: les RAPPORT_MAX premieres notees sont
+// gardees, total les compte toutes
+typedef struct RapportLecture {
+    ErreurLecture *erreurs;
+    long nombre;
+    long capacite;
+    long total;
+} RapportLecture;
+
+// Fichier lu hors de tout etat global (voir lire_partition), en attente
+// d'assembler_partitions
+typedef struct PartitionLue {
+    Etudiant *tete;
+    IndexCNE index;
+    Reserve reserve;
+    RapportLecture rapport;
+    int code;
+} PartitionLue;
+
 typedef struct OperationResult {
     int success;
     char *message;
@@ -47,389 +291,3460 @@ typedef struct OperationResult {
 } OperationResult;
 
 
-PileAnnulation *pileSuppressions = NULL;
-FileAttente fileAttente = {NULL, NULL};
+// Etat d'une liste chargee: sa file d'attente, son historique, ses index et
+// ses fichiers. Les lecteurs partagent `verrou`, une mutation le prend seule.
+// curseurPage change pendant une lecture: il a son propre verrou.
+typedef struct Contexte {
+    Historique historique;
+    FileAttente fileAttente;
+    // Noeuds de la liste chargee et de la file d'attente; un etudiant qui passe
+    // de l'une a l'autre est recopie dans la reserve d'arrivee
+    Reserve reserveListe;
+    Reserve reserveFile;
+    IndexCNE indexCNE;
+    // Suit indexCNE: chaque noeud indexe par CNE l'est aussi par nom et prenom
+    IndexNoms indexNoms;
+    // Fichiers de la liste chargee; un seul sauf apres assembler_partitions
+    Partition *partitions;
+    int nb_partitions;
+    // Fichier de la file d'attente, a cote du fichier etudiants charge ("" sans fichier)
+    char cheminFile[FILENAME_MAX];
+    CurseurPage curseurPage;
+    // Incremente a chaque modification du chainage; invalide le curseur de page
+    unsigned long generationListe;
+    Progression progression;
+    TriActif triActif;
+    // Lignes ignorees par le dernier chargement texte
+    RapportLecture rapportLecture;
+    Verrou verrou;
+    Verrou verrouCurseur;
+} Contexte;
 
+#define CONTEXTE_INITIAL {                                                                   \
+    {NULL, NULL, NULL, 0, 0, HISTORIQUE_ACTIONS_DEFAUT, HISTORIQUE_OCTETS_DEFAUT},           \
+    {NULL, NULL}, {NULL, NULL, 0, 0, 0}, {NULL, NULL, 0, 0, 0}, {NULL, 0, 0, 0},             \
+    {NULL, 0, 0, NULL, 0, 0, -1, 0}, NULL, 0, "", {NULL, NULL, 0, 0}, 1, {0, 0, 0},          \
+    {0, {0, 0, -1}}, {NULL, 0, 0, 0}, VERROU_INITIAL, VERROU_INITIAL                         \
+}
 
-void calculer_moyenne(Etudiant *etudiant) {
-    if (!etudiant) return;
-    etudiant->moyenne = 0;
-    for (int i = 0; i < 4; i++) {
-        etudiant->moyenne += etudiant->notes[i];
-    }
-    etudiant->moyenne /= 4;
+// Contexte des points d'entree tant qu'un thread n'en a pas choisi d'autre
+Contexte contexteDefaut = CONTEXTE_INITIAL;
+// Contexte du thread appelant (contexte_utiliser) et nombre de points
+// d'entree imbriques en cours: seul le plus externe prend le verrou
+LOCAL_THREAD Contexte *contexte = &contexteDefaut;
+LOCAL_THREAD int profondeurAppel = 0;
+
+void verrou_initialiser(Verrou *verrou) {
+#ifdef _WIN32
+    InitializeSRWLock(verrou);
+#else
+    pthread_rwlock_init(verrou, NULL);
+#endif
 }
 
-void empiler_suppression(Etudiant *etudiant) {
-    if (!etudiant) return;
-    
-    PileAnnulation *nouveau = malloc(sizeof(PileAnnulation));
-    if (!nouveau) return;
+void verrou_detruire(Verrou *verrou) {
+#ifdef _WIN32
+    (void)verrou;
+#else
+    pthread_rwlock_destroy(verrou);
+#endif
+}
 
-    Etudiant *copie = malloc(sizeof(Etudiant));
-    if (!copie) {
-        free(nouveau);
-        return;
-    }
+void verrou_prendre(Verrou *verrou, int acces) {
+#ifdef _WIN32
+    if (acces == ACCES_ECRITURE) AcquireSRWLockExclusive(verrou);
+    else AcquireSRWLockShared(verrou);
+#else
+    if (acces == ACCES_ECRITURE) pthread_rwlock_wrlock(verrou);
+    else pthread_rwlock_rdlock(verrou);
+#endif
+}
 
-    *copie = *etudiant;
-    copie->suivant = NULL;
+void verrou_rendre(Verrou *verrou, int acces) {
+#ifdef _WIN32
+    if (acces == ACCES_ECRITURE) ReleaseSRWLockExclusive(verrou);
+    else ReleaseSRWLockShared(verrou);
+#else
+    (void)acces;
+    pthread_rwlock_unlock(verrou);
+#endif
+}
 
-    nouveau->etudiant = copie;
-    nouveau->precedent = pileSuppressions;
-    pileSuppressions = nouveau;
+// Encadrent chaque point d'entree. Un point d'entree appele par un autre
+// (compacter_journal par mettre_a_jour_fichier...) tourne sous le verrou deja pris.
+void contexte_entrer(int acces) {
+    if (profondeurAppel++ == 0) verrou_prendre(&contexte->verrou, acces);
 }
 
-Etudiant *depiler_suppression() {
-    if (!pileSuppressions) return NULL;
+void contexte_sortir(int acces) {
+    if (--profondeurAppel == 0) verrou_rendre(&contexte->verrou, acces);
+}
+
+EXPORT void liberer_liste(Etudiant *tete);
+EXPORT OperationResult mettre_a_jour_fichier(Etudiant *tete, const char *filename);
+EXPORT void effacer_annulation();
+int trier_liste(Etudiant **tete, const CritereTri *critere);
+int cle_valide(int cle);
+void inserer_noeud(Etudiant **tete, Etudiant *etudiant);
+void inserer_noeud_selon(Etudiant **tete, Etudiant *etudiant, const TriActif *tri);
+void noms_inserer(IndexNoms *index, Etudiant *etudiant);
+void noms_retirer(IndexNoms *index, Etudiant *etudiant);
+void noms_vider(IndexNoms *index);
+void inserer_lot(Etudiant **tete, Etudiant *lot);
+Etudiant **fusionner(Etudiant *gauche, Etudiant *droite, const CritereTri *critere, Etudiant **queue);
+void historique_vider();
+void file_attacher(const char *filename);
+
+#define CAPACITE_INDEX_INITIALE 64
+#define SEUIL_COMPACTION 256
+#define MAGIE_BINAIRE "ETUB"
+#define VERSION_BINAIRE 1
+#define BLOC_BINAIRE 4096
+#define PAS_PROGRESSION 4096
+
+// Motifs de rejet de importer_etudiants
+#define IMPORT_ACCEPTE 0
+#define IMPORT_CNE_INVALIDE 1
+#define IMPORT_NOTES_INVALIDES 2
+#define IMPORT_NOM_INVALIDE 3
+#define IMPORT_DOUBLON_LISTE 4
+#define IMPORT_DOUBLON_LOT 5
+#define IMPORT_ERREUR_MEMOIRE 6
 
-    PileAnnulation *temp = pileSuppressions;
-    Etudiant *etudiant = temp->etudiant;
-    pileSuppressions = temp->precedent;
+// Motifs des lignes ignorees par parser_texte
+#define LECTURE_FORMAT 1
+#define LECTURE_CNE_INVALIDE 2
+#define LECTURE_NOTES_INVALIDES 3
+#define LECTURE_DOUBLON 4
+#define RAPPORT_MAX 10000
+// Un fichier texte est lu en morceaux d'au moins cette taille, un par processeur
+#define TAILLE_MORCEAU_MIN (1 << 20)
+#define MORCEAUX_MAX 64
 
-    free(temp);
-    return etudiant;
+
+void progression_demarrer(long total) {
+    contexte->progression.fait = 0;
+    contexte->progression.total = total;
 }
 
-void liberer_pile() {
-    while (pileSuppressions) {
-        PileAnnulation *temp = pileSuppressions;
-        pileSuppressions = temp->precedent;
-        free(temp->etudiant);
-        free(temp);
-    }
+// Ajoute `fait` a l'avancement; plusieurs lectures peuvent partager suivi
+void progression_avancer(Progression *suivi, long fait) {
+#ifdef _WIN32
+    InterlockedExchangeAdd((volatile LONG *)&suivi->fait, fait);
+#else
+    __atomic_fetch_add(&suivi->fait, fait, __ATOMIC_RELAXED);
+#endif
 }
 
-// Main functions
-EXPORT OperationResult lire_fichier_etudiants(const char *filename) {
-    OperationResult result = {0, NULL, NULL, NULL};
-    FILE *file = fopen(filename, "r");
-    if (!file) {
-        result.message = strdup("Erreur d'ouverture du fichier");
-        return result;
+// Index CNE -> noeud (adressage ouvert, sondage lineaire)
+size_t index_position(const IndexCNE *index, int CNE) {
+    return ((unsigned int)CNE * 2654435761u) & (index->capacite - 1);
+}
+
+Etudiant *index_chercher(const IndexCNE *index, int CNE) {
+    if (!index->actif || !index->capacite) return NULL;
+
+    size_t i = index_position(index, CNE);
+    while (index->cases[i].CNE) {
+        if (index->cases[i].CNE == CNE) {
+            return index->cases[i].etudiant;
+        }
+        i = (i + 1) & (index->capacite - 1);
     }
+    return NULL;
+}
 
-    char nom[MAX_STRING_LENGTH], prenom[MAX_STRING_LENGTH];
-    int CNE;
-    float notes[4];
-    Etudiant *tete = NULL;
+int index_redimensionner(IndexCNE *index, size_t capacite) {
+    EntreeIndex *cases = calloc(capacite, sizeof(EntreeIndex));
+    if (!cases) return 0;
 
-    while (fscanf(file, "%49s %49s %d %f %f %f %f",
-                nom, prenom, &CNE, &notes[0], &notes[1], &notes[2], &notes[3]) == 7) {
-        
-        if (CNE <= 0) {
-            continue;  
+    EntreeIndex *anciennes = index->cases;
+    size_t ancienne_capacite = index->capacite;
+
+    index->cases = cases;
+    index->capacite = capacite;
+    for (size_t j = 0; j < ancienne_capacite; j++) {
+        if (!anciennes[j].CNE) continue;
+        size_t i = index_position(index, anciennes[j].CNE);
+        while (cases[i].CNE) {
+            i = (i + 1) & (capacite - 1);
         }
-        
-        int valid_notes = 1;
-        for (int i = 0; i < 4; i++) {
-            if (notes[i] < 0 || notes[i] > 20) {
-                valid_notes = 0;
-                break;
-            }
+        cases[i] = anciennes[j];
+    }
+    free(anciennes);
+    return 1;
+}
+
+// Retourne 1 si insere, 0 si le CNE est deja present, -1 en cas d'erreur memoire
+int index_inserer(IndexCNE *index, Etudiant *etudiant) {
+    if (!index->actif) {
+        // Sans index CNE, l'index des noms ne peut plus suivre la liste
+        if (index == &contexte->indexCNE) contexte->indexNoms.valide = 0;
+        return 1;
+    }
+
+    if ((index->taille + 1) * 10 > index->capacite * 7) {
+        size_t capacite = index->capacite ? index->capacite * 2 : CAPACITE_INDEX_INITIALE;
+        if (!index_redimensionner(index, capacite)) return -1;
+    }
+
+    size_t i = index_position(index, etudiant->CNE);
+    while (index->cases[i].CNE) {
+        if (index->cases[i].CNE == etudiant->CNE) return 0;
+        i = (i + 1) & (index->capacite - 1);
+    }
+    index->cases[i].CNE = etudiant->CNE;
+    index->cases[i].etudiant = etudiant;
+    index->taille++;
+    if (index == &contexte->indexCNE) noms_inserer(&contexte->indexNoms, etudiant);
+    return 1;
+}
+
+void index_retirer(IndexCNE *index, int CNE) {
+    if (!index->actif || !index->capacite) {
+        if (index == &contexte->indexCNE) contexte->indexNoms.valide = 0;
+        return;
+    }
+
+    size_t masque = index->capacite - 1;
+    size_t i = index_position(index, CNE);
+    while (index->cases[i].CNE != CNE) {
+        if (!index->cases[i].CNE) return;
+        i = (i + 1) & masque;
+    }
+    if (index == &contexte->indexCNE) noms_retirer(&contexte->indexNoms, index->cases[i].etudiant);
+
+    // Suppression par decalage arriere: pas de pierres tombales
+    size_t j = i;
+    for (;;) {
+        j = (j + 1) & masque;
+        if (!index->cases[j].CNE) break;
+        size_t k = index_position(index, index->cases[j].CNE);
+        if ((j > i && (k <= i || k > j)) || (j < i && (k <= i && k > j))) {
+            index->cases[i] = index->cases[j];
+            i = j;
         }
-        if (!valid_notes) {
-            continue;  
+    }
+    index->cases[i].CNE = 0;
+    index->cases[i].etudiant = NULL;
+    index->taille--;
+}
+
+void index_vider(IndexCNE *index) {
+    free(index->cases);
+    index->cases = NULL;
+    index->capacite = 0;
+    index->taille = 0;
+    index->actif = 0;
+    if (index == &contexte->indexCNE) noms_vider(&contexte->indexNoms);
+}
+
+int index_construire(IndexCNE *index, Etudiant *tete) {
+    index_vider(index);
+    index->actif = 1;
+
+    size_t n = 0;
+    for (Etudiant *current = tete; current; current = current->suivant) n++;
+
+    size_t capacite = CAPACITE_INDEX_INITIALE;
+    while (capacite * 7 < n * 10) capacite *= 2;
+    if (!index_redimensionner(index, capacite)) {
+        index_vider(index);
+        return 0;
+    }
+
+    for (Etudiant *current = tete; current; current = current->suivant) {
+        if (index_inserer(index, current) < 0) {
+            index_vider(index);
+            return 0;
         }
+    }
+    return 1;
+}
 
-        Etudiant *nouveau = malloc(sizeof(Etudiant));
-        if (!nouveau) {
-            fclose(file);
-            result.message = strdup("Erreur d'allocation mémoire");
-            return result;
+// Ligature (ae, oe, ss) qui commence en c, developpee en deux lettres; NULL sinon
+const char *ligature(const unsigned char *c) {
+    if (c[0] == 0xC3 && (c[1] == 0x86 || c[1] == 0xA6)) return "ae";
+    if (c[0] == 0xC3 && c[1] == 0x9F) return "ss";
+    if (c[0] == 0xC5 && (c[1] == 0x92 || c[1] == 0x93)) return "oe";
+    return NULL;
+}
+
+// Minuscules sans accents (lettres latines en UTF-8), ligatures developpees
+// ("Cœur" donne "coeur"); les autres octets sont recopies tels quels.
+// Retourne la longueur ecrite.
+size_t normaliser_nom(const char *source, char *destination, size_t taille) {
+    // Base des caracteres U+00C0..U+00FF ('_' = ignore); Æ, ß et æ passent
+    // par ligature()
+    static const char bases[] = "aaaaaaaceeeeiiiidnooooo_ouuuuyts"
+                                "aaaaaaaceeeeiiiidnooooo_ouuuuyty";
+    const unsigned char *c = (const unsigned char *)source;
+    size_t n = 0;
+
+    while (*c && n + 1 < taille) {
+        const char *lettres = ligature(c);
+        if (lettres) {
+            if (n + 2 >= taille) break;
+            destination[n++] = lettres[0];
+            destination[n++] = lettres[1];
+            c += 2;
+        } else if (c[0] == 0xC3 && c[1] >= 0x80 && c[1] <= 0xBF) {
+            char base = bases[c[1] - 0x80];
+            if (base != '_') destination[n++] = base;
+            c += 2;
+        } else {
+            destination[n++] = (char)tolower(*c);
+            c++;
         }
+    }
+    destination[n] = '\0';
+    return n;
+}
 
-        
-        memset(nouveau->nom, 0, sizeof(nouveau->nom));
-        memset(nouveau->prenom, 0, sizeof(nouveau->prenom));
+int noms_nouveau_noeud(IndexNoms *index, char c) {
+    if (index->nb_noeuds == index->capacite_noeuds) {
+        int capacite = index->capacite_noeuds ? index->capacite_noeuds * 2 : 1024;
+        NoeudNom *noeuds = realloc(index->noeuds, sizeof(NoeudNom) * capacite);
+        if (!noeuds) return -1;
+        index->noeuds = noeuds;
+        index->capacite_noeuds = capacite;
+    }
+    NoeudNom *noeud = &index->noeuds[index->nb_noeuds];
+    noeud->c = c;
+    noeud->fils = -1;
+    noeud->frere = -1;
+    noeud->entrees = -1;
+    return index->nb_noeuds++;
+}
 
-        
-        strncpy(nouveau->nom, nom, sizeof(nouveau->nom) - 1);
-        strncpy(nouveau->prenom, prenom, sizeof(nouveau->prenom) - 1);
-        
-        nouveau->CNE = CNE;
-        memcpy(nouveau->notes, notes, sizeof(notes));
-        calculer_moyenne(nouveau);
+// Fils de `parent` portant `c`, cree au besoin; les freres restent tries
+// pour que le parcours sorte les noms dans l'ordre alphabetique
+int noms_fils(IndexNoms *index, int parent, char c, int creer) {
+    int *lien = &index->noeuds[parent].fils;
+    while (*lien >= 0 && (unsigned char)index->noeuds[*lien].c < (unsigned char)c) {
+        lien = &index->noeuds[*lien].frere;
+    }
+    if (*lien >= 0 && index->noeuds[*lien].c == c) return *lien;
+    if (!creer) return -1;
 
-        nouveau->suivant = tete;
-        tete = nouveau;
+    int nouveau = noms_nouveau_noeud(index, c);
+    if (nouveau < 0) return -1;
+    // Le tableau a pu etre deplace: retrouver le lien
+    lien = &index->noeuds[parent].fils;
+    while (*lien >= 0 && (unsigned char)index->noeuds[*lien].c < (unsigned char)c) {
+        lien = &index->noeuds[*lien].frere;
     }
-    fclose(file);
+    index->noeuds[nouveau].frere = *lien;
+    *lien = nouveau;
+    return nouveau;
+}
 
-    result.success = 1;
-    result.message = strdup("Fichier chargé avec succès");
-    result.liste = tete;
-    return result;
+int noms_ajouter_mot(IndexNoms *index, const char *mot, Etudiant *etudiant) {
+    char normalise[MAX_STRING_LENGTH];
+    normaliser_nom(mot, normalise, sizeof(normalise));
+
+    int noeud = 0;
+    for (const char *c = normalise; *c && noeud >= 0; c++) {
+        noeud = noms_fils(index, noeud, *c, 1);
+    }
+    if (noeud < 0) return 0;
+
+    int entree = index->libres;
+    if (entree >= 0) {
+        index->libres = index->entrees[entree].suivante;
+    } else {
+        if (index->nb_entrees == index->capacite_entrees) {
+            int capacite = index->capacite_entrees ? index->capacite_entrees * 2 : 1024;
+            EntreeNom *entrees = realloc(index->entrees, sizeof(EntreeNom) * capacite);
+            if (!entrees) return 0;
+            index->entrees = entrees;
+            index->capacite_entrees = capacite;
+        }
+        entree = index->nb_entrees++;
+    }
+    index->entrees[entree].etudiant = etudiant;
+    index->entrees[entree].suivante = index->noeuds[noeud].entrees;
+    index->noeuds[noeud].entrees = entree;
+    return 1;
 }
 
-EXPORT OperationResult mettre_a_jour_fichier(Etudiant *tete, const char *filename) {
-    OperationResult result = {0, NULL, NULL, NULL};
-    FILE *file = fopen(filename, "w");
-    if (!file) {
-        result.message = strdup("Erreur d'ouverture du fichier");
-        return result;
+void noms_retirer_mot(IndexNoms *index, const char *mot, Etudiant *etudiant) {
+    char normalise[MAX_STRING_LENGTH];
+    normaliser_nom(mot, normalise, sizeof(normalise));
+
+    int noeud = 0;
+    for (const char *c = normalise; *c && noeud >= 0; c++) {
+        noeud = noms_fils(index, noeud, *c, 0);
     }
+    if (noeud < 0) return;
 
-    Etudiant *current = tete;
-    while (current) {
-        fprintf(file, "%s %s %d %.2f %.2f %.2f %.2f\n",
-                current->nom, current->prenom, current->CNE,
-                current->notes[0], current->notes[1],
-                current->notes[2], current->notes[3]);
-        current = current->suivant;
+    int *lien = &index->noeuds[noeud].entrees;
+    while (*lien >= 0 && index->entrees[*lien].etudiant != etudiant) {
+        lien = &index->entrees[*lien].suivante;
     }
-    fclose(file);
+    if (*lien < 0) return;
 
-    result.success = 1;
-    result.message = strdup("Fichier mis à jour avec succès");
-    return result;
+    int entree = *lien;
+    *lien = index->entrees[entree].suivante;
+    index->entrees[entree].suivante = index->libres;
+    index->libres = entree;
 }
 
-EXPORT char* afficher_etudiant(Etudiant *etudiant) {
-    if (!etudiant) return NULL;
-    
-    char *buffer = malloc(MAX_BUFFER_SIZE);
-    if (!buffer) return NULL;
-    
-   
-    memset(buffer, 0, MAX_BUFFER_SIZE);
-    snprintf(buffer, MAX_BUFFER_SIZE, 
-            "Nom: %s\nPrenom: %s\nCNE: %d\nNotes: %.2f, %.2f, %.2f, %.2f\nMoyenne: %.2f",
-            etudiant->nom, etudiant->prenom, etudiant->CNE,
-            etudiant->notes[0], etudiant->notes[1],
-            etudiant->notes[2], etudiant->notes[3],
-            etudiant->moyenne);
-    
-    return buffer;
+void noms_inserer(IndexNoms *index, Etudiant *etudiant) {
+    if (!index->valide) return;
+    if (!index->nb_noeuds && noms_nouveau_noeud(index, '\0') < 0) {
+        index->valide = 0;
+        return;
+    }
+    if (!noms_ajouter_mot(index, etudiant->nom, etudiant) ||
+        !noms_ajouter_mot(index, etudiant->prenom, etudiant)) {
+        // Reconstruit a la prochaine recherche
+        index->valide = 0;
+    }
 }
 
-EXPORT char* afficher_liste_etudiants(Etudiant *tete) {
-    if (!tete) return strdup("Aucun etudiant dans la liste");
-    
-   
-    size_t size = MAX_BUFFER_SIZE;
-    Etudiant *current = tete;
-    while (current) {
-        size += MAX_BUFFER_SIZE;
-        current = current->suivant;
+void noms_retirer(IndexNoms *index, Etudiant *etudiant) {
+    if (!index->valide || !index->nb_noeuds) return;
+    noms_retirer_mot(index, etudiant->nom, etudiant);
+    noms_retirer_mot(index, etudiant->prenom, etudiant);
+}
+
+// Un index vide est valide pour une liste vide; il suit ensuite indexCNE
+void noms_vider(IndexNoms *index) {
+    free(index->noeuds);
+    free(index->entrees);
+    index->noeuds = NULL;
+    index->nb_noeuds = 0;
+    index->capacite_noeuds = 0;
+    index->entrees = NULL;
+    index->nb_entrees = 0;
+    index->capacite_entrees = 0;
+    index->libres = -1;
+    index->valide = 1;
+}
+
+int noms_construire(IndexNoms *index, Etudiant *tete) {
+    noms_vider(index);
+    for (Etudiant *current = tete; current && index->valide; current = current->suivant) {
+        noms_inserer(index, current);
     }
-    
-    char *buffer = malloc(size);
-    if (!buffer) return NULL;
-    
-    
-    memset(buffer, 0, size);
-    
-    buffer[0] = '\0';
-    current = tete;
-    int i = 1;
-    while (current) {
-        char *etudiant_str = afficher_etudiant(current);
-        if (etudiant_str) {
-            char temp[MAX_BUFFER_SIZE];
-            snprintf(temp, sizeof(temp), "\nEtudiant %d:\n%s\n----------------\n", i++, etudiant_str);
-            strncat(buffer, temp, size - strlen(buffer) - 1);
-            free(etudiant_str);
-        }
-        current = current->suivant;
+    return index->valide;
+}
+
+// Chainage double: insertion en tete et detachement en O(1)
+void lier_en_tete(Etudiant **tete, Etudiant *etudiant) {
+    contexte->generationListe++;
+    etudiant->precedent = NULL;
+    etudiant->suivant = *tete;
+    if (*tete) {
+        (*tete)->precedent = etudiant;
     }
-    
-    return buffer;
+    *tete = etudiant;
 }
 
-EXPORT OperationResult ajouter_etudiant(Etudiant **tete, const char *filename, 
-                                      const char *nom, const char *prenom, 
-                                      int CNE, const float *notes) {
-    OperationResult result = {0, NULL, NULL, NULL};
-    
-  
-    if (!nom || !prenom || CNE <= 0) {
-        result.message = strdup("Données invalides");
-        return result;
+void detacher(Etudiant **tete, Etudiant *etudiant) {
+    contexte->generationListe++;
+    if (etudiant->precedent) {
+        etudiant->precedent->suivant = etudiant->suivant;
+    } else {
+        *tete = etudiant->suivant;
     }
-    
-    for (int i = 0; i < 4; i++) {
-        if (notes[i] < 0 || notes[i] > 20) {
-            result.message = strdup("Notes invalides");
-            return result;
-        }
+    if (etudiant->suivant) {
+        etudiant->suivant->precedent = etudiant->precedent;
     }
-    
-  
-    Etudiant *current = *tete;
-    while (current) {
-        if (current->CNE == CNE) {
-            result.message = strdup("Un étudiant avec ce CNE existe déjà");
-            return result;
-        }
-        current = current->suivant;
+    etudiant->suivant = NULL;
+    etudiant->precedent = NULL;
+}
+
+Etudiant *chercher_lineaire(Etudiant *tete, int CNE) {
+    for (Etudiant *current = tete; current; current = current->suivant) {
+        if (current->CNE == CNE) return current;
     }
-    
-    Etudiant *nouveau = malloc(sizeof(Etudiant));
-    if (!nouveau) {
-        result.message = strdup("Erreur d'allocation mémoire");
-        return result;
+    return NULL;
+}
+
+Etudiant *chercher_noeud(Etudiant *tete, int CNE) {
+    if (contexte->indexCNE.actif) {
+        return index_chercher(&contexte->indexCNE, CNE);
     }
+    return chercher_lineaire(tete, CNE);
+}
 
-    strncpy(nouveau->nom, nom, MAX_STRING_LENGTH - 1);
-    nouveau->nom[MAX_STRING_LENGTH - 1] = '\0';
-    strncpy(nouveau->prenom, prenom, MAX_STRING_LENGTH - 1);
-    nouveau->prenom[MAX_STRING_LENGTH - 1] = '\0';
-    nouveau->CNE = CNE;
-    memcpy(nouveau->notes, notes, sizeof(float)*4);
+
+void calculer_moyenne(Etudiant *etudiant) {
+    if (!etudiant) return;
+    etudiant->moyenne = 0;
+    for (int i = 0; i < 4; i++) {
+        etudiant->moyenne += etudiant->notes[i];
+    }
+    etudiant->moyenne /= 4;
+}
+
+int donnees_valides(int CNE, const float *notes) {
+    if (CNE <= 0) return 0;
+    for (int i = 0; i < 4; i++) {
+        if (!(notes[i] >= 0 && notes[i] <= 20)) return 0;
+    }
+    return 1;
+}
+
+Etudiant *reserve_allouer(Reserve *reserve) {
+    Etudiant *noeud = reserve->libres;
+    if (noeud) {
+        reserve->libres = noeud->suivant;
+    } else {
+        BlocNoeuds *bloc = reserve->blocs;
+        if (!bloc || bloc->utilises == bloc->capacite) {
+            // Chaque bloc double la capacite totale, dans les limites fixees
+            size_t capacite = reserve->capacite;
+            if (capacite < RESERVE_BLOC_MIN) capacite = RESERVE_BLOC_MIN;
+            if (capacite > RESERVE_BLOC_MAX) capacite = RESERVE_BLOC_MAX;
+            bloc = malloc(sizeof(BlocNoeuds) + capacite * sizeof(Etudiant));
+            if (!bloc) return NULL;
+            bloc->capacite = capacite;
+            bloc->utilises = 0;
+            bloc->suivant = reserve->blocs;
+            reserve->blocs = bloc;
+            reserve->capacite += capacite;
+            reserve->nb_blocs++;
+        }
+        noeud = &bloc->noeuds[bloc->utilises++];
+    }
+    reserve->vivants++;
+    memset(noeud, 0, sizeof(Etudiant));
+    return noeud;
+}
+
+void reserve_rendre(Reserve *reserve, Etudiant *noeud) {
+    if (!noeud) return;
+    noeud->suivant = reserve->libres;
+    reserve->libres = noeud;
+    reserve->vivants--;
+}
+
+void reserve_vider(Reserve *reserve) {
+    while (reserve->blocs) {
+        BlocNoeuds *bloc = reserve->blocs;
+        reserve->blocs = bloc->suivant;
+        free(bloc);
+    }
+    memset(reserve, 0, sizeof(Reserve));
+}
+
+// Verse les blocs et les noeuds libres de `source` dans `reserve`; les noeuds
+// gardent leur adresse. Le bloc courant de `reserve` reste en tete.
+void reserve_adopter(Reserve *reserve, Reserve *source) {
+    if (!reserve->blocs) {
+        *reserve = *source;
+        memset(source, 0, sizeof(Reserve));
+        return;
+    }
+    if (source->blocs) {
+        BlocNoeuds *dernier = source->blocs;
+        while (dernier->suivant) dernier = dernier->suivant;
+        dernier->suivant = reserve->blocs->suivant;
+        reserve->blocs->suivant = source->blocs;
+    }
+    if (source->libres) {
+        Etudiant *dernier = source->libres;
+        while (dernier->suivant) dernier = dernier->suivant;
+        dernier->suivant = reserve->libres;
+        reserve->libres = source->libres;
+    }
+    reserve->vivants += source->vivants;
+    reserve->capacite += source->capacite;
+    reserve->nb_blocs += source->nb_blocs;
+    memset(source, 0, sizeof(Reserve));
+}
+
+size_t reserve_octets(const Reserve *reserve) {
+    return reserve->nb_blocs * sizeof(BlocNoeuds) + reserve->capacite * sizeof(Etudiant);
+}
+
+Etudiant *creer_etudiant(Reserve *reserve, const char *nom, const char *prenom, int CNE, const float *notes) {
+    Etudiant *nouveau = reserve_allouer(reserve);
+    if (!nouveau) return NULL;
+
+    strncpy(nouveau->nom, nom, MAX_STRING_LENGTH - 1);
+    strncpy(nouveau->prenom, prenom, MAX_STRING_LENGTH - 1);
+    nouveau->CNE = CNE;
+    memcpy(nouveau->notes, notes, sizeof(float) * 4);
+    calculer_moyenne(nouveau);
+    return nouveau;
+}
+
+size_t compter_liste(Etudiant *tete) {
+    if (contexte->indexCNE.actif) return contexte->indexCNE.taille;
+
+    size_t n = 0;
+    for (; tete; tete = tete->suivant) n++;
+    return n;
+}
+
+// Journal des operations: une ligne par mutation, ajoutee a <fichier>.journal
+void chemin_journal(const char *filename, char *chemin, size_t taille) {
+    snprintf(chemin, taille, "%s.journal", filename);
+}
+
+FILE *journal_ouvrir(const char *filename) {
+    char chemin[FILENAME_MAX];
+    chemin_journal(filename, chemin, sizeof(chemin));
+    return fopen(chemin, "a");
+}
+
+int partition_chercher(const char *filename) {
+    for (int i = 0; i < contexte->nb_partitions; i++) {
+        if (strcmp(contexte->partitions[i].fichier, filename) == 0) return i;
+    }
+    return -1;
+}
+
+// Partition du fichier, ajoutee a la table au besoin; -1 si memoire insuffisante
+int partition_pour(const char *filename) {
+    int partition = partition_chercher(filename);
+    if (partition >= 0) return partition;
+
+    Partition *table = realloc(contexte->partitions, sizeof(Partition) * (contexte->nb_partitions + 1));
+    if (!table) return -1;
+    contexte->partitions = table;
+    snprintf(contexte->partitions[contexte->nb_partitions].fichier, FILENAME_MAX, "%s", filename);
+    contexte->partitions[contexte->nb_partitions].entrees = 0;
+    contexte->partitions[contexte->nb_partitions].taille = -1;
+    contexte->partitions[contexte->nb_partitions].date = -1;
+    return contexte->nb_partitions++;
+}
+
+// Taille et date de modification du fichier; 0 s'il n'existe pas
+int signature_fichier(const char *filename, long *taille, long long *date) {
+    struct stat etat;
+    if (stat(filename, &etat) != 0) return 0;
+    *taille = (long)etat.st_size;
+#ifdef __linux__
+    *date = (long long)etat.st_mtim.tv_sec * 1000000000LL + etat.st_mtim.tv_nsec;
+#else
+    *date = (long long)etat.st_mtime;
+#endif
+    return 1;
+}
+
+// Note l'etat du fichier de la partition apres une lecture ou une ecriture
+void partition_signer(int partition) {
+    if (partition < 0 || partition >= contexte->nb_partitions) return;
+    Partition *p = &contexte->partitions[partition];
+    if (!signature_fichier(p->fichier, &p->taille, &p->date)) {
+        p->taille = -1;
+        p->date = -1;
+    }
+}
+
+void partitions_vider() {
+    free(contexte->partitions);
+    contexte->partitions = NULL;
+    contexte->nb_partitions = 0;
+}
+
+// Fichier ou ecrire une mutation de la partition, `defaut` si elle est inconnue
+const char *fichier_partition(int partition, const char *defaut) {
+    return partition >= 0 && partition < contexte->nb_partitions ? contexte->partitions[partition].fichier : defaut;
+}
+
+size_t entrees_fichier(const char *filename) {
+    int partition = partition_chercher(filename);
+    return partition >= 0 ? contexte->partitions[partition].entrees : 0;
+}
+
+int journal_fermer(FILE *file, int ok, size_t lignes, const char *filename) {
+    ok = (fclose(file) == 0) && ok;
+    if (ok) {
+        int partition = partition_pour(filename);
+        if (partition >= 0) contexte->partitions[partition].entrees += lignes;
+    }
+    return ok;
+}
+
+int journal_ecrire(const char *filename, const char *ligne) {
+    FILE *file = journal_ouvrir(filename);
+    if (!file) return 0;
+    return journal_fermer(file, fputs(ligne, file) >= 0, 1, filename);
+}
+
+#define FORMAT_JOURNAL "%c %s %s %d %.2f %.2f %.2f %.2f\n"
+
+void ligne_etudiant(char *ligne, size_t taille, char type, const Etudiant *etudiant) {
+    snprintf(ligne, taille, FORMAT_JOURNAL,
+             type, etudiant->nom, etudiant->prenom, etudiant->CNE,
+             etudiant->notes[0], etudiant->notes[1],
+             etudiant->notes[2], etudiant->notes[3]);
+}
+
+// Ajoute la ligne au journal; le replie dans le fichier quand il devient
+// plus long que la liste elle-meme (cout amorti constant par mutation)
+size_t seuil_compaction(Etudiant *tete) {
+    size_t seuil = compter_liste(tete);
+    return seuil < SEUIL_COMPACTION ? SEUIL_COMPACTION : seuil;
+}
+
+int compacter_fichier(Etudiant *tete, const char *filename) {
+    OperationResult file_result = mettre_a_jour_fichier(tete, filename);
+    free(file_result.message);
+    return file_result.success;
+}
+
+int persister(Etudiant *tete, const char *filename, const char *ligne) {
+    if (!journal_ecrire(filename, ligne)) return 0;
+    if (entrees_fichier(filename) < seuil_compaction(tete)) return 1;
+    return compacter_fichier(tete, filename);
+}
+
+// Un changement d'ordre touche chaque fichier de la liste
+int persister_partout(Etudiant *tete, const char *filename, const char *ligne) {
+    if (contexte->nb_partitions <= 1) return persister(tete, filename, ligne);
+
+    int ok = 1;
+    for (int i = 0; i < contexte->nb_partitions; i++) {
+        ok = persister(tete, contexte->partitions[i].fichier, ligne) && ok;
+    }
+    return ok;
+}
+
+int compacter_partout(Etudiant *tete, const char *filename) {
+    if (contexte->nb_partitions <= 1) return compacter_fichier(tete, filename);
+
+    int ok = 1;
+    for (int i = 0; i < contexte->nb_partitions; i++) {
+        ok = compacter_fichier(tete, contexte->partitions[i].fichier) && ok;
+    }
+    return ok;
+}
+
+// Rejoue le journal sur la liste chargee, dont l'ordre est suivi dans *tri;
+// les noeuds ajoutes ou supprimes sont pris ou rendus a `reserve`.
+// Retourne le nombre d'entrees, -1 si memoire insuffisante
+int rejouer_journal(Etudiant **tete, const char *filename, IndexCNE *index, Reserve *reserve, TriActif *tri) {
+    char chemin[FILENAME_MAX];
+    chemin_journal(filename, chemin, sizeof(chemin));
+
+    FILE *file = fopen(chemin, "r");
+    if (!file) return 0;
+
+    char ligne[MAX_BUFFER_SIZE];
+    char nom[MAX_STRING_LENGTH], prenom[MAX_STRING_LENGTH];
+    int CNE;
+    float notes[4];
+    CritereTri critere;
+    int entrees = 0;
+
+    while (fgets(ligne, sizeof(ligne), file)) {
+        // 'S' decrit seulement l'ordre du fichier, ce n'est pas une mutation
+        if (ligne[0] != 'S') entrees++;
+
+        switch (ligne[0]) {
+        case 'A':
+        case 'R':
+            if (sscanf(ligne + 1, "%49s %49s %d %f %f %f %f",
+                       nom, prenom, &CNE, &notes[0], &notes[1], &notes[2], &notes[3]) != 7 ||
+                !donnees_valides(CNE, notes) || index_chercher(index, CNE)) {
+                break;
+            }
+            Etudiant *nouveau = creer_etudiant(reserve, nom, prenom, CNE, notes);
+            if (!nouveau || index_inserer(index, nouveau) < 0) {
+                reserve_rendre(reserve, nouveau);
+                fclose(file);
+                return -1;
+            }
+            inserer_noeud_selon(tete, nouveau, tri);
+            break;
+        case 'D':
+            if (sscanf(ligne + 1, "%d", &CNE) == 1) {
+                Etudiant *etudiant = index_chercher(index, CNE);
+                if (etudiant) {
+                    detacher(tete, etudiant);
+                    index_retirer(index, CNE);
+                    reserve_rendre(reserve, etudiant);
+                }
+            }
+            break;
+        case 'T':
+        case 'S':
+            if (sscanf(ligne + 1, "%d %d %d", &critere.cle, &critere.ordre, &critere.cle_secondaire) == 3 &&
+                cle_valide(critere.cle)) {
+                if (ligne[0] == 'T' && !trier_liste(tete, &critere)) break;
+                tri->actif = 1;
+                tri->critere = critere;
+            }
+            break;
+        }
+    }
+    fclose(file);
+    return entrees;
+}
+
+void rapport_vider(RapportLecture *rapport) {
+    free(rapport->erreurs);
+    memset(rapport, 0, sizeof(RapportLecture));
+}
+
+// Note une ligne ignoree (texte: `longueur` octets, tronques a l'extrait);
+// au-dela de RAPPORT_MAX elle est seulement comptee. Retourne 0 si memoire insuffisante
+int rapport_noter(RapportLecture *rapport, long ligne, int code, const char *texte, size_t longueur) {
+    if (!rapport) return 1;
+    rapport->total++;
+    if (rapport->nombre >= RAPPORT_MAX) return 1;
+    if (rapport->nombre == rapport->capacite) {
+        long capacite = rapport->capacite ? rapport->capacite * 2 : 16;
+        ErreurLecture *erreurs = realloc(rapport->erreurs, capacite * sizeof(ErreurLecture));
+        if (!erreurs) return 0;
+        rapport->erreurs = erreurs;
+        rapport->capacite = capacite;
+    }
+    ErreurLecture *erreur = &rapport->erreurs[rapport->nombre++];
+    erreur->ligne = ligne;
+    erreur->code = code;
+    erreur->partition = 0;
+    if (longueur >= MAX_STRING_LENGTH) {
+        // Coupe avant un caractere UTF-8 plutot qu'au milieu
+        longueur = MAX_STRING_LENGTH - 1;
+        while (longueur > 0 && ((unsigned char)texte[longueur] & 0xC0) == 0x80) longueur--;
+    }
+    memcpy(erreur->extrait, texte, longueur);
+    erreur->extrait[longueur] = '\0';
+    return 1;
+}
+
+// Verse les erreurs de `source` dans `rapport`, lignes decalees de `decalage`
+int rapport_fusionner(RapportLecture *rapport, const RapportLecture *source, long decalage, int partition) {
+    if (!rapport) return 1;
+    for (long i = 0; i < source->nombre; i++) {
+        const ErreurLecture *erreur = &source->erreurs[i];
+        long nombre = rapport->nombre;
+        if (!rapport_noter(rapport, erreur->ligne + decalage, erreur->code,
+                           erreur->extrait, strlen(erreur->extrait))) return 0;
+        if (rapport->nombre > nombre) rapport->erreurs[nombre].partition = partition;
+    }
+    rapport->total += source->total - source->nombre;
+    return 1;
+}
+
+int comparer_erreurs(const void *a, const void *b) {
+    const ErreurLecture *x = a, *y = b;
+    if (x->partition != y->partition) return x->partition < y->partition ? -1 : 1;
+    return (x->ligne > y->ligne) - (x->ligne < y->ligne);
+}
+
+// Projection d'un fichier en memoire, en lecture seule
+typedef struct Projection {
+    const char *donnees;
+    size_t taille;
+#ifdef _WIN32
+    HANDLE fichier;
+    HANDLE vue;
+#else
+    int fd;
+#endif
+} Projection;
+
+// Retourne 0 si le fichier ne s'ouvre pas. Un fichier vide n'est pas projete
+// (donnees vaut NULL)
+int projection_ouvrir(Projection *projection, const char *filename) {
+    memset(projection, 0, sizeof(Projection));
+#ifdef _WIN32
+    projection->fichier = CreateFileA(filename, GENERIC_READ, FILE_SHARE_READ, NULL, OPEN_EXISTING,
+                                      FILE_FLAG_SEQUENTIAL_SCAN, NULL);
+    if (projection->fichier == INVALID_HANDLE_VALUE) return 0;
+    LARGE_INTEGER taille;
+    if (!GetFileSizeEx(projection->fichier, &taille)) {
+        CloseHandle(projection->fichier);
+        return 0;
+    }
+    projection->taille = (size_t)taille.QuadPart;
+    if (!projection->taille) return 1;
+    projection->vue = CreateFileMappingA(projection->fichier, NULL, PAGE_READONLY, 0, 0, NULL);
+    if (projection->vue) projection->donnees = MapViewOfFile(projection->vue, FILE_MAP_READ, 0, 0, 0);
+    if (!projection->donnees) {
+        if (projection->vue) CloseHandle(projection->vue);
+        CloseHandle(projection->fichier);
+        return 0;
+    }
+#else
+    projection->fd = open(filename, O_RDONLY);
+    if (projection->fd < 0) return 0;
+    struct stat infos;
+    if (fstat(projection->fd, &infos) != 0) {
+        close(projection->fd);
+        return 0;
+    }
+    projection->taille = (size_t)infos.st_size;
+    if (!projection->taille) return 1;
+    void *donnees = mmap(NULL, projection->taille, PROT_READ, MAP_PRIVATE, projection->fd, 0);
+    if (donnees == MAP_FAILED) {
+        close(projection->fd);
+        return 0;
+    }
+    madvise(donnees, projection->taille, MADV_SEQUENTIAL);
+    projection->donnees = donnees;
+#endif
+    return 1;
+}
+
+void projection_fermer(Projection *projection) {
+#ifdef _WIN32
+    if (projection->donnees) UnmapViewOfFile(projection->donnees);
+    if (projection->vue) CloseHandle(projection->vue);
+    CloseHandle(projection->fichier);
+#else
+    if (projection->donnees) munmap((void *)projection->donnees, projection->taille);
+    close(projection->fd);
+#endif
+}
+
+int nombre_processeurs() {
+#ifdef _WIN32
+    SYSTEM_INFO infos;
+    GetSystemInfo(&infos);
+    return (int)infos.dwNumberOfProcessors;
+#else
+    long nombre = sysconf(_SC_NPROCESSORS_ONLN);
+    return nombre > 0 ? (int)nombre : 1;
+#endif
+}
+
+// Part d'un fichier texte lue par un thread: ses noeuds viennent de sa propre
+// reserve et sont chaines dans l'ordre du fichier. Jusqu'a l'assemblage, le
+// champ partition d'un noeud tient son numero de ligne dans le morceau.
+typedef struct Morceau {
+    const char *debut;
+    const char *fin;
+    Etudiant *tete;
+    Etudiant *queue;
+    Reserve reserve;
+    RapportLecture rapport;
+    long lignes;
+    volatile long fait;
+    // 1 si lu, -1 si memoire insuffisante, -2 si annule
+    int code;
+    // Le morceau lu par le thread appelant publie l'avancement de tous;
+    // publie est la part deja ajoutee a suivi
+    Progression *suivi;
+    long publie;
+    struct Morceau *groupe;
+    int nombre;
+} Morceau;
+
+// Copie le mot suivant dans `mot`; retourne la position qui le suit, NULL
+// s'il manque ou depasse MAX_STRING_LENGTH - 1 caracteres
+const char *lire_mot(const char *p, char *mot) {
+    while (*p == ' ' || *p == '\t') p++;
+    size_t n = 0;
+    while (*p && !isspace((unsigned char)*p)) {
+        if (n == MAX_STRING_LENGTH - 1) return NULL;
+        mot[n++] = *p++;
+    }
+    mot[n] = '\0';
+    return n ? p : NULL;
+}
+
+int fin_de_nombre(const char *debut, const char *fin) {
+    return fin != debut && (!*fin || isspace((unsigned char)*fin));
+}
+
+// Analyse "nom prenom CNE note1 note2 note3 note4". Retourne 0 si la ligne est
+// valide, -1 si elle est vide, sinon un motif LECTURE_*
+int analyser_ligne(const char *ligne, char *nom, char *prenom, int *CNE, float *notes) {
+    const char *p = ligne;
+    while (isspace((unsigned char)*p)) p++;
+    if (!*p) return -1;
+
+    p = lire_mot(p, nom);
+    if (p) p = lire_mot(p, prenom);
+    if (!p) return LECTURE_FORMAT;
+
+    char *fin;
+    long cne = strtol(p, &fin, 10);
+    if (!fin_de_nombre(p, fin)) return LECTURE_FORMAT;
+    p = fin;
+    for (int i = 0; i < 4; i++) {
+        notes[i] = strtof(p, &fin);
+        if (!fin_de_nombre(p, fin)) return LECTURE_FORMAT;
+        p = fin;
+    }
+    while (isspace((unsigned char)*p)) p++;
+    if (*p) return LECTURE_FORMAT;
+
+    if (cne <= 0 || cne > INT_MAX) return LECTURE_CNE_INVALIDE;
+    *CNE = (int)cne;
+    return donnees_valides(*CNE, notes) ? 0 : LECTURE_NOTES_INVALIDES;
+}
+
+void publier_progression(Morceau *morceau) {
+    long fait = 0;
+    for (int i = 0; i < morceau->nombre; i++) {
+        fait += morceau->groupe[i].fait;
+    }
+    progression_avancer(morceau->suivi, fait - morceau->publie);
+    morceau->publie = fait;
+}
+
+// Lit les lignes du morceau; une ligne invalide est notee dans son rapport
+// et la lecture continue
+void morceau_lire(Morceau *morceau) {
+    char ligne[MAX_BUFFER_SIZE];
+    char nom[MAX_STRING_LENGTH], prenom[MAX_STRING_LENGTH];
+    int CNE;
+    float notes[4];
+    const char *p = morceau->debut;
+
+    morceau->code = 1;
+    while (p < morceau->fin) {
+        const char *fin_ligne = memchr(p, '\n', morceau->fin - p);
+        if (!fin_ligne) fin_ligne = morceau->fin;
+        size_t longueur = fin_ligne - p;
+        if (longueur && p[longueur - 1] == '\r') longueur--;
+        long numero = ++morceau->lignes;
+
+        if (numero % PAS_PROGRESSION == 0) {
+            morceau->fait = p - morceau->debut;
+            if (morceau->suivi) publier_progression(morceau);
+            if (morceau->groupe->suivi && morceau->groupe->suivi->annulation) {
+                morceau->code = -2;
+                return;
+            }
+        }
+
+        int motif = LECTURE_FORMAT;
+        if (longueur < sizeof(ligne)) {
+            memcpy(ligne, p, longueur);
+            ligne[longueur] = '\0';
+            motif = analyser_ligne(ligne, nom, prenom, &CNE, notes);
+        }
+        if (motif > 0 && !rapport_noter(&morceau->rapport, numero, motif, p, longueur)) {
+            morceau->code = -1;
+            return;
+        }
+        p = fin_ligne + 1;
+        if (motif) continue;
+
+        Etudiant *nouveau = creer_etudiant(&morceau->reserve, nom, prenom, CNE, notes);
+        if (!nouveau) {
+            morceau->code = -1;
+            return;
+        }
+        nouveau->partition = (int)numero;
+        nouveau->precedent = morceau->queue;
+        if (morceau->queue) {
+            morceau->queue->suivant = nouveau;
+        } else {
+            morceau->tete = nouveau;
+        }
+        morceau->queue = nouveau;
+    }
+    morceau->fait = morceau->fin - morceau->debut;
+}
+
+#ifdef _WIN32
+DWORD WINAPI morceau_thread(LPVOID morceau) {
+    morceau_lire(morceau);
+    return 0;
+}
+#else
+void *morceau_thread(void *morceau) {
+    morceau_lire(morceau);
+    return NULL;
+}
+#endif
+
+int fil_lancer(Fil *fil, Morceau *morceau) {
+#ifdef _WIN32
+    *fil = CreateThread(NULL, 0, morceau_thread, morceau, 0, NULL);
+    return *fil != NULL;
+#else
+    return pthread_create(fil, NULL, morceau_thread, morceau) == 0;
+#endif
+}
+
+void fil_attendre(Fil fil) {
+#ifdef _WIN32
+    WaitForSingleObject(fil, INFINITE);
+    CloseHandle(fil);
+#else
+    pthread_join(fil, NULL);
+#endif
+}
+
+// Reunit les morceaux lus dans *tete, dans l'ordre du fichier, en indexant
+// chaque noeud: un CNE deja vu est ecarte et note. Les noeuds gardes passent
+// dans `reserve`. Retourne 1, ou -1 si memoire insuffisante
+int assembler_morceaux(Morceau *morceaux, int nombre, IndexCNE *index, Etudiant **tete,
+                       Reserve *reserve, RapportLecture *rapport) {
+    // Dimensionne l'index une fois pour tous les noeuds lus
+    size_t total = index->taille;
+    for (int i = 0; i < nombre; i++) total += morceaux[i].reserve.vivants;
+    size_t capacite = index->capacite ? index->capacite : CAPACITE_INDEX_INITIALE;
+    while (total * 10 > capacite * 7) capacite *= 2;
+    if (index->actif && capacite != index->capacite && !index_redimensionner(index, capacite)) return -1;
+
+    Etudiant *queue = NULL;
+    long decalage = 0;
+    for (int i = 0; i < nombre; i++) {
+        Morceau *morceau = &morceaux[i];
+        Etudiant *suivant;
+        for (Etudiant *current = morceau->tete; current; current = suivant) {
+            suivant = current->suivant;
+            long ligne = decalage + current->partition;
+            current->partition = 0;
+
+            int insere = index_inserer(index, current);
+            if (insere < 0) return -1;
+            if (!insere) {
+                char extrait[MAX_STRING_LENGTH];
+                int longueur = snprintf(extrait, sizeof(extrait), "%s %s %d",
+                                        current->nom, current->prenom, current->CNE);
+                if (!rapport_noter(rapport, ligne, LECTURE_DOUBLON, extrait,
+                                   longueur < (int)sizeof(extrait) ? (size_t)longueur : sizeof(extrait) - 1)) {
+                    return -1;
+                }
+                reserve_rendre(&morceau->reserve, current);
+                continue;
+            }
+            current->precedent = queue;
+            current->suivant = NULL;
+            if (queue) {
+                queue->suivant = current;
+            } else {
+                *tete = current;
+            }
+            queue = current;
+        }
+        if (!rapport_fusionner(rapport, &morceau->rapport, decalage, 0)) return -1;
+        decalage += morceau->lignes;
+        morceau->tete = NULL;
+        reserve_adopter(reserve, &morceau->reserve);
+    }
+    if (rapport && rapport->nombre > 1) {
+        qsort(rapport->erreurs, rapport->nombre, sizeof(ErreurLecture), comparer_erreurs);
+    }
+    return 1;
+}
+
+// Lit le fichier texte (sans son journal) dans *tete, en indexant chaque noeud.
+// Le fichier est projete en memoire et decoupe en morceaux, aux fins de ligne,
+// lus en parallele puis reunis dans l'ordre du fichier. Une ligne invalide ou
+// un CNE deja lu est ignore et note dans `rapport` (optionnel), sans arreter
+// la lecture. suivi (optionnel) est avance des octets lus et peut annuler; son
+// total est fixe par l'appelant, et plusieurs fichiers lus en parallele
+// peuvent le partager. Aucun etat global n'est touche.
+// Les noeuds viennent de `reserve`, propre a ce chargement: elle est videe en
+// cas d'echec. Retourne 1 si succes, 0 si le fichier ne s'ouvre pas, -1 si
+// memoire insuffisante, -2 si la lecture a ete annulee
+int parser_texte(const char *filename, IndexCNE *index, Etudiant **tete, Reserve *reserve,
+                 Progression *suivi, RapportLecture *rapport) {
+    *tete = NULL;
+    if (suivi && suivi->annulation) return -2;
+    Projection projection;
+    if (!projection_ouvrir(&projection, filename)) return 0;
+
+    int nombre = (int)(projection.taille / TAILLE_MORCEAU_MIN);
+    int processeurs = nombre_processeurs();
+    if (nombre > processeurs) nombre = processeurs;
+    if (nombre > MORCEAUX_MAX) nombre = MORCEAUX_MAX;
+    if (nombre < 1) nombre = 1;
+
+    // Morceaux de tailles voisines, chacun prolonge jusqu'a la fin de sa ligne
+    Morceau morceaux[MORCEAUX_MAX];
+    memset(morceaux, 0, sizeof(Morceau) * nombre);
+    const char *debut = projection.donnees;
+    const char *fin_fichier = projection.donnees + projection.taille;
+    for (int i = 0; i < nombre; i++) {
+        const char *fin = fin_fichier;
+        if (i < nombre - 1) {
+            fin = debut + (fin_fichier - debut) / (nombre - i);
+            const char *saut = memchr(fin, '\n', fin_fichier - fin);
+            fin = saut ? saut + 1 : fin_fichier;
+        }
+        morceaux[i].debut = debut;
+        morceaux[i].fin = fin;
+        morceaux[i].groupe = morceaux;
+        morceaux[i].nombre = nombre;
+        debut = fin;
+    }
+    morceaux[0].suivi = suivi;
+
+    // Le premier morceau est lu par le thread appelant; un morceau dont le
+    // thread ne demarre pas est lu ensuite, a la suite
+    Fil fils[MORCEAUX_MAX];
+    int lances[MORCEAUX_MAX] = {0};
+    for (int i = 1; i < nombre; i++) {
+        lances[i] = fil_lancer(&fils[i], &morceaux[i]);
+    }
+    morceau_lire(&morceaux[0]);
+    for (int i = 1; i < nombre; i++) {
+        if (lances[i]) {
+            fil_attendre(fils[i]);
+        } else {
+            morceau_lire(&morceaux[i]);
+        }
+    }
+    projection_fermer(&projection);
+
+    int code = 1;
+    for (int i = 0; i < nombre; i++) {
+        if (morceaux[i].code < code) code = morceaux[i].code;
+    }
+    if (code > 0) code = assembler_morceaux(morceaux, nombre, index, tete, reserve, rapport);
+
+    for (int i = 0; i < nombre; i++) {
+        reserve_vider(&morceaux[i].reserve);
+        rapport_vider(&morceaux[i].rapport);
+    }
+    if (code <= 0) {
+        reserve_vider(reserve);
+        *tete = NULL;
+        return code;
+    }
+    if (suivi) progression_avancer(suivi, (long)projection.taille - morceaux[0].publie);
+    return 1;
+}
+
+// Charge le fichier texte puis son journal; memes codes que parser_texte
+int charger_texte(const char *filename, IndexCNE *index, Etudiant **tete, Reserve *reserve,
+                  int *entrees, TriActif *tri, RapportLecture *rapport) {
+    long taille = 0;
+    long long date;
+    signature_fichier(filename, &taille, &date);
+    progression_demarrer(taille);
+    int code = parser_texte(filename, index, tete, reserve, &contexte->progression, rapport);
+    if (code <= 0) return code;
+
+    *entrees = rejouer_journal(tete, filename, index, reserve, tri);
+    if (*entrees < 0 || contexte->progression.annulation) {
+        reserve_vider(reserve);
+        *tete = NULL;
+        return *entrees < 0 ? -1 : -2;
+    }
+    return 1;
+}
+
+// Ecrit les etudiants de la partition (tous si partition < 0)
+int ecrire_texte(Etudiant *tete, const char *filename, int partition) {
+    FILE *file = fopen(filename, "w");
+    if (!file) return 0;
+
+    for (Etudiant *current = tete; current; current = current->suivant) {
+        if (partition >= 0 && current->partition != partition) continue;
+        fprintf(file, "%s %s %d %.2f %.2f %.2f %.2f\n",
+                current->nom, current->prenom, current->CNE,
+                current->notes[0], current->notes[1],
+                current->notes[2], current->notes[3]);
+    }
+    if (fclose(file) != 0) return 0;
+    partition_signer(partition_chercher(filename));
+
+    // Le fichier reflete maintenant tout le journal
+    char chemin[FILENAME_MAX];
+    chemin_journal(filename, chemin, sizeof(chemin));
+    remove(chemin);
+    return 1;
+}
+
+
+const char *message_chargement(int code) {
+    switch (code) {
+    case 0: return "Erreur d'ouverture du fichier";
+    case -2: return "Chargement annulé";
+    default: return "Erreur d'allocation mémoire";
+    }
+}
+
+// Main functions
+OperationResult lire_fichier_etudiants_sans_verrou(const char *filename) {
+    OperationResult result = {0, NULL, NULL, NULL};
+    Etudiant *tete = NULL;
+    Reserve reserve = {NULL, NULL, 0, 0, 0};
+    int entrees = 0;
+
+    contexte->progression.annulation = 0;
+    contexte->triActif.actif = 0;
+    historique_vider();
+    partitions_vider();
+    index_vider(&contexte->indexCNE);
+    contexte->indexCNE.actif = 1;
+    rapport_vider(&contexte->rapportLecture);
+
+    int chargement = charger_texte(filename, &contexte->indexCNE, &tete, &reserve, &entrees, &contexte->triActif,
+                                   &contexte->rapportLecture);
+    if (chargement > 0 && partition_pour(filename) < 0) {
+        reserve_vider(&reserve);
+        chargement = -1;
+    }
+    if (chargement <= 0) {
+        index_vider(&contexte->indexCNE);
+        result.message = strdup(message_chargement(chargement));
+        return result;
+    }
+    contexte->partitions[0].entrees = entrees;
+    partition_signer(0);
+    reserve_adopter(&contexte->reserveListe, &reserve);
+    file_attacher(filename);
+
+    result.success = 1;
+    result.message = strdup("Fichier chargé avec succès");
+    result.liste = tete;
+    return result;
+}
+
+EXPORT OperationResult lire_fichier_etudiants(const char *filename) {
+    contexte_entrer(ACCES_ECRITURE);
+    OperationResult resultat = lire_fichier_etudiants_sans_verrou(filename);
+    effacer_annulation();
+    contexte_sortir(ACCES_ECRITURE);
+    return resultat;
+}
+
+// Lignes ignorees par le dernier chargement (lire_fichier_etudiants ou
+// assembler_partitions), par fichier puis par ligne: en copie au plus
+// `capacite` dans `sortie` et retourne leur nombre total
+long erreurs_lecture_sans_verrou(ErreurLecture *sortie, long capacite) {
+    const RapportLecture *rapport = &contexte->rapportLecture;
+    long copies = capacite < rapport->nombre ? capacite : rapport->nombre;
+    if (sortie && copies > 0) memcpy(sortie, rapport->erreurs, copies * sizeof(ErreurLecture));
+    return rapport->total;
+}
+
+EXPORT long erreurs_lecture(ErreurLecture *sortie, long capacite) {
+    contexte_entrer(ACCES_LECTURE);
+    long resultat = erreurs_lecture_sans_verrou(sortie, capacite);
+    contexte_sortir(ACCES_LECTURE);
+    return resultat;
+}
+
+// Ecrit la partition du fichier si la liste en compte plusieurs, sinon toute la liste
+OperationResult mettre_a_jour_fichier_sans_verrou(Etudiant *tete, const char *filename) {
+    OperationResult result = {0, NULL, NULL, NULL};
+    int partition = partition_chercher(filename);
+    if (!ecrire_texte(tete, filename, contexte->nb_partitions > 1 ? partition : -1)) {
+        result.message = strdup("Erreur d'ouverture du fichier");
+        return result;
+    }
+    if (partition >= 0) contexte->partitions[partition].entrees = 0;
+
+    // Le fichier est ecrit dans l'ordre du tri actif: le noter pour que le
+    // rechargement continue d'inserer a la bonne place (sans retrier)
+    if (contexte->triActif.actif) {
+        FILE *file = journal_ouvrir(filename);
+        if (file) {
+            fprintf(file, "S %d %d %d\n", contexte->triActif.critere.cle, contexte->triActif.critere.ordre,
+                    contexte->triActif.critere.cle_secondaire);
+            fclose(file);
+        }
+    }
+
+    result.success = 1;
+    result.message = strdup("Fichier mis à jour avec succès");
+    return result;
+}
+
+EXPORT OperationResult mettre_a_jour_fichier(Etudiant *tete, const char *filename) {
+    contexte_entrer(ACCES_ECRITURE);
+    OperationResult resultat = mettre_a_jour_fichier_sans_verrou(tete, filename);
+    contexte_sortir(ACCES_ECRITURE);
+    return resultat;
+}
+
+OperationResult compacter_journal_sans_verrou(Etudiant *tete, const char *filename) {
+    OperationResult result = mettre_a_jour_fichier(tete, filename);
+    if (result.success) {
+        free(result.message);
+        result.message = strdup("Journal compacté avec succès");
+    }
+    return result;
+}
+
+EXPORT OperationResult compacter_journal(Etudiant *tete, const char *filename) {
+    contexte_entrer(ACCES_ECRITURE);
+    OperationResult resultat = compacter_journal_sans_verrou(tete, filename);
+    contexte_sortir(ACCES_ECRITURE);
+    return resultat;
+}
+
+// Replie le journal de chaque fichier de la liste qui en a un
+OperationResult compacter_partitions_sans_verrou(Etudiant *tete) {
+    OperationResult result = {0, NULL, NULL, NULL};
+    for (int i = 0; i < contexte->nb_partitions; i++) {
+        if (contexte->partitions[i].entrees && !compacter_fichier(tete, contexte->partitions[i].fichier)) {
+            result.message = strdup("Erreur d'ouverture du fichier");
+            return result;
+        }
+    }
+    result.success = 1;
+    result.message = strdup("Journal compacté avec succès");
+    return result;
+}
+
+EXPORT OperationResult compacter_partitions(Etudiant *tete) {
+    contexte_entrer(ACCES_ECRITURE);
+    OperationResult resultat = compacter_partitions_sans_verrou(tete);
+    contexte_sortir(ACCES_ECRITURE);
+    return resultat;
+}
+
+int entrees_journal_sans_verrou() {
+    size_t entrees = 0;
+    for (int i = 0; i < contexte->nb_partitions; i++) {
+        entrees += contexte->partitions[i].entrees;
+    }
+    return (int)entrees;
+}
+
+EXPORT int entrees_journal() {
+    contexte_entrer(ACCES_LECTURE);
+    int resultat = entrees_journal_sans_verrou();
+    contexte_sortir(ACCES_LECTURE);
+    return resultat;
+}
+
+void copier_enregistrement(EnregistrementEtudiant *enregistrement, const Etudiant *etudiant) {
+    memcpy(enregistrement->nom, etudiant->nom, MAX_STRING_LENGTH);
+    memcpy(enregistrement->prenom, etudiant->prenom, MAX_STRING_LENGTH);
+    enregistrement->CNE = etudiant->CNE;
+    memcpy(enregistrement->notes, etudiant->notes, sizeof(enregistrement->notes));
+    enregistrement->moyenne = etudiant->moyenne;
+}
+
+int ecrire_binaire(Etudiant *tete, const char *filename) {
+    FILE *file = fopen(filename, "wb");
+    if (!file) return 0;
+
+    EnteteBinaire entete = {MAGIE_BINAIRE, VERSION_BINAIRE, 0, sizeof(EnregistrementEtudiant)};
+    int ok = fwrite(&entete, sizeof(entete), 1, file) == 1;
+
+    EnregistrementEtudiant *bloc = malloc(BLOC_BINAIRE * sizeof(EnregistrementEtudiant));
+    if (!bloc) ok = 0;
+
+    size_t rempli = 0;
+    for (Etudiant *current = tete; ok && current; current = current->suivant) {
+        memset(&bloc[rempli], 0, sizeof(EnregistrementEtudiant));
+        copier_enregistrement(&bloc[rempli++], current);
+        entete.nombre++;
+        if (rempli == BLOC_BINAIRE) {
+            ok = fwrite(bloc, sizeof(EnregistrementEtudiant), rempli, file) == rempli;
+            rempli = 0;
+        }
+    }
+    if (ok && rempli) {
+        ok = fwrite(bloc, sizeof(EnregistrementEtudiant), rempli, file) == rempli;
+    }
+    free(bloc);
+
+    // Le nombre d'enregistrements n'est connu qu'a la fin
+    if (ok) {
+        ok = fseek(file, 0, SEEK_SET) == 0 && fwrite(&entete, sizeof(entete), 1, file) == 1;
+    }
+    return (fclose(file) == 0) && ok;
+}
+
+// Charge un fichier binaire dans *tete, avec des noeuds pris dans `reserve`
+// (videe en cas d'echec). Retourne 1 si succes, 0 si le fichier est illisible
+// ou invalide, -1 si memoire insuffisante
+int charger_binaire(const char *filename, IndexCNE *index, Etudiant **tete, Reserve *reserve) {
+    FILE *file = fopen(filename, "rb");
+    if (!file) return 0;
+
+    EnteteBinaire entete;
+    if (fread(&entete, sizeof(entete), 1, file) != 1 ||
+        memcmp(entete.magie, MAGIE_BINAIRE, sizeof(entete.magie)) != 0 ||
+        entete.version != VERSION_BINAIRE ||
+        entete.taille_enregistrement != (int)sizeof(EnregistrementEtudiant) ||
+        entete.nombre < 0) {
+        fclose(file);
+        return 0;
+    }
+
+    EnregistrementEtudiant *bloc = malloc(BLOC_BINAIRE * sizeof(EnregistrementEtudiant));
+    if (!bloc) {
+        fclose(file);
+        return -1;
+    }
+
+    Etudiant *queue = NULL;
+    *tete = NULL;
+    size_t restants = (size_t)entete.nombre;
+    while (restants) {
+        size_t lus = fread(bloc, sizeof(EnregistrementEtudiant),
+                           restants < BLOC_BINAIRE ? restants : BLOC_BINAIRE, file);
+        if (!lus) break;
+        restants -= lus;
+
+        for (size_t i = 0; i < lus; i++) {
+            EnregistrementEtudiant *enregistrement = &bloc[i];
+            enregistrement->nom[MAX_STRING_LENGTH - 1] = '\0';
+            enregistrement->prenom[MAX_STRING_LENGTH - 1] = '\0';
+            if (!donnees_valides(enregistrement->CNE, enregistrement->notes) ||
+                index_chercher(index, enregistrement->CNE)) {
+                continue;
+            }
+
+            Etudiant *nouveau = creer_etudiant(reserve, enregistrement->nom, enregistrement->prenom,
+                                               enregistrement->CNE, enregistrement->notes);
+            if (!nouveau || index_inserer(index, nouveau) < 0) {
+                free(bloc);
+                fclose(file);
+                reserve_vider(reserve);
+                *tete = NULL;
+                return -1;
+            }
+            nouveau->precedent = queue;
+            if (queue) {
+                queue->suivant = nouveau;
+            } else {
+                *tete = nouveau;
+            }
+            queue = nouveau;
+        }
+    }
+    free(bloc);
+    fclose(file);
+    return 1;
+}
+
+OperationResult lire_fichier_binaire_sans_verrou(const char *filename) {
+    OperationResult result = {0, NULL, NULL, NULL};
+    Etudiant *tete = NULL;
+    Reserve reserve = {NULL, NULL, 0, 0, 0};
+
+    contexte->triActif.actif = 0;
+    historique_vider();
+    partitions_vider();
+    index_vider(&contexte->indexCNE);
+    contexte->indexCNE.actif = 1;
+    rapport_vider(&contexte->rapportLecture);
+
+    int chargement = charger_binaire(filename, &contexte->indexCNE, &tete, &reserve);
+    if (chargement > 0 && partition_pour(filename) < 0) {
+        reserve_vider(&reserve);
+        chargement = -1;
+    }
+    if (chargement <= 0) {
+        index_vider(&contexte->indexCNE);
+        result.message = strdup(chargement ? "Erreur d'allocation mémoire" : "Fichier binaire invalide");
+        return result;
+    }
+    partition_signer(0);
+    reserve_adopter(&contexte->reserveListe, &reserve);
+    file_attacher(filename);
+
+    result.success = 1;
+    result.message = strdup("Fichier chargé avec succès");
+    result.liste = tete;
+    return result;
+}
+
+EXPORT OperationResult lire_fichier_binaire(const char *filename) {
+    contexte_entrer(ACCES_ECRITURE);
+    OperationResult resultat = lire_fichier_binaire_sans_verrou(filename);
+    contexte_sortir(ACCES_ECRITURE);
+    return resultat;
+}
+
+// Lit un fichier texte dans une partition independante, sans son journal et
+// sans toucher a l'etat global: plusieurs appels peuvent tourner en parallele,
+// un par thread. suivi (optionnel, voir commencer_lecture) est partage par
+// les lectures d'un meme chargement. Le resultat est remis a
+// assembler_partitions (ou a liberer_partition); NULL si memoire insuffisante.
+EXPORT PartitionLue *lire_partition(const char *filename, Progression *suivi) {
+    PartitionLue *lue = calloc(1, sizeof(PartitionLue));
+    if (!lue) return NULL;
+    lue->index.actif = 1;
+    lue->code = parser_texte(filename, &lue->index, &lue->tete, &lue->reserve, suivi, &lue->rapport);
+    return lue;
+}
+
+// Commence le chargement de plusieurs fichiers: l'avancement (lire_progression)
+// couvre leur taille totale et demander_annulation arrete leurs lectures et
+// assembler_partitions. Retourne le suivi a passer a chaque lire_partition.
+EXPORT Progression *commencer_lecture(const char **fichiers, int nombre) {
+    long total = 0;
+    for (int i = 0; i < nombre; i++) {
+        long taille;
+        long long date;
+        if (signature_fichier(fichiers[i], &taille, &date)) total += taille;
+    }
+    contexte->progression.annulation = 0;
+    progression_demarrer(total);
+    return &contexte->progression;
+}
+
+EXPORT void liberer_partition(PartitionLue *lue) {
+    if (!lue) return;
+    index_vider(&lue->index);
+    reserve_vider(&lue->reserve);
+    rapport_vider(&lue->rapport);
+    free(lue);
+}
+
+int meme_tri(const TriActif *a, const TriActif *b) {
+    return a->actif && b->actif && a->critere.cle == b->critere.cle &&
+           a->critere.ordre == b->critere.ordre &&
+           a->critere.cle_secondaire == b->critere.cle_secondaire;
+}
+
+// Rejoue le journal de chaque partition lue, dans l'ordre, puis les reunit en
+// une seule liste indexee par CNE. Une partition illisible, ou qui reprend un
+// CNE d'une partition precedente, est ecartee sans toucher a son fichier:
+// ecartees[i] (optionnel) vaut alors 1 (illisible) ou 2 (CNE en double).
+// Si toutes les partitions sont triees selon le meme critere, elles sont
+// fusionnees et la liste reste triee; sinon elles se suivent. Une lecture
+// annulee, ou une annulation demandee entre deux partitions, abandonne tout
+// le chargement. Les partitions lues sont liberees dans tous les cas.
+OperationResult assembler_partitions_sans_verrou(PartitionLue **lues, const char **fichiers,
+                                                 int nombre, int *ecartees) {
+    OperationResult result = {0, NULL, NULL, NULL};
+
+    contexte->triActif.actif = 0;
+    historique_vider();
+    partitions_vider();
+    index_vider(&contexte->indexCNE);
+    contexte->indexCNE.actif = 1;
+    rapport_vider(&contexte->rapportLecture);
+
+    Etudiant **tetes = calloc(nombre > 0 ? nombre : 1, sizeof(Etudiant *));
+    Reserve reserve = {NULL, NULL, 0, 0, 0};
+    TriActif commun = {0, {0, 0, -1}};
+    int gardees = 0;
+    int etudiants = 0;
+    int premiere = -1;
+    int tous_tries = 1;
+    int erreur = !tetes;
+    int annule = 0;
+
+    for (int i = 0; i < nombre && !erreur && !annule; i++) {
+        PartitionLue *lue = lues[i];
+        TriActif tri = {0, {0, 0, -1}};
+        int motif = (!lue || lue->code <= 0) ? 1 : 0;
+        int entrees = 0;
+
+        if ((lue && lue->code == -2) || contexte->progression.annulation) {
+            annule = 1;
+            break;
+        }
+        if (!motif) {
+            entrees = rejouer_journal(&lue->tete, fichiers[i], &lue->index, &lue->reserve, &tri);
+            if (entrees < 0) erreur = 1;
+        }
+        for (Etudiant *current = motif || erreur ? NULL : lue->tete; current; current = current->suivant) {
+            if (index_chercher(&contexte->indexCNE, current->CNE)) {
+                motif = 2;
+                break;
+            }
+        }
+        if (ecartees) ecartees[i] = motif;
+        if (motif || erreur) continue;
+
+        int partition = partition_pour(fichiers[i]);
+        if (partition < 0) {
+            erreur = 1;
+            break;
+        }
+        contexte->partitions[partition].entrees = entrees;
+        partition_signer(partition);
+        if (!rapport_fusionner(&contexte->rapportLecture, &lue->rapport, 0, partition)) erreur = 1;
+        for (Etudiant *current = lue->tete; current && !erreur; current = current->suivant) {
+            current->partition = partition;
+            if (index_inserer(&contexte->indexCNE, current) < 0) erreur = 1;
+            etudiants++;
+        }
+        if (erreur) break;
+
+        if (!gardees) {
+            commun = tri;
+            premiere = i;
+        } else if (!meme_tri(&commun, &tri)) {
+            tous_tries = 0;
+        }
+        tetes[gardees++] = lue->tete;
+        lue->tete = NULL;
+        reserve_adopter(&reserve, &lue->reserve);
+    }
+
+    for (int i = 0; i < nombre; i++) {
+        liberer_partition(lues[i]);
+    }
+
+    if (erreur || annule || !gardees) {
+        reserve_vider(&reserve);
+        free(tetes);
+        index_vider(&contexte->indexCNE);
+        partitions_vider();
+        rapport_vider(&contexte->rapportLecture);
+        result.message = strdup(erreur ? "Erreur d'allocation mémoire"
+                                : annule ? message_chargement(-2) : "Aucun fichier chargé");
+        return result;
+    }
+
+    // Fusions deux a deux (O(n log k)) si l'ordre est commun, sinon bout a bout
+    tous_tries = tous_tries && commun.actif;
+    for (int largeur = 1; largeur < gardees; largeur *= 2) {
+        for (int i = 0; i + largeur < gardees; i += 2 * largeur) {
+            Etudiant *reunie = NULL;
+            if (tous_tries) {
+                fusionner(tetes[i], tetes[i + largeur], &commun.critere, &reunie);
+            } else {
+                Etudiant **queue = &tetes[i];
+                while (*queue) queue = &(*queue)->suivant;
+                *queue = tetes[i + largeur];
+                reunie = tetes[i];
+            }
+            tetes[i] = reunie;
+        }
+    }
+    Etudiant *tete = tetes[0];
+    free(tetes);
+
+    Etudiant *precedent = NULL;
+    for (Etudiant *current = tete; current; current = current->suivant) {
+        current->precedent = precedent;
+        precedent = current;
+    }
+    contexte->generationListe++;
+    reserve_adopter(&contexte->reserveListe, &reserve);
+    if (tous_tries) contexte->triActif = commun;
+    file_attacher(fichiers[premiere]);
+
+    char message[MAX_BUFFER_SIZE];
+    if (gardees < nombre) {
+        snprintf(message, sizeof(message), "%d fichiers chargés (%d étudiants), %d écartés",
+                 gardees, etudiants, nombre - gardees);
+    } else {
+        snprintf(message, sizeof(message), "%d fichiers chargés (%d étudiants)", gardees, etudiants);
+    }
+    result.success = 1;
+    result.message = strdup(message);
+    result.liste = tete;
+    return result;
+}
+
+EXPORT OperationResult assembler_partitions(PartitionLue **lues, const char **fichiers,
+                                            int nombre, int *ecartees) {
+    contexte_entrer(ACCES_ECRITURE);
+    OperationResult resultat = assembler_partitions_sans_verrou(lues, fichiers, nombre, ecartees);
+    effacer_annulation();
+    contexte_sortir(ACCES_ECRITURE);
+    return resultat;
+}
+
+int meme_etudiant(const Etudiant *a, const Etudiant *b) {
+    return strcmp(a->nom, b->nom) == 0 && strcmp(a->prenom, b->prenom) == 0 &&
+           memcmp(a->notes, b->notes, sizeof(a->notes)) == 0;
+}
+
+int fichier_binaire(const char *filename) {
+    char magie[sizeof(MAGIE_BINAIRE) - 1];
+    FILE *file = fopen(filename, "rb");
+    if (!file) return 0;
+    int binaire = fread(magie, sizeof(magie), 1, file) == 1 &&
+                  memcmp(magie, MAGIE_BINAIRE, sizeof(magie)) == 0;
+    fclose(file);
+    return binaire;
+}
+
+// Relit un fichier de la liste modifie par un autre programme (son journal
+// compris) et n'applique que la difference, par CNE: etudiants apparus,
+// disparus ou dont le nom ou les notes ont change. Les index suivent, la liste
+// garde son ordre (tri actif compris) et l'historique, qui ne decrit plus le
+// fichier, est efface si quelque chose a change. Un CNE present dans une autre
+// partition est laisse a celle-ci. bilan (optionnel) recoit les nombres
+// d'ajouts, de retraits et de modifications.
+OperationResult resynchroniser_fichier_sans_verrou(Etudiant **tete, const char *filename, int *bilan) {
+    OperationResult result = {0, NULL, NULL, NULL};
+    int ajoutes = 0, retires = 0, modifies = 0;
+    if (bilan) bilan[0] = bilan[1] = bilan[2] = 0;
+
+    int partition = partition_chercher(filename);
+    if (partition < 0) {
+        result.message = strdup("Fichier non chargé");
+        return result;
+    }
+    long taille;
+    long long date;
+    if (!signature_fichier(filename, &taille, &date)) {
+        result.message = strdup("Erreur d'ouverture du fichier");
+        return result;
+    }
+    result.liste = *tete;
+    if (taille == contexte->partitions[partition].taille && date == contexte->partitions[partition].date) {
+        result.success = 1;
+        result.message = strdup("Fichier inchangé");
+        return result;
+    }
+    if (fichier_binaire(filename)) {
+        result.message = strdup("Fichier binaire: rechargez-le entièrement");
+        return result;
+    }
+    if (!contexte->indexCNE.actif && !index_construire(&contexte->indexCNE, *tete)) {
+        result.message = strdup("Erreur d'allocation mémoire");
+        return result;
+    }
+
+    IndexCNE disque = {NULL, 0, 0, 1};
+    Reserve reserve = {NULL, NULL, 0, 0, 0};
+    TriActif tri = {0, {0, 0, -1}};
+    Etudiant *lus = NULL;
+    int code = parser_texte(filename, &disque, &lus, &reserve, NULL, NULL);
+    if (code > 0 && rejouer_journal(&lus, filename, &disque, &reserve, &tri) < 0) code = -1;
+    if (code <= 0) {
+        index_vider(&disque);
+        reserve_vider(&reserve);
+        result.message = strdup(message_chargement(code));
+        return result;
+    }
+
+    // Disparus du fichier
+    for (Etudiant *current = *tete, *suivant; current; current = suivant) {
+        suivant = current->suivant;
+        if (current->partition != partition || index_chercher(&disque, current->CNE)) continue;
+        detacher(tete, current);
+        index_retirer(&contexte->indexCNE, current->CNE);
+        reserve_rendre(&contexte->reserveListe, current);
+        retires++;
+    }
+
+    // Apparus et modifies; sous un tri actif, un modifie est replace avec le lot
+    Etudiant *lot = NULL;
+    Etudiant **fin_lot = &lot;
+    int erreur = 0;
+    for (Etudiant *lu = lus; lu && !erreur; lu = lu->suivant) {
+        Etudiant *etudiant = index_chercher(&contexte->indexCNE, lu->CNE);
+        if (etudiant && (etudiant->partition != partition || meme_etudiant(etudiant, lu))) continue;
+
+        int a_placer = !etudiant || contexte->triActif.actif;
+        if (etudiant) {
+            index_retirer(&contexte->indexCNE, etudiant->CNE);
+            if (a_placer) detacher(tete, etudiant);
+            memcpy(etudiant->nom, lu->nom, sizeof(etudiant->nom));
+            memcpy(etudiant->prenom, lu->prenom, sizeof(etudiant->prenom));
+            memcpy(etudiant->notes, lu->notes, sizeof(etudiant->notes));
+            calculer_moyenne(etudiant);
+            modifies++;
+        } else {
+            etudiant = creer_etudiant(&contexte->reserveListe, lu->nom, lu->prenom, lu->CNE, lu->notes);
+            if (!etudiant) {
+                erreur = 1;
+                break;
+            }
+            etudiant->partition = partition;
+            ajoutes++;
+        }
+        if (index_inserer(&contexte->indexCNE, etudiant) < 0) erreur = 1;
+        if (a_placer) {
+            *fin_lot = etudiant;
+            fin_lot = &etudiant->suivant;
+        }
+    }
+    inserer_lot(tete, lot);
+    index_vider(&disque);
+    reserve_vider(&reserve);
+
+    if (erreur) {
+        // La liste est coherente mais incomplete: le fichier sera relu au prochain appel
+        index_vider(&contexte->indexCNE);
+        historique_vider();
+        result.message = strdup("Erreur d'allocation mémoire");
+        return result;
+    }
+    contexte->partitions[partition].taille = taille;
+    contexte->partitions[partition].date = date;
+    if (ajoutes || retires || modifies) historique_vider();
+    if (bilan) {
+        bilan[0] = ajoutes;
+        bilan[1] = retires;
+        bilan[2] = modifies;
+    }
+
+    char message[MAX_BUFFER_SIZE];
+    if (ajoutes || retires || modifies) {
+        snprintf(message, sizeof(message), "Fichier modifié : %d ajoutés, %d retirés, %d modifiés",
+                 ajoutes, retires, modifies);
+    } else {
+        snprintf(message, sizeof(message), "Fichier inchangé");
+    }
+    result.success = 1;
+    result.message = strdup(message);
+    result.liste = *tete;
+    return result;
+}
+
+EXPORT OperationResult resynchroniser_fichier(Etudiant **tete, const char *filename, int *bilan) {
+    contexte_entrer(ACCES_ECRITURE);
+    OperationResult resultat = resynchroniser_fichier_sans_verrou(tete, filename, bilan);
+    effacer_annulation();
+    contexte_sortir(ACCES_ECRITURE);
+    return resultat;
+}
+
+int nombre_partitions_sans_verrou() {
+    return contexte->nb_partitions;
+}
+
+EXPORT int nombre_partitions() {
+    contexte_entrer(ACCES_LECTURE);
+    int resultat = nombre_partitions_sans_verrou();
+    contexte_sortir(ACCES_LECTURE);
+    return resultat;
+}
+
+// Fichier de la partition; la chaine appartient a la bibliotheque
+const char *nom_partition_sans_verrou(int partition) {
+    return fichier_partition(partition, NULL);
+}
+
+EXPORT const char *nom_partition(int partition) {
+    contexte_entrer(ACCES_LECTURE);
+    const char *resultat = nom_partition_sans_verrou(partition);
+    contexte_sortir(ACCES_LECTURE);
+    return resultat;
+}
+
+// Partition de l'etudiant, cherche dans toute la liste; -1 s'il est absent
+int partition_etudiant_sans_verrou(Etudiant *tete, int CNE) {
+    Etudiant *etudiant = chercher_noeud(tete, CNE);
+    return etudiant ? etudiant->partition : -1;
+}
+
+EXPORT int partition_etudiant(Etudiant *tete, int CNE) {
+    contexte_entrer(ACCES_LECTURE);
+    int resultat = partition_etudiant_sans_verrou(tete, CNE);
+    contexte_sortir(ACCES_LECTURE);
+    return resultat;
+}
+
+OperationResult ecrire_fichier_binaire_sans_verrou(Etudiant *tete, const char *filename) {
+    OperationResult result = {0, NULL, NULL, NULL};
+    if (!ecrire_binaire(tete, filename)) {
+        result.message = strdup("Erreur d'écriture du fichier binaire");
+        return result;
+    }
+
+    result.success = 1;
+    result.message = strdup("Fichier binaire écrit avec succès");
+    return result;
+}
+
+EXPORT OperationResult ecrire_fichier_binaire(Etudiant *tete, const char *filename) {
+    contexte_entrer(ACCES_LECTURE);
+    OperationResult resultat = ecrire_fichier_binaire_sans_verrou(tete, filename);
+    contexte_sortir(ACCES_LECTURE);
+    return resultat;
+}
+
+// Les convertisseurs utilisent leur propre index et ne touchent pas a la liste chargee
+OperationResult convertir_texte_vers_binaire_sans_verrou(const char *source, const char *destination) {
+    OperationResult result = {0, NULL, NULL, NULL};
+    IndexCNE index = {NULL, 0, 0, 1};
+    Reserve reserve = {NULL, NULL, 0, 0, 0};
+    Etudiant *tete = NULL;
+    int entrees = 0;
+
+    TriActif tri = {0, {0, 0, -1}};
+    int chargement = charger_texte(source, &index, &tete, &reserve, &entrees, &tri, NULL);
+    index_vider(&index);
+    if (chargement <= 0) {
+        result.message = strdup(message_chargement(chargement));
+        return result;
+    }
+
+    int ok = ecrire_binaire(tete, destination);
+    reserve_vider(&reserve);
+    if (!ok) {
+        result.message = strdup("Erreur d'écriture du fichier binaire");
+        return result;
+    }
+
+    result.success = 1;
+    result.message = strdup("Conversion terminée avec succès");
+    return result;
+}
+
+EXPORT OperationResult convertir_texte_vers_binaire(const char *source, const char *destination) {
+    contexte_entrer(ACCES_ECRITURE);
+    OperationResult resultat = convertir_texte_vers_binaire_sans_verrou(source, destination);
+    contexte_sortir(ACCES_ECRITURE);
+    return resultat;
+}
+
+OperationResult convertir_binaire_vers_texte_sans_verrou(const char *source, const char *destination) {
+    OperationResult result = {0, NULL, NULL, NULL};
+    IndexCNE index = {NULL, 0, 0, 1};
+    Reserve reserve = {NULL, NULL, 0, 0, 0};
+    Etudiant *tete = NULL;
+
+    int chargement = charger_binaire(source, &index, &tete, &reserve);
+    index_vider(&index);
+    if (chargement <= 0) {
+        result.message = strdup(chargement ? "Erreur d'allocation mémoire" : "Fichier binaire invalide");
+        return result;
+    }
+
+    int ok = ecrire_texte(tete, destination, -1);
+    reserve_vider(&reserve);
+    if (!ok) {
+        result.message = strdup("Erreur d'ouverture du fichier");
+        return result;
+    }
+
+    result.success = 1;
+    result.message = strdup("Conversion terminée avec succès");
+    return result;
+}
+
+EXPORT OperationResult convertir_binaire_vers_texte(const char *source, const char *destination) {
+    contexte_entrer(ACCES_ECRITURE);
+    OperationResult resultat = convertir_binaire_vers_texte_sans_verrou(source, destination);
+    contexte_sortir(ACCES_ECRITURE);
+    return resultat;
+}
+
+EXPORT char* afficher_etudiant(Etudiant *etudiant) {
+    if (!etudiant) return NULL;
+    
+    char *buffer = malloc(MAX_BUFFER_SIZE);
+    if (!buffer) return NULL;
+    
+   
+    memset(buffer, 0, MAX_BUFFER_SIZE);
+    snprintf(buffer, MAX_BUFFER_SIZE, 
+            "Nom: %s\nPrenom: %s\nCNE: %d\nNotes: %.2f, %.2f, %.2f, %.2f\nMoyenne: %.2f",
+            etudiant->nom, etudiant->prenom, etudiant->CNE,
+            etudiant->notes[0], etudiant->notes[1],
+            etudiant->notes[2], etudiant->notes[3],
+            etudiant->moyenne);
+    
+    return buffer;
+}
+
+int tampon_ajouter(Tampon *tampon, const char *format, ...) {
+    va_list args;
+
+    for (;;) {
+        int n;
+        va_start(args, format);
+        if (tampon->longueur < tampon->capacite) {
+            n = vsnprintf(tampon->donnees + tampon->longueur,
+                          tampon->capacite - tampon->longueur, format, args);
+        } else {
+            n = vsnprintf(NULL, 0, format, args);
+        }
+        va_end(args);
+        if (n < 0) return 0;
+
+        if (tampon->longueur + n < tampon->capacite || !tampon->extensible) {
+            tampon->longueur += n;
+            return 1;
+        }
+
+        size_t capacite = tampon->capacite ? tampon->capacite : MAX_BUFFER_SIZE;
+        while (capacite <= tampon->longueur + n) capacite *= 2;
+        char *donnees = realloc(tampon->donnees, capacite);
+        if (!donnees) return 0;
+        tampon->donnees = donnees;
+        tampon->capacite = capacite;
+    }
+}
+
+#define FORMAT_LISTE "\nEtudiant %d:\nNom: %s\nPrenom: %s\nCNE: %d\nNotes: %.2f, %.2f, %.2f, %.2f\nMoyenne: %.2f\n----------------\n"
+#define FORMAT_FILE "\nÉtudiant %d:\nNom: %s\nPrénom: %s\nCNE: %d\nNotes: %.2f, %.2f, %.2f, %.2f\nMoyenne: %.2f\n----------------\n"
+
+// Rendu en une passe: chaque ajout ecrit a la suite, sans rescanner le tampon
+int rendre_chaine(Tampon *tampon, Etudiant *debut, const char *format) {
+    int i = 1;
+    for (Etudiant *current = debut; current; current = current->suivant) {
+        if (!tampon_ajouter(tampon, format, i++, current->nom, current->prenom, current->CNE,
+                            current->notes[0], current->notes[1],
+                            current->notes[2], current->notes[3],
+                            current->moyenne)) {
+            return 0;
+        }
+    }
+    return 1;
+}
+
+char *rendre_alloue(Etudiant *debut, const char *format) {
+    Tampon tampon = {malloc(MAX_BUFFER_SIZE), 0, MAX_BUFFER_SIZE, 1};
+    if (!tampon.donnees) return NULL;
+    tampon.donnees[0] = '\0';
+
+    if (!rendre_chaine(&tampon, debut, format)) {
+        free(tampon.donnees);
+        return NULL;
+    }
+    return tampon.donnees;
+}
+
+size_t rendre_fixe(Etudiant *debut, const char *format, char *sortie, size_t capacite) {
+    Tampon tampon = {sortie, 0, sortie ? capacite : 0, 0};
+    if (tampon.capacite) sortie[0] = '\0';
+    rendre_chaine(&tampon, debut, format);
+    return tampon.longueur;
+}
+
+char *afficher_liste_etudiants_sans_verrou(Etudiant *tete) {
+    if (!tete) return strdup("Aucun etudiant dans la liste");
+    return rendre_alloue(tete, FORMAT_LISTE);
+}
+
+EXPORT char* afficher_liste_etudiants(Etudiant *tete) {
+    contexte_entrer(ACCES_LECTURE);
+    char *resultat = afficher_liste_etudiants_sans_verrou(tete);
+    contexte_sortir(ACCES_LECTURE);
+    return resultat;
+}
+
+// Rendu dans un tampon fourni par l'appelant. Retourne la longueur complete du
+// texte (hors '\0'), comme snprintf: si elle atteint `capacite`, le texte est
+// tronque et l'appelant rappelle avec un tampon plus grand.
+size_t rendre_liste_etudiants_sans_verrou(Etudiant *tete, char *sortie, size_t capacite) {
+    return rendre_fixe(tete, FORMAT_LISTE, sortie, capacite);
+}
+
+EXPORT size_t rendre_liste_etudiants(Etudiant *tete, char *sortie, size_t capacite) {
+    contexte_entrer(ACCES_LECTURE);
+    size_t resultat = rendre_liste_etudiants_sans_verrou(tete, sortie, capacite);
+    contexte_sortir(ACCES_LECTURE);
+    return resultat;
+}
+
+int parcourir_liste_sans_verrou(Etudiant *tete, RappelEtudiant rappel, void *donnees) {
+    if (!rappel) return 0;
+
+    int position = 0;
+    for (Etudiant *current = tete; current; current = current->suivant) {
+        if (rappel(current, position++, donnees)) break;
+    }
+    return position;
+}
+
+EXPORT int parcourir_liste(Etudiant *tete, RappelEtudiant rappel, void *donnees) {
+    contexte_entrer(ACCES_LECTURE);
+    int resultat = parcourir_liste_sans_verrou(tete, rappel, donnees);
+    contexte_sortir(ACCES_LECTURE);
+    return resultat;
+}
+
+// File d'attente persistante: <fichier>.attente, reecrit a chaque modification
+// (la file reste courte devant la liste)
+int file_sauvegarder() {
+    if (!contexte->cheminFile[0]) return 1;
+    if (!contexte->fileAttente.debut) {
+        remove(contexte->cheminFile);
+        return 1;
+    }
+
+    FILE *file = fopen(contexte->cheminFile, "w");
+    if (!file) return 0;
+
+    int ok = 1;
+    for (Etudiant *current = contexte->fileAttente.debut; ok && current; current = current->suivant) {
+        ok = fprintf(file, "%s %s %d %.2f %.2f %.2f %.2f\n",
+                     current->nom, current->prenom, current->CNE,
+                     current->notes[0], current->notes[1],
+                     current->notes[2], current->notes[3]) > 0;
+    }
+    return (fclose(file) == 0) && ok;
+}
+
+void file_vider() {
+    reserve_vider(&contexte->reserveFile);
+    contexte->fileAttente.debut = NULL;
+    contexte->fileAttente.fin = NULL;
+}
+
+// Rattache la file au fichier etudiants `filename`: la file enregistree la
+// remplace; sans fichier de file, la file en memoire y est enregistree
+void file_attacher(const char *filename) {
+    snprintf(contexte->cheminFile, sizeof(contexte->cheminFile), "%s.attente", filename);
+
+    FILE *file = fopen(contexte->cheminFile, "r");
+    if (!file) {
+        file_sauvegarder();
+        return;
+    }
+
+    file_vider();
+    char nom[MAX_STRING_LENGTH], prenom[MAX_STRING_LENGTH];
+    int CNE;
+    float notes[4];
+    while (fscanf(file, "%49s %49s %d %f %f %f %f",
+                  nom, prenom, &CNE, &notes[0], &notes[1], &notes[2], &notes[3]) == 7) {
+        if (!donnees_valides(CNE, notes)) continue;
+
+        Etudiant *nouveau = creer_etudiant(&contexte->reserveFile, nom, prenom, CNE, notes);
+        if (!nouveau) break;
+        if (contexte->fileAttente.fin) {
+            contexte->fileAttente.fin->suivant = nouveau;
+        } else {
+            contexte->fileAttente.debut = nouveau;
+        }
+        contexte->fileAttente.fin = nouveau;
+    }
+    fclose(file);
+}
+
+// Retire de la tete de la file les etudiants de l'action qui y sont encore
+void file_retirer_inscrits(const Action *action) {
+    for (int i = 0; i < action->nombre && contexte->fileAttente.debut; i++) {
+        Etudiant *etudiant = contexte->fileAttente.debut;
+        if (etudiant->CNE != action->enregistrements[i].CNE) continue;
+        contexte->fileAttente.debut = etudiant->suivant;
+        if (!contexte->fileAttente.debut) contexte->fileAttente.fin = NULL;
+        reserve_rendre(&contexte->reserveFile, etudiant);
+    }
+}
+
+// Historique annuler/retablir, borne en nombre d'actions et en memoire
+void action_liberer(Action *action) {
+    free(action->enregistrements);
+    free(action->ordre);
+    free(action);
+}
+
+// Action avec de la place pour `enregistrements` etudiants ou un ordre de `ordre` CNE
+Action *action_creer(int type, int enregistrements, int ordre) {
+    Action *action = calloc(1, sizeof(Action));
+    if (!action) return NULL;
+
+    action->type = type;
+    action->nombre = enregistrements ? enregistrements : ordre;
+    if (enregistrements) action->enregistrements = malloc(sizeof(EnregistrementEtudiant) * enregistrements);
+    if (ordre) action->ordre = malloc(sizeof(int) * ordre);
+    if ((enregistrements && !action->enregistrements) || (ordre && !action->ordre)) {
+        action_liberer(action);
+        return NULL;
+    }
+    action->octets = sizeof(Action) + sizeof(EnregistrementEtudiant) * (size_t)enregistrements +
+                     sizeof(int) * (size_t)ordre;
+    return action;
+}
+
+void historique_retirer(Action *action) {
+    if (action->precedente) {
+        action->precedente->suivante = action->suivante;
+    } else {
+        contexte->historique.premiere = action->suivante;
+    }
+    if (action->suivante) {
+        action->suivante->precedente = action->precedente;
+    } else {
+        contexte->historique.derniere = action->precedente;
+    }
+    if (contexte->historique.courante == action) contexte->historique.courante = action->precedente;
+    contexte->historique.nombre--;
+    contexte->historique.octets -= action->octets;
+    action_liberer(action);
+}
+
+void historique_vider() {
+    while (contexte->historique.derniere) {
+        historique_retirer(contexte->historique.derniere);
+    }
+}
+
+int historique_depasse() {
+    return contexte->historique.nombre > contexte->historique.max_actions ||
+           (contexte->historique.max_octets && contexte->historique.octets > contexte->historique.max_octets);
+}
+
+// Evince d'abord les actions faites les plus anciennes, puis les actions
+// annulees les plus lointaines: ce qui reste s'enchaine toujours
+void historique_limiter() {
+    while (historique_depasse() && contexte->historique.courante) {
+        historique_retirer(contexte->historique.premiere);
+    }
+    while (historique_depasse() && contexte->historique.derniere) {
+        historique_retirer(contexte->historique.derniere);
+    }
+}
+
+// Ajoute l'action apres la courante, en oubliant celles qui avaient ete
+// annulees. Sans action (memoire insuffisante), les plus anciennes ne
+// s'appliqueraient plus a la liste: tout l'historique est oublie.
+void historique_noter(Action *action) {
+    Action *annulee = contexte->historique.courante ? contexte->historique.courante->suivante : contexte->historique.premiere;
+    while (annulee) {
+        Action *suivante = annulee->suivante;
+        historique_retirer(annulee);
+        annulee = suivante;
+    }
+    if (!action) {
+        historique_vider();
+        return;
+    }
+
+    action->precedente = contexte->historique.derniere;
+    action->suivante = NULL;
+    if (contexte->historique.derniere) {
+        contexte->historique.derniere->suivante = action;
+    } else {
+        contexte->historique.premiere = action;
+    }
+    contexte->historique.derniere = action;
+    contexte->historique.courante = action;
+    contexte->historique.nombre++;
+    contexte->historique.octets += action->octets;
+    historique_limiter();
+}
+
+void noter_etudiant(int type, const Etudiant *etudiant) {
+    Action *action = action_creer(type, 1, 0);
+    if (action) {
+        copier_enregistrement(&action->enregistrements[0], etudiant);
+        action->partition = etudiant->partition;
+    }
+    historique_noter(action);
+}
+
+// Journalise une ligne par enregistrement de l'action ('D' ne garde que le CNE)
+// dans le fichier de sa partition; un gros lot est replie directement dans le fichier
+int journaliser_action(Etudiant *tete, const char *filename, char type, const Action *action) {
+    filename = fichier_partition(action->partition, filename);
+    if (entrees_fichier(filename) + action->nombre >= seuil_compaction(tete)) {
+        return compacter_fichier(tete, filename);
+    }
+
+    FILE *file = journal_ouvrir(filename);
+    if (!file) return 0;
+
+    char ligne[MAX_BUFFER_SIZE];
+    int ok = 1;
+    for (int i = 0; ok && i < action->nombre; i++) {
+        const EnregistrementEtudiant *e = &action->enregistrements[i];
+        if (type == 'D') {
+            snprintf(ligne, sizeof(ligne), "D %d\n", e->CNE);
+        } else {
+            snprintf(ligne, sizeof(ligne), FORMAT_JOURNAL, type, e->nom, e->prenom, e->CNE,
+                     e->notes[0], e->notes[1], e->notes[2], e->notes[3]);
+        }
+        ok = fputs(ligne, file) >= 0;
+    }
+    return journal_fermer(file, ok, action->nombre, filename);
+}
+
+// Retire de la liste les etudiants de l'action: un inscrit retourne (recopie)
+// en tete de la file d'attente, les autres sont liberes
+void retirer_enregistrements(Etudiant **tete, const Action *action, int vers_file) {
+    for (int i = action->nombre - 1; i >= 0; i--) {
+        Etudiant *etudiant = chercher_noeud(*tete, action->enregistrements[i].CNE);
+        if (!etudiant) continue;
+
+        detacher(tete, etudiant);
+        index_retirer(&contexte->indexCNE, etudiant->CNE);
+        Etudiant *copie = vers_file ? creer_etudiant(&contexte->reserveFile, etudiant->nom, etudiant->prenom,
+                                                     etudiant->CNE, etudiant->notes) : NULL;
+        if (copie) {
+            copie->suivant = contexte->fileAttente.debut;
+            contexte->fileAttente.debut = copie;
+            if (!contexte->fileAttente.fin) contexte->fileAttente.fin = copie;
+        }
+        reserve_rendre(&contexte->reserveListe, etudiant);
+    }
+}
+
+// Recree les etudiants de l'action et les insere a leur place en une passe.
+// Retourne 1 si reussi, 0 si un CNE est deja dans la liste, -1 si memoire insuffisante
+int restaurer_enregistrements(Etudiant **tete, const Action *action) {
+    for (int i = 0; i < action->nombre; i++) {
+        if (chercher_noeud(*tete, action->enregistrements[i].CNE)) return 0;
+    }
+
+    Etudiant *lot = NULL;
+    Etudiant **fin_lot = &lot;
+    for (int i = 0; i < action->nombre; i++) {
+        const EnregistrementEtudiant *e = &action->enregistrements[i];
+        Etudiant *nouveau = creer_etudiant(&contexte->reserveListe, e->nom, e->prenom, e->CNE, e->notes);
+        if (nouveau) nouveau->partition = action->partition;
+        if (!nouveau || index_inserer(&contexte->indexCNE, nouveau) < 0) {
+            reserve_rendre(&contexte->reserveListe, nouveau);
+            while (lot) {
+                Etudiant *suivant = lot->suivant;
+                index_retirer(&contexte->indexCNE, lot->CNE);
+                reserve_rendre(&contexte->reserveListe, lot);
+                lot = suivant;
+            }
+            return -1;
+        }
+        *fin_lot = nouveau;
+        fin_lot = &nouveau->suivant;
+    }
+    inserer_lot(tete, lot);
+    return 1;
+}
+
+// Remet la liste dans l'ordre des CNE de `ordre`, en O(n) grace a l'index;
+// les etudiants absents de `ordre` suivent, dans leur ordre actuel
+int restaurer_ordre(Etudiant **tete, const int *ordre, int nombre) {
+    if (!contexte->indexCNE.actif && !index_construire(&contexte->indexCNE, *tete)) return 0;
+
+    Etudiant *debut = NULL;
+    Etudiant *queue = NULL;
+    for (int i = 0; i < nombre; i++) {
+        Etudiant *etudiant = index_chercher(&contexte->indexCNE, ordre[i]);
+        if (!etudiant) continue;
+
+        detacher(tete, etudiant);
+        etudiant->precedent = queue;
+        if (queue) {
+            queue->suivant = etudiant;
+        } else {
+            debut = etudiant;
+        }
+        queue = etudiant;
+    }
+    if (queue) {
+        queue->suivant = *tete;
+        if (*tete) (*tete)->precedent = queue;
+        *tete = debut;
+    }
+    return 1;
+}
+
+// Defait l'action, qui doit etre la derniere faite, et journalise l'effet.
+// Retourne 1 si reussi, 0 si un CNE a restaurer existe deja, -1 si memoire
+// insuffisante; *sauvegarde passe a 0 si l'ecriture a echoue.
+int action_defaire(Etudiant **tete, const char *filename, const Action *action, int *sauvegarde) {
+    switch (action->type) {
+    case ACTION_SUPPRESSION: {
+        int code = restaurer_enregistrements(tete, action);
+        if (code <= 0) return code;
+        *sauvegarde = journaliser_action(*tete, filename, 'R', action);
+        return 1;
+    }
+    case ACTION_TRI:
+        if (!restaurer_ordre(tete, action->ordre, action->nombre)) return -1;
+        contexte->triActif = action->tri_precedent;
+        // Le journal ne decrit pas un ordre quelconque: les fichiers sont reecrits
+        *sauvegarde = compacter_partout(*tete, filename);
+        return 1;
+    default:
+        retirer_enregistrements(tete, action, action->type == ACTION_INSCRIPTION);
+        *sauvegarde = journaliser_action(*tete, filename, 'D', action);
+        if (action->type == ACTION_INSCRIPTION) *sauvegarde = file_sauvegarder() && *sauvegarde;
+        return 1;
+    }
+}
+
+// Refait l'action, qui doit etre la premiere annulee. Memes codes que
+// action_defaire, plus -2 si le tri a ete interrompu (l'ordre est alors remis).
+int action_refaire(Etudiant **tete, const char *filename, const Action *action, int *sauvegarde) {
+    switch (action->type) {
+    case ACTION_SUPPRESSION:
+        retirer_enregistrements(tete, action, 0);
+        *sauvegarde = journaliser_action(*tete, filename, 'D', action);
+        return 1;
+    case ACTION_TRI: {
+        // La liste est revenue dans l'ordre d'avant le tri: le refaire donne le meme resultat
+        if (!trier_liste(tete, &action->critere)) {
+            restaurer_ordre(tete, action->ordre, action->nombre);
+            return -2;
+        }
+        contexte->triActif.actif = 1;
+        contexte->triActif.critere = action->critere;
+        char ligne[MAX_BUFFER_SIZE];
+        snprintf(ligne, sizeof(ligne), "T %d %d %d\n", action->critere.cle,
+                 action->critere.ordre, action->critere.cle_secondaire);
+        *sauvegarde = persister_partout(*tete, filename, ligne);
+        return 1;
+    }
+    default: {
+        int code = restaurer_enregistrements(tete, action);
+        if (code <= 0) return code;
+        *sauvegarde = journaliser_action(*tete, filename, 'A', action);
+        if (action->type == ACTION_INSCRIPTION) {
+            // Les inscrits encore en tete de la file la quittent de nouveau
+            file_retirer_inscrits(action);
+            *sauvegarde = file_sauvegarder() && *sauvegarde;
+        }
+        return 1;
+    }
+    }
+}
+
+void decrire_action(const Action *action, char *texte, size_t taille) {
+    switch (action->type) {
+    case ACTION_AJOUT:
+        snprintf(texte, taille, "ajout de %s %s", action->enregistrements[0].nom,
+                 action->enregistrements[0].prenom);
+        break;
+    case ACTION_SUPPRESSION:
+        snprintf(texte, taille, "suppression de %s %s", action->enregistrements[0].nom,
+                 action->enregistrements[0].prenom);
+        break;
+    case ACTION_INSCRIPTION:
+        if (action->nombre > 1) {
+            snprintf(texte, taille, "inscription de %d étudiants", action->nombre);
+        } else {
+            snprintf(texte, taille, "inscription de %s %s", action->enregistrements[0].nom,
+                     action->enregistrements[0].prenom);
+        }
+        break;
+    case ACTION_IMPORT:
+        snprintf(texte, taille, "import de %d étudiants", action->nombre);
+        break;
+    default:
+        snprintf(texte, taille, "tri");
+        break;
+    }
+}
+
+OperationResult ajouter_etudiant_sans_verrou(Etudiant **tete, const char *filename, 
+                                           const char *nom, const char *prenom, 
+                                           int CNE, const float *notes) {
+    OperationResult result = {0, NULL, NULL, NULL};
+    
+  
+    if (!nom || !prenom || CNE <= 0) {
+        result.message = strdup("Données invalides");
+        return result;
+    }
+    
+    for (int i = 0; i < 4; i++) {
+        if (!(notes[i] >= 0 && notes[i] <= 20)) {
+            result.message = strdup("Notes invalides");
+            return result;
+        }
+    }
+    
+  
+    if (chercher_noeud(*tete, CNE)) {
+        result.message = strdup("Un étudiant avec ce CNE existe déjà");
+        return result;
+    }
+    
+    // Le fichier donne designe la partition qui recoit l'etudiant
+    int partition = partition_pour(filename);
+    Etudiant *nouveau = partition >= 0 ? reserve_allouer(&contexte->reserveListe) : NULL;
+    if (!nouveau) {
+        result.message = strdup("Erreur d'allocation mémoire");
+        return result;
+    }
+
+    nouveau->partition = partition;
+    strncpy(nouveau->nom, nom, MAX_STRING_LENGTH - 1);
+    nouveau->nom[MAX_STRING_LENGTH - 1] = '\0';
+    strncpy(nouveau->prenom, prenom, MAX_STRING_LENGTH - 1);
+    nouveau->prenom[MAX_STRING_LENGTH - 1] = '\0';
+    nouveau->CNE = CNE;
+    memcpy(nouveau->notes, notes, sizeof(float)*4);
     calculer_moyenne(nouveau);
-    nouveau->suivant = *tete;
-    *tete = nouveau;
+    if (index_inserer(&contexte->indexCNE, nouveau) < 0) {
+        reserve_rendre(&contexte->reserveListe, nouveau);
+        result.message = strdup("Erreur d'allocation mémoire");
+        return result;
+    }
+    inserer_noeud(tete, nouveau);
+    noter_etudiant(ACTION_AJOUT, nouveau);
+
+    char ligne[MAX_BUFFER_SIZE];
+    ligne_etudiant(ligne, sizeof(ligne), 'A', nouveau);
+    if (!persister(*tete, filename, ligne)) {
+        result.message = strdup("Étudiant ajouté mais erreur lors de la sauvegarde");
+        return result;
+    }
+
+    result.success = 1;
+    result.message = strdup("Étudiant ajouté avec succès");
+    result.etudiant = nouveau;
+    return result;
+}
+
+EXPORT OperationResult ajouter_etudiant(Etudiant **tete, const char *filename, 
+                                      const char *nom, const char *prenom, 
+                                      int CNE, const float *notes) {
+    contexte_entrer(ACCES_ECRITURE);
+    OperationResult resultat = ajouter_etudiant_sans_verrou(tete, filename, nom, prenom, CNE, notes);
+    contexte_sortir(ACCES_ECRITURE);
+    return resultat;
+}
+
+int motif_rejet(const EnregistrementEtudiant *enregistrement, IndexCNE *lot) {
+    if (enregistrement->CNE <= 0) return IMPORT_CNE_INVALIDE;
+    if (!donnees_valides(enregistrement->CNE, enregistrement->notes)) return IMPORT_NOTES_INVALIDES;
+    if (!enregistrement->nom[0] || !enregistrement->prenom[0]) return IMPORT_NOM_INVALIDE;
+    if (index_chercher(lot, enregistrement->CNE)) return IMPORT_DOUBLON_LOT;
+    if (index_chercher(&contexte->indexCNE, enregistrement->CNE)) return IMPORT_DOUBLON_LISTE;
+    return IMPORT_ACCEPTE;
+}
+
+// Insere un lot d'enregistrements en une passe et ne sauvegarde qu'une fois.
+// rejets (optionnel) recoit un motif IMPORT_* par enregistrement.
+OperationResult importer_etudiants_sans_verrou(Etudiant **tete, const char *filename,
+                                               EnregistrementEtudiant *enregistrements,
+                                               int nombre, int *rejets) {
+    OperationResult result = {0, NULL, NULL, NULL};
+    
+    if (!enregistrements || nombre < 0) {
+        result.message = strdup("Données invalides");
+        return result;
+    }
+    
+    int partition = partition_pour(filename);
+    if (partition < 0 || (!contexte->indexCNE.actif && !index_construire(&contexte->indexCNE, *tete))) {
+        result.message = strdup("Erreur d'allocation mémoire");
+        return result;
+    }
+    
+    // Les nouveaux noeuds sont aussi dans indexCNE: le lot a son propre index
+    // pour distinguer un doublon interne d'un etudiant deja inscrit
+    IndexCNE lot = {NULL, 0, 0, 1};
+    Etudiant *ajouts = NULL;
+    Etudiant **fin_ajouts = &ajouts;
+    int acceptes = 0;
+    
+    for (int i = 0; i < nombre; i++) {
+        EnregistrementEtudiant *enregistrement = &enregistrements[i];
+        enregistrement->nom[MAX_STRING_LENGTH - 1] = '\0';
+        enregistrement->prenom[MAX_STRING_LENGTH - 1] = '\0';
+        
+        int motif = motif_rejet(enregistrement, &lot);
+        Etudiant *nouveau = NULL;
+        if (motif == IMPORT_ACCEPTE) {
+            nouveau = creer_etudiant(&contexte->reserveListe, enregistrement->nom, enregistrement->prenom,
+                                     enregistrement->CNE, enregistrement->notes);
+            if (nouveau) nouveau->partition = partition;
+            if (!nouveau || index_inserer(&contexte->indexCNE, nouveau) < 0) {
+                motif = IMPORT_ERREUR_MEMOIRE;
+            } else if (index_inserer(&lot, nouveau) < 0) {
+                index_retirer(&contexte->indexCNE, nouveau->CNE);
+                motif = IMPORT_ERREUR_MEMOIRE;
+            }
+        }
+        
+        if (motif != IMPORT_ACCEPTE) {
+            reserve_rendre(&contexte->reserveListe, nouveau);
+        } else {
+            // Chaine dans l'ordre du lot; accroche a la liste apres la boucle
+            nouveau->suivant = NULL;
+            *fin_ajouts = nouveau;
+            fin_ajouts = &nouveau->suivant;
+            acceptes++;
+        }
+        if (rejets) rejets[i] = motif;
+    }
+    index_vider(&lot);
+    
+    // Un gros lot coute moins cher en reecrivant le fichier qu'en journalisant.
+    // indexCNE compte deja les ajouts: le seuil est celui de la liste finale.
+    int sauvegarde = 1;
+    int compacter = acceptes && entrees_fichier(filename) + acceptes >= seuil_compaction(*tete);
+    if (acceptes && !compacter) {
+        FILE *file = journal_ouvrir(filename);
+        if (!file) {
+            sauvegarde = 0;
+        } else {
+            char ligne[MAX_BUFFER_SIZE];
+            int ok = 1;
+            // Dans l'ordre du lot, comme une suite d'ajouts individuels
+            for (Etudiant *current = ajouts; ok && current; current = current->suivant) {
+                ligne_etudiant(ligne, sizeof(ligne), 'A', current);
+                ok = fputs(ligne, file) >= 0;
+            }
+            sauvegarde = journal_fermer(file, ok, acceptes, filename);
+        }
+    }
+    
+    // L'historique garde le lot dans son ordre, avant que l'insertion ne le trie
+    if (acceptes) {
+        Action *action = action_creer(ACTION_IMPORT, acceptes, 0);
+        if (action) {
+            action->partition = partition;
+            int i = 0;
+            for (Etudiant *current = ajouts; current; current = current->suivant) {
+                copier_enregistrement(&action->enregistrements[i++], current);
+            }
+        }
+        historique_noter(action);
+    }
+    
+    contexte->progression.annulation = 0;
+    inserer_lot(tete, ajouts);
+    if (compacter) {
+        sauvegarde = compacter_fichier(*tete, filename);
+    }
+    
+    char message[MAX_BUFFER_SIZE];
+    if (!sauvegarde) {
+        snprintf(message, sizeof(message), "%d étudiants importés mais erreur lors de la sauvegarde", acceptes);
+        result.message = strdup(message);
+        return result;
+    }
+    
+    snprintf(message, sizeof(message), "%d étudiants importés, %d rejetés", acceptes, nombre - acceptes);
+    result.success = 1;
+    result.message = strdup(message);
+    return result;
+}
+
+EXPORT OperationResult importer_etudiants(Etudiant **tete, const char *filename,
+                                          EnregistrementEtudiant *enregistrements,
+                                          int nombre, int *rejets) {
+    contexte_entrer(ACCES_ECRITURE);
+    OperationResult resultat = importer_etudiants_sans_verrou(tete, filename, enregistrements, nombre, rejets);
+    contexte_sortir(ACCES_ECRITURE);
+    return resultat;
+}
+
+OperationResult supprimer_etudiant_sans_verrou(Etudiant **tete, const char *filename, int CNE) {
+    OperationResult result = {0, NULL, NULL, NULL};
+    
+    if (!*tete) {
+        result.message = strdup("Liste vide");
+        return result;
+    }
+    
+    Etudiant *current = chercher_noeud(*tete, CNE);
+    if (!current) {
+        result.message = strdup("Étudiant non trouvé");
+        return result;
+    }
+    
+    // La suppression va dans le fichier de l'etudiant, quel que soit `filename`
+    const char *fichier = fichier_partition(current->partition, filename);
+    detacher(tete, current);
+    index_retirer(&contexte->indexCNE, CNE);
+    noter_etudiant(ACTION_SUPPRESSION, current);
+    reserve_rendre(&contexte->reserveListe, current);
+    
+    char ligne[MAX_BUFFER_SIZE];
+    snprintf(ligne, sizeof(ligne), "D %d\n", CNE);
+    if (!persister(*tete, fichier, ligne)) {
+        result.message = strdup("Étudiant supprimé mais erreur lors de la sauvegarde");
+        return result;
+    }
+    
+    result.success = 1;
+    result.message = strdup("Étudiant supprimé avec succès");
+    return result;
+}
+
+EXPORT OperationResult supprimer_etudiant(Etudiant **tete, const char *filename, int CNE) {
+    contexte_entrer(ACCES_ECRITURE);
+    OperationResult resultat = supprimer_etudiant_sans_verrou(tete, filename, CNE);
+    contexte_sortir(ACCES_ECRITURE);
+    return resultat;
+}
+
+OperationResult annuler_action_sans_verrou(Etudiant **tete, const char *filename) {
+    OperationResult result = {0, NULL, NULL, NULL};
+    
+    Action *action = contexte->historique.courante;
+    if (!action) {
+        result.message = strdup("Aucune action à annuler");
+        return result;
+    }
+    
+    int sauvegarde = 1;
+    int code = action_defaire(tete, filename, action, &sauvegarde);
+    if (code <= 0) {
+        result.message = strdup(code ? "Erreur d'allocation mémoire" : "Un étudiant avec ce CNE existe déjà");
+        return result;
+    }
+    contexte->historique.courante = action->precedente;
+    
+    char description[3 * MAX_STRING_LENGTH];
+    char message[MAX_BUFFER_SIZE];
+    decrire_action(action, description, sizeof(description));
+    if (!sauvegarde) {
+        snprintf(message, sizeof(message), "Annulé (%s) mais erreur lors de la sauvegarde", description);
+        result.message = strdup(message);
+        return result;
+    }
+    
+    snprintf(message, sizeof(message), "Annulé : %s", description);
+    result.success = 1;
+    result.message = strdup(message);
+    return result;
+}
+
+EXPORT OperationResult annuler_action(Etudiant **tete, const char *filename) {
+    contexte_entrer(ACCES_ECRITURE);
+    OperationResult resultat = annuler_action_sans_verrou(tete, filename);
+    contexte_sortir(ACCES_ECRITURE);
+    return resultat;
+}
+
+OperationResult retablir_action_sans_verrou(Etudiant **tete, const char *filename) {
+    OperationResult result = {0, NULL, NULL, NULL};
+    
+    Action *action = contexte->historique.courante ? contexte->historique.courante->suivante : contexte->historique.premiere;
+    if (!action) {
+        result.message = strdup("Aucune action à rétablir");
+        return result;
+    }
+    
+    contexte->progression.annulation = 0;
+    int sauvegarde = 1;
+    int code = action_refaire(tete, filename, action, &sauvegarde);
+    if (code <= 0) {
+        const char *erreur = "Un étudiant avec ce CNE existe déjà";
+        if (code == -1) erreur = "Erreur d'allocation mémoire";
+        if (code == -2) erreur = "Tri annulé";
+        result.message = strdup(erreur);
+        return result;
+    }
+    contexte->historique.courante = action;
+    
+    char description[3 * MAX_STRING_LENGTH];
+    char message[MAX_BUFFER_SIZE];
+    decrire_action(action, description, sizeof(description));
+    if (!sauvegarde) {
+        snprintf(message, sizeof(message), "Rétabli (%s) mais erreur lors de la sauvegarde", description);
+        result.message = strdup(message);
+        return result;
+    }
+    
+    snprintf(message, sizeof(message), "Rétabli : %s", description);
+    result.success = 1;
+    result.message = strdup(message);
+    return result;
+}
+
+EXPORT OperationResult retablir_action(Etudiant **tete, const char *filename) {
+    contexte_entrer(ACCES_ECRITURE);
+    OperationResult resultat = retablir_action_sans_verrou(tete, filename);
+    effacer_annulation();
+    contexte_sortir(ACCES_ECRITURE);
+    return resultat;
+}
+
+// Restaure le dernier etudiant supprime, meme si d'autres actions ont suivi;
+// la suppression quitte alors l'historique et les actions annulees sont oubliees
+OperationResult annuler_derniere_suppression_sans_verrou(Etudiant **tete, const char *filename) {
+    OperationResult result = {0, NULL, NULL, NULL};
+    
+    Action *action = contexte->historique.courante;
+    while (action && action->type != ACTION_SUPPRESSION) {
+        action = action->precedente;
+    }
+    if (!action) {
+        result.message = strdup("Aucune suppression à annuler");
+        return result;
+    }
+    
+    int sauvegarde = 1;
+    if (action == contexte->historique.courante) {
+        int code = action_defaire(tete, filename, action, &sauvegarde);
+        if (code <= 0) {
+            result.message = strdup(code ? "Erreur d'allocation mémoire" : "Un étudiant avec ce CNE existe déjà");
+            return result;
+        }
+        contexte->historique.courante = action->precedente;
+    } else {
+        int code = restaurer_enregistrements(tete, action);
+        if (code <= 0) {
+            result.message = strdup(code ? "Erreur d'allocation mémoire" : "Un étudiant avec ce CNE existe déjà");
+            return result;
+        }
+        sauvegarde = journaliser_action(*tete, filename, 'R', action);
+        while (contexte->historique.derniere != contexte->historique.courante) {
+            historique_retirer(contexte->historique.derniere);
+        }
+        historique_retirer(action);
+    }
+    
+    if (!sauvegarde) {
+        result.message = strdup("Suppression annulée mais erreur lors de la sauvegarde");
+        return result;
+    }
+    
+    result.success = 1;
+    result.message = strdup("Dernière suppression annulée avec succès");
+    return result;
+}
+
+EXPORT OperationResult annuler_derniere_suppression(Etudiant **tete, const char *filename) {
+    contexte_entrer(ACCES_ECRITURE);
+    OperationResult resultat = annuler_derniere_suppression_sans_verrou(tete, filename);
+    contexte_sortir(ACCES_ECRITURE);
+    return resultat;
+}
+
+// Limites de l'historique: nombre d'actions et memoire (0 pour aucune limite
+// de memoire); une valeur negative garde la limite actuelle
+void configurer_historique_sans_verrou(int max_actions, long max_octets) {
+    if (max_actions >= 0) contexte->historique.max_actions = max_actions;
+    if (max_octets >= 0) contexte->historique.max_octets = (size_t)max_octets;
+    historique_limiter();
+}
+
+EXPORT void configurer_historique(int max_actions, long max_octets) {
+    contexte_entrer(ACCES_ECRITURE);
+    configurer_historique_sans_verrou(max_actions, max_octets);
+    contexte_sortir(ACCES_ECRITURE);
+}
+
+// Actions annulables et retablissables, memoire occupee; retourne le type
+// de la prochaine action a annuler (ACTION_*), -1 s'il n'y en a pas
+int etat_historique_sans_verrou(int *annulables, int *retablissables, long *octets) {
+    int faites = 0;
+    for (Action *action = contexte->historique.courante; action; action = action->precedente) faites++;
+    if (annulables) *annulables = faites;
+    if (retablissables) *retablissables = contexte->historique.nombre - faites;
+    if (octets) *octets = (long)contexte->historique.octets;
+    return contexte->historique.courante ? contexte->historique.courante->type : -1;
+}
+
+EXPORT int etat_historique(int *annulables, int *retablissables, long *octets) {
+    contexte_entrer(ACCES_LECTURE);
+    int resultat = etat_historique_sans_verrou(annulables, retablissables, octets);
+    contexte_sortir(ACCES_LECTURE);
+    return resultat;
+}
+
+OperationResult chercher_etudiant_sans_verrou(Etudiant *tete, int CNE) {
+    OperationResult result = {0, NULL, NULL, NULL};
+    
+    Etudiant *current = chercher_noeud(tete, CNE);
+    if (current) {
+        result.success = 1;
+        result.message = strdup("Étudiant trouvé");
+        result.etudiant = current;
+        return result;
+    }
+    
+    result.message = strdup("Étudiant non trouvé");
+    return result;
+}
+
+EXPORT OperationResult chercher_etudiant(Etudiant *tete, int CNE) {
+    contexte_entrer(ACCES_LECTURE);
+    OperationResult resultat = chercher_etudiant_sans_verrou(tete, CNE);
+    contexte_sortir(ACCES_LECTURE);
+    return resultat;
+}
+
+#define MAX_JETONS 4
+
+typedef struct RechercheNom {
+    char jetons[MAX_JETONS][MAX_STRING_LENGTH];
+    int nb_jetons;
+    int longueur;
+    int tolerance;
+    int limite;
+    int trouves;
+    EnregistrementEtudiant *sortie;
+} RechercheNom;
+
+// Plus petite distance d'edition entre `jeton` et un prefixe de `mot`
+int distance_prefixe(const char *mot, const char *jeton) {
+    int m = (int)strlen(jeton);
+    int ligne[MAX_STRING_LENGTH + 1];
+    for (int j = 0; j <= m; j++) ligne[j] = j;
+
+    int meilleure = ligne[m];
+    for (const char *c = mot; *c; c++) {
+        int diagonale = ligne[0];
+        ligne[0]++;
+        for (int j = 1; j <= m; j++) {
+            int haut = ligne[j];
+            int cout = diagonale + (jeton[j - 1] != *c);
+            if (haut + 1 < cout) cout = haut + 1;
+            if (ligne[j - 1] + 1 < cout) cout = ligne[j - 1] + 1;
+            ligne[j] = cout;
+            diagonale = haut;
+        }
+        if (ligne[m] < meilleure) meilleure = ligne[m];
+    }
+    return meilleure;
+}
+
+// Ajoute l'etudiant s'il n'y est pas deja et si les autres mots de la
+// requete correspondent a son nom ou a son prenom
+void recherche_ajouter(RechercheNom *recherche, const Etudiant *etudiant) {
+    for (int i = 0; i < recherche->trouves; i++) {
+        if (recherche->sortie[i].CNE == etudiant->CNE) return;
+    }
+    if (recherche->nb_jetons > 1) {
+        char nom[MAX_STRING_LENGTH], prenom[MAX_STRING_LENGTH];
+        normaliser_nom(etudiant->nom, nom, sizeof(nom));
+        normaliser_nom(etudiant->prenom, prenom, sizeof(prenom));
+        for (int i = 1; i < recherche->nb_jetons; i++) {
+            if (distance_prefixe(nom, recherche->jetons[i]) > recherche->tolerance &&
+                distance_prefixe(prenom, recherche->jetons[i]) > recherche->tolerance) {
+                return;
+            }
+        }
+    }
+    copier_enregistrement(&recherche->sortie[recherche->trouves++], etudiant);
+}
+
+void recherche_sous_arbre(RechercheNom *recherche, int noeud) {
+    const IndexNoms *index = &contexte->indexNoms;
+    for (int e = index->noeuds[noeud].entrees; e >= 0 && recherche->trouves < recherche->limite;
+         e = index->entrees[e].suivante) {
+        recherche_ajouter(recherche, index->entrees[e].etudiant);
+    }
+    for (int fils = index->noeuds[noeud].fils; fils >= 0 && recherche->trouves < recherche->limite;
+         fils = index->noeuds[fils].frere) {
+        recherche_sous_arbre(recherche, fils);
+    }
+}
+
+// Descente du trie avec une ligne de la matrice de Levenshtein par niveau:
+// une branche est abandonnee des que toute la ligne depasse la tolerance, et
+// tout le sous-arbre est retenu des que la requete entiere y correspond
+void recherche_trie(RechercheNom *recherche, int noeud, const int *ligne_parent) {
+    const char *requete = recherche->jetons[0];
+    int m = recherche->longueur;
+
+    for (int fils = contexte->indexNoms.noeuds[noeud].fils; fils >= 0 && recherche->trouves < recherche->limite;
+         fils = contexte->indexNoms.noeuds[fils].frere) {
+        char c = contexte->indexNoms.noeuds[fils].c;
+        int ligne[MAX_STRING_LENGTH + 1];
+        ligne[0] = ligne_parent[0] + 1;
+        int minimum = ligne[0];
+        for (int j = 1; j <= m; j++) {
+            int cout = ligne_parent[j - 1] + (requete[j - 1] != c);
+            if (ligne_parent[j] + 1 < cout) cout = ligne_parent[j] + 1;
+            if (ligne[j - 1] + 1 < cout) cout = ligne[j - 1] + 1;
+            ligne[j] = cout;
+            if (cout < minimum) minimum = cout;
+        }
+
+        if (ligne[m] <= recherche->tolerance) {
+            recherche_sous_arbre(recherche, fils);
+        } else if (minimum <= recherche->tolerance) {
+            recherche_trie(recherche, fils, ligne);
+        }
+    }
+}
+
+// Etudiants dont le nom ou le prenom commence par le premier mot de `requete`,
+// sans tenir compte des accents ni de la casse, a au plus `tolerance` fautes
+// pres (lettre changee, ajoutee ou manquante). Les mots suivants doivent aussi
+// correspondre au nom ou au prenom. Les correspondances exactes viennent en
+// premier, puis celles a 1 faute, etc. Retourne le nombre copie dans `sortie`.
+int chercher_par_nom_sans_verrou(Etudiant *tete, const char *requete, int tolerance,
+                                 int limite, EnregistrementEtudiant *sortie) {
+    if (!requete || !sortie || limite <= 0 || tolerance < 0) return 0;
+
+    if (!contexte->indexCNE.actif && !index_construire(&contexte->indexCNE, tete)) return 0;
+    if (!contexte->indexNoms.valide && !noms_construire(&contexte->indexNoms, tete)) return 0;
+    if (!contexte->indexNoms.nb_noeuds) return 0;
+
+    RechercheNom recherche = {{{0}}, 0, 0, 0, limite, 0, sortie};
+    char normalise[MAX_BUFFER_SIZE];
+    normaliser_nom(requete, normalise, sizeof(normalise));
+    const char *separateurs = " \t-'";
+    for (char *c = normalise; *c && recherche.nb_jetons < MAX_JETONS; ) {
+        c += strspn(c, separateurs);
+        size_t n = strcspn(c, separateurs);
+        if (!n) break;
+        if (n >= MAX_STRING_LENGTH) n = MAX_STRING_LENGTH - 1;
+        memcpy(recherche.jetons[recherche.nb_jetons], c, n);
+        recherche.jetons[recherche.nb_jetons++][n] = '\0';
+        c += strcspn(c, separateurs);
+    }
+    if (!recherche.nb_jetons) return 0;
+    recherche.longueur = (int)strlen(recherche.jetons[0]);
+
+    int racine[MAX_STRING_LENGTH + 1];
+    for (int j = 0; j <= recherche.longueur; j++) racine[j] = j;
+
+    for (int t = 0; t <= tolerance && recherche.trouves < limite; t++) {
+        recherche.tolerance = t;
+        if (recherche.longueur <= t) {
+            recherche_sous_arbre(&recherche, 0);
+        } else {
+            recherche_trie(&recherche, 0, racine);
+        }
+    }
+    return recherche.trouves;
+}
+
+EXPORT int chercher_par_nom(Etudiant *tete, const char *requete, int tolerance,
+                            int limite, EnregistrementEtudiant *sortie) {
+    contexte_entrer(ACCES_ECRITURE);
+    int resultat = chercher_par_nom_sans_verrou(tete, requete, tolerance, limite, sortie);
+    contexte_sortir(ACCES_ECRITURE);
+    return resultat;
+}
+
+int comparer_cle(const Etudiant *a, const Etudiant *b, int cle) {
+    float x, y;
+
+    switch (cle) {
+    case CLE_NOM: {
+        int c = strcmp(a->nom, b->nom);
+        return c ? c : strcmp(a->prenom, b->prenom);
+    }
+    case CLE_CNE:
+        return (a->CNE > b->CNE) - (a->CNE < b->CNE);
+    case CLE_MOYENNE:
+        x = a->moyenne;
+        y = b->moyenne;
+        break;
+    default:
+        x = a->notes[cle - CLE_NOTE1];
+        y = b->notes[cle - CLE_NOTE1];
+        break;
+    }
+    return (x > y) - (x < y);
+}
+
+// La cle secondaire departage les egalites, toujours en ordre croissant
+int comparer_selon(const Etudiant *a, const Etudiant *b, const CritereTri *critere) {
+    int c = comparer_cle(a, b, critere->cle);
+    if (!critere->ordre) c = -c;
+    if (!c && critere->cle_secondaire >= 0) {
+        c = comparer_cle(a, b, critere->cle_secondaire);
+    }
+    return c;
+}
+
+int cle_valide(int cle) {
+    return cle >= CLE_NOM && cle <= CLE_NOTE4;
+}
+
+// Coupe la liste apres n noeuds et retourne le reste
+Etudiant *couper(Etudiant *liste, size_t n) {
+    while (liste && --n) {
+        liste = liste->suivant;
+    }
+    if (!liste) return NULL;
+
+    Etudiant *reste = liste->suivant;
+    liste->suivant = NULL;
+    return reste;
+}
+
+// Fusion stable de deux sous-listes triees, ajoutee apres *queue
+Etudiant **fusionner(Etudiant *gauche, Etudiant *droite, const CritereTri *critere, Etudiant **queue) {
+    while (gauche && droite) {
+        if (comparer_selon(droite, gauche, critere) < 0) {
+            *queue = droite;
+            droite = droite->suivant;
+        } else {
+            *queue = gauche;
+            gauche = gauche->suivant;
+        }
+        queue = &(*queue)->suivant;
+    }
+    *queue = gauche ? gauche : droite;
+    while (*queue) {
+        queue = &(*queue)->suivant;
+    }
+    return queue;
+}
+
+// Tri fusion ascendant: seuls les pointeurs sont reecrits, jamais les donnees.
+// suivi (optionnel) est avance a chaque fusion et peut annuler: retourne alors
+// 0, la liste reste complete mais partiellement triee. Sans suivi, le tri va
+// toujours a son terme.
+int trier_chaine(Etudiant **tete, const CritereTri *critere, Progression *suivi) {
+    int termine = 1;
+    for (size_t largeur = 1; termine; largeur *= 2) {
+        Etudiant *reste = *tete;
+        Etudiant *nouvelle_tete = NULL;
+        Etudiant **queue = &nouvelle_tete;
+        size_t fusions = 0;
+
+        while (reste) {
+            if (suivi && suivi->annulation) {
+                // Raccrocher le reste non fusionne: aucun noeud n'est perdu
+                *queue = reste;
+                termine = 0;
+                break;
+            }
+            Etudiant *gauche = reste;
+            Etudiant *droite = couper(gauche, largeur);
+            reste = couper(droite, largeur);
+            queue = fusionner(gauche, droite, critere, queue);
+            fusions++;
+            if (suivi) suivi->fait += (long)(2 * largeur);
+        }
+        *tete = nouvelle_tete;
+        if (fusions <= 1) break;
+    }
 
-    OperationResult file_result = mettre_a_jour_fichier(*tete, filename);
-    if (!file_result.success) {
-        free(file_result.message);
-        result.message = strdup("Étudiant ajouté mais erreur lors de la sauvegarde");
-        return result;
+    Etudiant *precedent = NULL;
+    for (Etudiant *current = *tete; current; current = current->suivant) {
+        current->precedent = precedent;
+        precedent = current;
     }
-    free(file_result.message);
+    return termine;
+}
 
-    result.success = 1;
-    result.message = strdup("Étudiant ajouté avec succès");
-    result.etudiant = nouveau;
-    return result;
+// Tri de la liste chargee, suivi par lire_progression et annulable par
+// demander_annulation; retourne 0 s'il a ete annule
+int trier_liste(Etudiant **tete, const CritereTri *critere) {
+    if (!*tete) return 1;
+    contexte->generationListe++;
+
+    long n = (long)compter_liste(*tete);
+    long passes = 0;
+    while ((1L << passes) < n) passes++;
+    progression_demarrer(n * passes);
+
+    int termine = trier_chaine(tete, critere, &contexte->progression);
+    contexte->progression.fait = contexte->progression.total;
+    return termine;
 }
 
-EXPORT OperationResult supprimer_etudiant(Etudiant **tete, const char *filename, int CNE) {
+OperationResult trier_etudiants_sans_verrou(Etudiant **tete, const char *filename,
+                                            int cle, int ordre, int cle_secondaire) {
     OperationResult result = {0, NULL, NULL, NULL};
     
-    if (!*tete) {
-        result.message = strdup("Liste vide");
+    if (!cle_valide(cle) || (cle_secondaire != -1 && !cle_valide(cle_secondaire))) {
+        result.message = strdup("Clé de tri invalide");
         return result;
     }
     
-    Etudiant *current = *tete;
-    Etudiant *previous = NULL;
+    CritereTri critere = {cle, ordre, cle_secondaire};
+    if (!*tete || !(*tete)->suivant) {
+        contexte->triActif.actif = 1;
+        contexte->triActif.critere = critere;
+        result.success = 1;
+        result.message = strdup("Liste déjà triée");
+        return result;
+    }
     
-    while (current) {
-        if (current->CNE == CNE) {
-            if (previous) {
-                previous->suivant = current->suivant;
-            } else {
-                *tete = current->suivant;
-            }
-            
-            empiler_suppression(current);
-            
-            OperationResult file_result = mettre_a_jour_fichier(*tete, filename);
-            if (!file_result.success) {
-                free(file_result.message);
-                result.message = strdup("Étudiant supprimé mais erreur lors de la sauvegarde");
-                return result;
-            }
-            free(file_result.message);
-            
-            result.success = 1;
-            result.message = strdup("Étudiant supprimé avec succès");
-            return result;
+    // Ordre d'avant le tri, pour l'annuler (ou l'interrompre) sans perdre l'ordre
+    Action *action = action_creer(ACTION_TRI, 0, (int)compter_liste(*tete));
+    if (action) {
+        int i = 0;
+        for (Etudiant *current = *tete; current && i < action->nombre; current = current->suivant) {
+            action->ordre[i++] = current->CNE;
         }
-        previous = current;
-        current = current->suivant;
+        action->critere = critere;
+        action->tri_precedent = contexte->triActif;
     }
     
-    result.message = strdup("Étudiant non trouvé");
-    return result;
-}
-
-EXPORT OperationResult annuler_derniere_suppression(Etudiant **tete, const char *filename) {
-    OperationResult result = {0, NULL, NULL, NULL};
-    
-    Etudiant *etudiant = depiler_suppression();
-    if (!etudiant) {
-        result.message = strdup("Aucune suppression à annuler");
+    contexte->progression.annulation = 0;
+    if (!trier_liste(tete, &critere)) {
+        if (action && restaurer_ordre(tete, action->ordre, action->nombre)) {
+            action_liberer(action);
+        } else {
+            if (action) action_liberer(action);
+            contexte->triActif.actif = 0;
+        }
+        result.message = strdup("Tri annulé");
         return result;
     }
+    contexte->triActif.actif = 1;
+    contexte->triActif.critere = critere;
+    historique_noter(action);
     
-    etudiant->suivant = *tete;
-    *tete = etudiant;
-    
-    OperationResult file_result = mettre_a_jour_fichier(*tete, filename);
-    if (!file_result.success) {
-        free(file_result.message);
-        result.message = strdup("Suppression annulée mais erreur lors de la sauvegarde");
+    char ligne[MAX_BUFFER_SIZE];
+    snprintf(ligne, sizeof(ligne), "T %d %d %d\n", cle, ordre, cle_secondaire);
+    if (!persister_partout(*tete, filename, ligne)) {
+        result.message = strdup("Liste triée mais erreur lors de la sauvegarde");
         return result;
     }
-    free(file_result.message);
     
     result.success = 1;
-    result.message = strdup("Dernière suppression annulée avec succès");
+    result.message = strdup("Liste triée avec succès");
     return result;
 }
 
-EXPORT OperationResult chercher_etudiant(Etudiant *tete, int CNE) {
-    OperationResult result = {0, NULL, NULL, NULL};
-    
-    Etudiant *current = tete;
-    while (current) {
-        if (current->CNE == CNE) {
-            result.success = 1;
-            result.message = strdup("Étudiant trouvé");
-            result.etudiant = current;
-            return result;
-        }
+EXPORT OperationResult trier_etudiants(Etudiant **tete, const char *filename,
+                                       int cle, int ordre, int cle_secondaire) {
+    contexte_entrer(ACCES_ECRITURE);
+    OperationResult resultat = trier_etudiants_sans_verrou(tete, filename, cle, ordre, cle_secondaire);
+    effacer_annulation();
+    contexte_sortir(ACCES_ECRITURE);
+    return resultat;
+}
+
+// Insere a sa place selon le tri actif, apres les egaux comme le ferait le tri
+// stable; en tete si la liste n'est pas triee. Cout O(n) au lieu d'un tri complet.
+void inserer_noeud(Etudiant **tete, Etudiant *etudiant) {
+    inserer_noeud_selon(tete, etudiant, &contexte->triActif);
+}
+
+void inserer_noeud_selon(Etudiant **tete, Etudiant *etudiant, const TriActif *tri) {
+    if (!tri->actif || !*tete) {
+        lier_en_tete(tete, etudiant);
+        return;
+    }
+    contexte->generationListe++;
+
+    Etudiant *precedent = NULL;
+    Etudiant *current = *tete;
+    while (current && comparer_selon(etudiant, current, &tri->critere) >= 0) {
+        precedent = current;
         current = current->suivant;
     }
-    
-    result.message = strdup("Étudiant non trouvé");
-    return result;
+
+    etudiant->precedent = precedent;
+    etudiant->suivant = current;
+    if (current) current->precedent = etudiant;
+    if (precedent) {
+        precedent->suivant = etudiant;
+    } else {
+        *tete = etudiant;
+    }
 }
 
-EXPORT OperationResult trier_etudiants_moyenne(Etudiant **tete, const char *filename, int ordre) {
-    OperationResult result = {0, NULL, NULL, NULL};
-    
-    if (!*tete || !(*tete)->suivant) {
-        result.success = 1;
-        result.message = strdup("Liste déjà triée");
-        return result;
+// Accroche un lot de noeuds (chaine par suivant, dans l'ordre du lot): trie puis
+// fusionne en une passe si la liste est triee, sinon chaque noeud passe en tete
+void inserer_lot(Etudiant **tete, Etudiant *lot) {
+    if (!contexte->triActif.actif) {
+        while (lot) {
+            Etudiant *suivant = lot->suivant;
+            lier_en_tete(tete, lot);
+            lot = suivant;
+        }
+        return;
     }
-    
-    int echange;
-    Etudiant *ptr1;
-    Etudiant *lptr = NULL;
-    
-    do {
-        echange = 0;
-        ptr1 = *tete;
-        
-        while (ptr1->suivant != lptr) {
-            if ((ordre && ptr1->moyenne > ptr1->suivant->moyenne) ||
-                (!ordre && ptr1->moyenne < ptr1->suivant->moyenne)) {
-         
-                Etudiant temp = *ptr1;
-                *ptr1 = *(ptr1->suivant);
-                *(ptr1->suivant) = temp;
-                
-                Etudiant *temp_next = ptr1->suivant->suivant;
-                ptr1->suivant->suivant = ptr1->suivant;
-                ptr1->suivant = temp_next;
-                
-                echange = 1;
-            }
-            ptr1 = ptr1->suivant;
+
+    // Le lot est toujours trie en entier: une annulation en attente laisserait
+    // la liste desordonnee alors que triActif la dit triee
+    trier_chaine(&lot, &contexte->triActif.critere, NULL);
+    contexte->generationListe++;
+    Etudiant *fusion = NULL;
+    fusionner(*tete, lot, &contexte->triActif.critere, &fusion);
+    *tete = fusion;
+
+    Etudiant *precedent = NULL;
+    for (Etudiant *current = *tete; current; current = current->suivant) {
+        current->precedent = precedent;
+        precedent = current;
+    }
+}
+
+// Candidat du classement: la position dans la liste departage les egalites
+typedef struct Candidat {
+    const Etudiant *etudiant;
+    int position;
+} Candidat;
+
+// Vrai si a passe devant b dans le classement (plus fort, ou plus faible si
+// plus_faibles), a egalite le premier dans la liste passe devant
+int devant(const Candidat *a, const Candidat *b, int cle, int plus_faibles) {
+    int c = comparer_cle(a->etudiant, b->etudiant, cle);
+    if (plus_faibles) c = -c;
+    return c > 0 || (c == 0 && a->position < b->position);
+}
+
+// Tas dont la racine est le candidat le moins bien classe
+void tas_descendre(Candidat *tas, int taille, int i, int cle, int plus_faibles) {
+    for (;;) {
+        int dernier = i;
+        int gauche = 2 * i + 1, droite = 2 * i + 2;
+        if (gauche < taille && devant(&tas[dernier], &tas[gauche], cle, plus_faibles)) dernier = gauche;
+        if (droite < taille && devant(&tas[dernier], &tas[droite], cle, plus_faibles)) dernier = droite;
+        if (dernier == i) return;
+        Candidat temp = tas[i];
+        tas[i] = tas[dernier];
+        tas[dernier] = temp;
+        i = dernier;
+    }
+}
+
+void tas_monter(Candidat *tas, int i, int cle, int plus_faibles) {
+    while (i > 0) {
+        int parent = (i - 1) / 2;
+        if (!devant(&tas[parent], &tas[i], cle, plus_faibles)) return;
+        Candidat temp = tas[i];
+        tas[i] = tas[parent];
+        tas[parent] = temp;
+        i = parent;
+    }
+}
+
+// Copie dans `sortie` les k premiers du classement selon `cle` (les k plus
+// faibles si plus_faibles), du premier au k-ieme. La liste n'est pas modifiee:
+// un tas borne a k candidats suffit, en O(n log k). Retourne le nombre copie,
+// -1 si la cle est invalide ou la memoire insuffisante.
+int meilleurs_etudiants_sans_verrou(Etudiant *tete, int cle, int k, int plus_faibles,
+                                    EnregistrementEtudiant *sortie) {
+    if (!cle_valide(cle) || !sortie) return -1;
+    if (k <= 0 || !tete) return 0;
+
+    size_t n = compter_liste(tete);
+    if ((size_t)k > n) k = (int)n;
+
+    Candidat *tas = malloc(sizeof(Candidat) * k);
+    if (!tas) return -1;
+
+    int taille = 0;
+    int position = 0;
+    for (Etudiant *current = tete; current; current = current->suivant, position++) {
+        Candidat candidat = {current, position};
+        if (taille < k) {
+            tas[taille] = candidat;
+            tas_monter(tas, taille++, cle, plus_faibles);
+        } else if (devant(&candidat, &tas[0], cle, plus_faibles)) {
+            tas[0] = candidat;
+            tas_descendre(tas, taille, 0, cle, plus_faibles);
         }
-        lptr = ptr1;
-    } while (echange);
-    
-    OperationResult file_result = mettre_a_jour_fichier(*tete, filename);
-    if (!file_result.success) {
-        free(file_result.message);
-        result.message = strdup("Liste triée mais erreur lors de la sauvegarde");
-        return result;
     }
-    free(file_result.message);
-    
-    result.success = 1;
-    result.message = strdup("Liste triée avec succès");
-    return result;
+
+    // La racine est toujours le moins bien classe: on remplit depuis la fin
+    for (int i = taille - 1; i >= 0; i--) {
+        copier_enregistrement(&sortie[i], tas[0].etudiant);
+        tas[0] = tas[i];
+        tas_descendre(tas, i, 0, cle, plus_faibles);
+    }
+    free(tas);
+    return taille;
 }
 
-EXPORT OperationResult ajouter_file_attente(const char *nom, const char *prenom, 
-                                          int CNE, const float *notes) {
+EXPORT int meilleurs_etudiants(Etudiant *tete, int cle, int k, int plus_faibles,
+                               EnregistrementEtudiant *sortie) {
+    contexte_entrer(ACCES_LECTURE);
+    int resultat = meilleurs_etudiants_sans_verrou(tete, cle, k, plus_faibles, sortie);
+    contexte_sortir(ACCES_LECTURE);
+    return resultat;
+}
+
+// Rang de l'etudiant selon `cle` (1 pour le premier, rangs partages en cas
+// d'egalite), sans trier; -1 si le CNE est absent ou la cle invalide
+int rang_etudiant_sans_verrou(Etudiant *tete, int CNE, int cle, int plus_faibles) {
+    if (!cle_valide(cle)) return -1;
+
+    Etudiant *etudiant = chercher_noeud(tete, CNE);
+    if (!etudiant) return -1;
+
+    int rang = 1;
+    for (Etudiant *current = tete; current; current = current->suivant) {
+        int c = comparer_cle(current, etudiant, cle);
+        if (plus_faibles ? c < 0 : c > 0) rang++;
+    }
+    return rang;
+}
+
+EXPORT int rang_etudiant(Etudiant *tete, int CNE, int cle, int plus_faibles) {
+    contexte_entrer(ACCES_LECTURE);
+    int resultat = rang_etudiant_sans_verrou(tete, CNE, cle, plus_faibles);
+    contexte_sortir(ACCES_LECTURE);
+    return resultat;
+}
+
+// Ordre actif de la liste; retourne 0 si elle n'est pas triee
+int tri_actif_sans_verrou(int *cle, int *ordre, int *cle_secondaire) {
+    if (!contexte->triActif.actif) return 0;
+    if (cle) *cle = contexte->triActif.critere.cle;
+    if (ordre) *ordre = contexte->triActif.critere.ordre;
+    if (cle_secondaire) *cle_secondaire = contexte->triActif.critere.cle_secondaire;
+    return 1;
+}
+
+EXPORT int tri_actif(int *cle, int *ordre, int *cle_secondaire) {
+    contexte_entrer(ACCES_LECTURE);
+    int resultat = tri_actif_sans_verrou(cle, ordre, cle_secondaire);
+    contexte_sortir(ACCES_LECTURE);
+    return resultat;
+}
+
+OperationResult trier_etudiants_moyenne_sans_verrou(Etudiant **tete, const char *filename, int ordre) {
+    return trier_etudiants(tete, filename, CLE_MOYENNE, ordre, -1);
+}
+
+EXPORT OperationResult trier_etudiants_moyenne(Etudiant **tete, const char *filename, int ordre) {
+    contexte_entrer(ACCES_ECRITURE);
+    OperationResult resultat = trier_etudiants_moyenne_sans_verrou(tete, filename, ordre);
+    contexte_sortir(ACCES_ECRITURE);
+    return resultat;
+}
+
+OperationResult ajouter_file_attente_sans_verrou(const char *nom, const char *prenom, 
+                                               int CNE, const float *notes) {
     OperationResult result = {0, NULL, NULL, NULL};
     
     
@@ -439,13 +3754,13 @@ EXPORT OperationResult ajouter_file_attente(const char *nom, const char *prenom,
     }
     
     for (int i = 0; i < 4; i++) {
-        if (notes[i] < 0 || notes[i] > 20) {
+        if (!(notes[i] >= 0 && notes[i] <= 20)) {
             result.message = strdup("Notes invalides");
             return result;
         }
     }
     
-    Etudiant *nouveau = malloc(sizeof(Etudiant));
+    Etudiant *nouveau = reserve_allouer(&contexte->reserveFile);
     if (!nouveau) {
         result.message = strdup("Erreur d'allocation mémoire");
         return result;
@@ -459,13 +3774,19 @@ EXPORT OperationResult ajouter_file_attente(const char *nom, const char *prenom,
     memcpy(nouveau->notes, notes, sizeof(float)*4);
     calculer_moyenne(nouveau);
     nouveau->suivant = NULL;
+    nouveau->precedent = NULL;
     
-    if (!fileAttente.debut) {
-        fileAttente.debut = nouveau;
-        fileAttente.fin = nouveau;
+    if (!contexte->fileAttente.debut) {
+        contexte->fileAttente.debut = nouveau;
+        contexte->fileAttente.fin = nouveau;
     } else {
-        fileAttente.fin->suivant = nouveau;
-        fileAttente.fin = nouveau;
+        contexte->fileAttente.fin->suivant = nouveau;
+        contexte->fileAttente.fin = nouveau;
+    }
+    
+    if (!file_sauvegarder()) {
+        result.message = strdup("Étudiant ajouté à la file d'attente mais erreur lors de la sauvegarde");
+        return result;
     }
     
     result.success = 1;
@@ -473,97 +3794,416 @@ EXPORT OperationResult ajouter_file_attente(const char *nom, const char *prenom,
     return result;
 }
 
-EXPORT OperationResult retirer_file_attente() {
+EXPORT OperationResult ajouter_file_attente(const char *nom, const char *prenom, 
+                                          int CNE, const float *notes) {
+    contexte_entrer(ACCES_ECRITURE);
+    OperationResult resultat = ajouter_file_attente_sans_verrou(nom, prenom, CNE, notes);
+    contexte_sortir(ACCES_ECRITURE);
+    return resultat;
+}
+
+OperationResult retirer_file_attente_sans_verrou() {
     OperationResult result = {0, NULL, NULL, NULL};
     
-    if (!fileAttente.debut) {
+    if (!contexte->fileAttente.debut) {
         result.message = strdup("File d'attente vide");
         return result;
     }
     
-    Etudiant *temp = fileAttente.debut;
-    fileAttente.debut = fileAttente.debut->suivant;
+    Etudiant *temp = contexte->fileAttente.debut;
+    contexte->fileAttente.debut = contexte->fileAttente.debut->suivant;
     
-    if (!fileAttente.debut) {
-        fileAttente.fin = NULL;
+    if (!contexte->fileAttente.debut) {
+        contexte->fileAttente.fin = NULL;
     }
     
-    free(temp);
+    reserve_rendre(&contexte->reserveFile, temp);
+    
+    if (!file_sauvegarder()) {
+        result.message = strdup("Étudiant retiré de la file d'attente mais erreur lors de la sauvegarde");
+        return result;
+    }
     
     result.success = 1;
     result.message = strdup("Étudiant retiré de la file d'attente");
     return result;
 }
 
-EXPORT char* afficher_file_attente() {
-    if (!fileAttente.debut) {
+EXPORT OperationResult retirer_file_attente() {
+    contexte_entrer(ACCES_ECRITURE);
+    OperationResult resultat = retirer_file_attente_sans_verrou();
+    contexte_sortir(ACCES_ECRITURE);
+    return resultat;
+}
+
+char *afficher_file_attente_sans_verrou() {
+    if (!contexte->fileAttente.debut) {
         return strdup("File d'attente vide");
     }
-    
-    char *buffer = malloc(MAX_BUFFER_SIZE);
-    if (!buffer) return NULL;
-    
+    return rendre_alloue(contexte->fileAttente.debut, FORMAT_FILE);
+}
 
-    memset(buffer, 0, MAX_BUFFER_SIZE);
-    
-    buffer[0] = '\0';
-    Etudiant *current = fileAttente.debut;
-    int i = 1;
-    
-    while (current) {
-        char temp[MAX_BUFFER_SIZE];
-        snprintf(temp, sizeof(temp), 
-                "\nÉtudiant %d:\nNom: %s\nPrénom: %s\nCNE: %d\nNotes: %.2f, %.2f, %.2f, %.2f\nMoyenne: %.2f\n----------------\n",
-                i++, current->nom, current->prenom, current->CNE,
-                current->notes[0], current->notes[1],
-                current->notes[2], current->notes[3],
-                current->moyenne);
-        strncat(buffer, temp, MAX_BUFFER_SIZE - strlen(buffer) - 1);
-        current = current->suivant;
-    }
-    
-    return buffer;
+EXPORT char* afficher_file_attente() {
+    contexte_entrer(ACCES_LECTURE);
+    char *resultat = afficher_file_attente_sans_verrou();
+    contexte_sortir(ACCES_LECTURE);
+    return resultat;
 }
 
-EXPORT OperationResult inscrire_etudiant_file(Etudiant **tete, const char *filename) {
+size_t rendre_file_attente_sans_verrou(char *sortie, size_t capacite) {
+    return rendre_fixe(contexte->fileAttente.debut, FORMAT_FILE, sortie, capacite);
+}
+
+EXPORT size_t rendre_file_attente(char *sortie, size_t capacite) {
+    contexte_entrer(ACCES_LECTURE);
+    size_t resultat = rendre_file_attente_sans_verrou(sortie, capacite);
+    contexte_sortir(ACCES_LECTURE);
+    return resultat;
+}
+
+int parcourir_file_attente_sans_verrou(RappelEtudiant rappel, void *donnees) {
+    return parcourir_liste(contexte->fileAttente.debut, rappel, donnees);
+}
+
+EXPORT int parcourir_file_attente(RappelEtudiant rappel, void *donnees) {
+    contexte_entrer(ACCES_LECTURE);
+    int resultat = parcourir_file_attente_sans_verrou(rappel, donnees);
+    contexte_sortir(ACCES_LECTURE);
+    return resultat;
+}
+
+// Inscrit les `nombre` premiers etudiants de la file (toute la file si
+// nombre <= 0) en une passe: un CNE deja dans la liste est verifie par l'index
+// et l'etudiant reste dans la file. Le lot est insere, journalise et la file
+// enregistree une seule fois.
+OperationResult inscrire_file_attente_sans_verrou(Etudiant **tete, const char *filename, int nombre) {
     OperationResult result = {0, NULL, NULL, NULL};
     
-    if (!fileAttente.debut) {
+    if (!contexte->fileAttente.debut) {
         result.message = strdup("File d'attente vide");
         return result;
     }
+    if (!contexte->indexCNE.actif && !index_construire(&contexte->indexCNE, *tete)) {
+        result.message = strdup("Erreur d'allocation mémoire");
+        return result;
+    }
     
-    Etudiant *etudiant = fileAttente.debut;
-    fileAttente.debut = fileAttente.debut->suivant;
+    int examines = 0;
+    for (Etudiant *current = contexte->fileAttente.debut; current && (nombre <= 0 || examines < nombre);
+         current = current->suivant) {
+        examines++;
+    }
+    // Reserve avant de toucher a la file: l'historique ne peut plus manquer
+    int partition = partition_pour(filename);
+    Action *action = partition >= 0 ? action_creer(ACTION_INSCRIPTION, examines, 0) : NULL;
+    if (!action) {
+        result.message = strdup("Erreur d'allocation mémoire");
+        return result;
+    }
+    action->partition = partition;
     
-    if (!fileAttente.debut) {
-        fileAttente.fin = NULL;
+    Etudiant *lot = NULL;
+    Etudiant **fin_lot = &lot;
+    Etudiant **lien = &contexte->fileAttente.debut;
+    Etudiant *dernier_garde = NULL;
+    int inscrits = 0;
+    int erreur_memoire = 0;
+    for (int i = 0; i < examines; i++) {
+        Etudiant *etudiant = *lien;
+        // L'index contient deja les inscrits du lot: un CNE vu plus tot reste aussi
+        if (index_chercher(&contexte->indexCNE, etudiant->CNE)) {
+            dernier_garde = etudiant;
+            lien = &etudiant->suivant;
+            continue;
+        }
+        // L'inscrit est recopie dans la reserve de la liste
+        Etudiant *inscrit = creer_etudiant(&contexte->reserveListe, etudiant->nom, etudiant->prenom,
+                                           etudiant->CNE, etudiant->notes);
+        if (!inscrit || index_inserer(&contexte->indexCNE, inscrit) < 0) {
+            reserve_rendre(&contexte->reserveListe, inscrit);
+            erreur_memoire = 1;
+            break;
+        }
+        inscrit->partition = partition;
+        *lien = etudiant->suivant;
+        reserve_rendre(&contexte->reserveFile, etudiant);
+        *fin_lot = inscrit;
+        fin_lot = &inscrit->suivant;
+        copier_enregistrement(&action->enregistrements[inscrits++], inscrit);
     }
+    if (!*lien) contexte->fileAttente.fin = dernier_garde;
     
-    etudiant->suivant = *tete;
-    *tete = etudiant;
+    if (!inscrits) {
+        action_liberer(action);
+        if (erreur_memoire) {
+            result.message = strdup("Erreur d'allocation mémoire");
+        } else if (examines == 1) {
+            result.message = strdup("Un étudiant avec ce CNE existe déjà");
+        } else {
+            result.message = strdup("Aucun étudiant inscrit : tous les CNE sont déjà dans la liste");
+        }
+        return result;
+    }
+    action->nombre = inscrits;
+    action->octets = sizeof(Action) + sizeof(EnregistrementEtudiant) * (size_t)examines;
     
-    OperationResult file_result = mettre_a_jour_fichier(*tete, filename);
-    if (!file_result.success) {
-        free(file_result.message);
-        result.message = strdup("Étudiant inscrit mais erreur lors de la sauvegarde");
+    inserer_lot(tete, lot);
+    int sauvegarde = journaliser_action(*tete, filename, 'A', action);
+    sauvegarde = file_sauvegarder() && sauvegarde;
+    historique_noter(action);
+    
+    char message[MAX_BUFFER_SIZE];
+    if (!sauvegarde) {
+        snprintf(message, sizeof(message), "%d étudiants inscrits mais erreur lors de la sauvegarde", inscrits);
+        result.message = strdup(message);
         return result;
     }
-    free(file_result.message);
     
+    if (nombre == 1) {
+        snprintf(message, sizeof(message), "Étudiant inscrit avec succès");
+    } else if (inscrits < examines) {
+        snprintf(message, sizeof(message), "%d étudiants inscrits, %d déjà dans la liste restent dans la file",
+                 inscrits, examines - inscrits);
+    } else {
+        snprintf(message, sizeof(message), "%d étudiants inscrits", inscrits);
+    }
     result.success = 1;
-    result.message = strdup("Étudiant inscrit avec succès");
+    result.message = strdup(message);
     return result;
 }
 
-EXPORT void liberer_liste(Etudiant *tete) {
-    while (tete) {
-        Etudiant *temp = tete;
-        tete = tete->suivant;
-        free(temp);
+EXPORT OperationResult inscrire_file_attente(Etudiant **tete, const char *filename, int nombre) {
+    contexte_entrer(ACCES_ECRITURE);
+    OperationResult resultat = inscrire_file_attente_sans_verrou(tete, filename, nombre);
+    contexte_sortir(ACCES_ECRITURE);
+    return resultat;
+}
+
+OperationResult inscrire_etudiant_file_sans_verrou(Etudiant **tete, const char *filename) {
+    return inscrire_file_attente(tete, filename, 1);
+}
+
+EXPORT OperationResult inscrire_etudiant_file(Etudiant **tete, const char *filename) {
+    contexte_entrer(ACCES_ECRITURE);
+    OperationResult resultat = inscrire_etudiant_file_sans_verrou(tete, filename);
+    contexte_sortir(ACCES_ECRITURE);
+    return resultat;
+}
+
+int nombre_etudiants_sans_verrou(Etudiant *tete) {
+    return (int)compter_liste(tete);
+}
+
+EXPORT int nombre_etudiants(Etudiant *tete) {
+    contexte_entrer(ACCES_LECTURE);
+    int resultat = nombre_etudiants_sans_verrou(tete);
+    contexte_sortir(ACCES_LECTURE);
+    return resultat;
+}
+
+// Copie au plus `limite` etudiants a partir de la position `debut` dans `sortie`.
+// Des pages successives reprennent depuis le curseur: le cout suit la taille
+// de la page et le deplacement, pas la position dans la liste.
+int extraire_page_sans_verrou(Etudiant *tete, int debut, int limite, EnregistrementEtudiant *sortie) {
+    if (!tete || debut < 0 || limite <= 0 || !sortie) return 0;
+
+    Etudiant *current = tete;
+    int position = 0;
+    verrou_prendre(&contexte->verrouCurseur, ACCES_ECRITURE);
+    if (contexte->curseurPage.tete == tete && contexte->curseurPage.generation == contexte->generationListe &&
+        abs(contexte->curseurPage.position - debut) < debut) {
+        current = contexte->curseurPage.noeud;
+        position = contexte->curseurPage.position;
+    }
+    verrou_rendre(&contexte->verrouCurseur, ACCES_ECRITURE);
+    while (current && position < debut) {
+        current = current->suivant;
+        position++;
+    }
+    while (current && position > debut) {
+        current = current->precedent;
+        position--;
+    }
+    if (!current) return 0;
+
+    verrou_prendre(&contexte->verrouCurseur, ACCES_ECRITURE);
+    contexte->curseurPage.tete = tete;
+    contexte->curseurPage.noeud = current;
+    contexte->curseurPage.position = debut;
+    contexte->curseurPage.generation = contexte->generationListe;
+    verrou_rendre(&contexte->verrouCurseur, ACCES_ECRITURE);
+
+    int copies = 0;
+    for (; current && copies < limite; current = current->suivant) {
+        copier_enregistrement(&sortie[copies++], current);
+    }
+    return copies;
+}
+
+EXPORT int extraire_page(Etudiant *tete, int debut, int limite, EnregistrementEtudiant *sortie) {
+    contexte_entrer(ACCES_LECTURE);
+    int resultat = extraire_page_sans_verrou(tete, debut, limite, sortie);
+    contexte_sortir(ACCES_LECTURE);
+    return resultat;
+}
+
+// Remplit trois colonnes en un seul parcours: CNE, notes (ligne i aux indices
+// 4*i .. 4*i+3) et moyenne. Retourne le nombre de lignes, au plus `capacite`.
+int extraire_colonnes_sans_verrou(Etudiant *tete, int *cnes, float *notes, float *moyennes, int capacite) {
+    if (capacite <= 0 || !cnes || !notes || !moyennes) return 0;
+
+    int lignes = 0;
+    for (Etudiant *current = tete; current && lignes < capacite; current = current->suivant) {
+        cnes[lignes] = current->CNE;
+        memcpy(&notes[lignes * 4], current->notes, sizeof(current->notes));
+        moyennes[lignes] = current->moyenne;
+        lignes++;
     }
+    return lignes;
+}
+
+EXPORT int extraire_colonnes(Etudiant *tete, int *cnes, float *notes, float *moyennes, int capacite) {
+    contexte_entrer(ACCES_LECTURE);
+    int resultat = extraire_colonnes_sans_verrou(tete, cnes, notes, moyennes, capacite);
+    contexte_sortir(ACCES_LECTURE);
+    return resultat;
+}
+
+EXPORT void demander_annulation() {
+    contexte->progression.annulation = 1;
+}
+
+// Oublie une annulation une fois l'operation annulable terminee, pour qu'elle
+// n'arrete pas la suivante (ni les tris internes qui consultent le drapeau)
+EXPORT void effacer_annulation() {
+    contexte->progression.annulation = 0;
+}
+
+EXPORT void lire_progression(long *fait, long *total) {
+    if (fait) *fait = contexte->progression.fait;
+    if (total) *total = contexte->progression.total;
+}
+
+OperationResult construire_index_cne_sans_verrou(Etudiant *tete) {
+    OperationResult result = {0, NULL, NULL, NULL};
+    
+    if (!index_construire(&contexte->indexCNE, tete)) {
+        result.message = strdup("Erreur d'allocation mémoire");
+        return result;
+    }
+    
+    result.success = 1;
+    result.message = strdup("Index CNE construit");
+    return result;
+}
+
+EXPORT OperationResult construire_index_cne(Etudiant *tete) {
+    contexte_entrer(ACCES_ECRITURE);
+    OperationResult resultat = construire_index_cne_sans_verrou(tete);
+    contexte_sortir(ACCES_ECRITURE);
+    return resultat;
+}
+
+void liberer_index_cne_sans_verrou() {
+    index_vider(&contexte->indexCNE);
+}
+
+EXPORT void liberer_index_cne() {
+    contexte_entrer(ACCES_ECRITURE);
+    liberer_index_cne_sans_verrou();
+    contexte_sortir(ACCES_ECRITURE);
+}
+
+int taille_index_cne_sans_verrou() {
+    return contexte->indexCNE.actif ? (int)contexte->indexCNE.taille : -1;
+}
+
+EXPORT int taille_index_cne() {
+    contexte_entrer(ACCES_LECTURE);
+    int resultat = taille_index_cne_sans_verrou();
+    contexte_sortir(ACCES_LECTURE);
+    return resultat;
+}
+
+// Libere la liste chargee d'un coup: tous ses noeuds sont dans reserveListe,
+// rendue bloc par bloc sans parcourir le chainage
+void liberer_liste_sans_verrou(Etudiant *tete) {
+    (void)tete;
+    contexte->triActif.actif = 0;
+    historique_vider();
+    partitions_vider();
+    rapport_vider(&contexte->rapportLecture);
+    index_vider(&contexte->indexCNE);
+    contexte->generationListe++;
+    reserve_vider(&contexte->reserveListe);
+}
+
+EXPORT void liberer_liste(Etudiant *tete) {
+    contexte_entrer(ACCES_ECRITURE);
+    liberer_liste_sans_verrou(tete);
+    contexte_sortir(ACCES_ECRITURE);
+}
+
+void empreinte_memoire_sans_verrou(EmpreinteMemoire *sortie) {
+    if (!sortie) return;
+    sortie->etudiants = (long)contexte->reserveListe.vivants;
+    sortie->en_attente = (long)contexte->reserveFile.vivants;
+    sortie->noeuds_reserves = (long)(contexte->reserveListe.capacite + contexte->reserveFile.capacite);
+    sortie->blocs = (long)(contexte->reserveListe.nb_blocs + contexte->reserveFile.nb_blocs);
+    sortie->octets_noeuds = (long)(reserve_octets(&contexte->reserveListe) + reserve_octets(&contexte->reserveFile));
+    sortie->octets_index = (long)(contexte->indexCNE.capacite * sizeof(EntreeIndex) +
+                                  (size_t)contexte->indexNoms.capacite_noeuds * sizeof(NoeudNom) +
+                                  (size_t)contexte->indexNoms.capacite_entrees * sizeof(EntreeNom));
+    sortie->octets_historique = (long)contexte->historique.octets;
+}
+
+EXPORT void empreinte_memoire(EmpreinteMemoire *sortie) {
+    contexte_entrer(ACCES_LECTURE);
+    empreinte_memoire_sans_verrou(sortie);
+    contexte_sortir(ACCES_LECTURE);
+}
+
+// Contextes independants: chacun tient sa liste, sa file, son historique et ses
+// index. Un thread choisit le sien par contexte_utiliser; les points d'entree
+// agissent ensuite sur lui, sans changer de signature.
+EXPORT Contexte *contexte_creer() {
+    Contexte *ctx = malloc(sizeof(Contexte));
+    if (!ctx) return NULL;
+
+    Contexte modele = CONTEXTE_INITIAL;
+    *ctx = modele;
+    verrou_initialiser(&ctx->verrou);
+    verrou_initialiser(&ctx->verrouCurseur);
+    return ctx;
+}
+
+// Retourne 0 pendant un point d'entree (un rappel de parcourir_liste...):
+// le verrou pris est celui du contexte courant. NULL revient au contexte par defaut.
+EXPORT int contexte_utiliser(Contexte *ctx) {
+    if (profondeurAppel > 0) return 0;
+    contexte = ctx ? ctx : &contexteDefaut;
+    return 1;
+}
+
+EXPORT Contexte *contexte_actuel() {
+    return contexte;
+}
+
+// Libere tout ce que tient le contexte. Aucun thread ne doit plus l'utiliser;
+// le contexte par defaut n'est jamais libere.
+EXPORT void contexte_liberer(Contexte *ctx) {
+    if (!ctx || ctx == &contexteDefaut || profondeurAppel > 0) return;
+
+    Contexte *precedent = contexte;
+    contexte = ctx;
+    liberer_liste_sans_verrou(NULL);
+    file_vider();
+    verrou_detruire(&ctx->verrou);
+    verrou_detruire(&ctx->verrouCurseur);
+    contexte = precedent == ctx ? &contexteDefaut : precedent;
+    free(ctx);
 }
 
 #ifdef __cplusplus
 }
-#endif
\ No newline at end of file
+#endif
@@ -0,0 +1,199 @@
+"""Time every DLL entry point on reproducible synthetic rosters.
+
+Rosters of each requested size are generated in etudiants.txt format, loaded
+through the ctypes bindings and exercised call by call. The timings are written
+as JSON so two builds can be compared:
+
+    python benchmark.py --output new.json --baseline old.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from ctypes import POINTER, byref, c_float, create_string_buffer
+
+from student_bindings import DLL_PATH, Etudiant, parallel_lookup, student_dll
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def generate_roster(path, count, seed=42):
+    """Write a reproducible roster of `count` students in etudiants.txt format"""
+    rng = random.Random(seed)
+    cnes = rng.sample(range(1, count * 10 + 1), count)
+    with open(path, "w") as f:
+        for i, cne in enumerate(cnes):
+            notes = " ".join(f"{rng.uniform(0, 20):.2f}" for _ in range(4))
+            f.write(f"Nom{i} Prenom{i} {cne} {notes}\n")
+    return cnes
+
+
+def measure(call, calls):
+    """Run call(i) for i in range(calls) and summarize the per-call times"""
+    samples = []
+    for i in range(calls):
+        start = time.perf_counter()
+        call(i)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    total = sum(samples)
+    return {
+        "calls": calls,
+        "total_s": total,
+        "mean_us": total / calls * 1e6,
+        "median_us": samples[calls // 2] * 1e6,
+        "min_us": samples[0] * 1e6,
+        "max_us": samples[-1] * 1e6,
+    }
+
+
+def expect(result, what):
+    if not result.success:
+        raise RuntimeError(f"{what} failed: {result.message!r}")
+    return result
+
+
+def bench_roster(count, lookups, queue_size, seed):
+    """Benchmark each export on a roster of `count` students; returns {name: stats}"""
+    results = {}
+    rng = random.Random(seed + 1)
+    notes = (c_float * 4)(12.0, 14.5, 9.0, 16.25)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "etudiants.txt")
+        cnes = generate_roster(path, count, seed)
+        filename = create_string_buffer(path.encode("utf-8"))
+        head = POINTER(Etudiant)()
+
+        def load(_):
+            nonlocal head
+            if head:
+                student_dll.liberer_liste(head)
+            head = expect(student_dll.lire_fichier_etudiants(filename), "load").liste
+        results["lire_fichier_etudiants"] = measure(load, 3)
+
+        sample = rng.choices(cnes, k=lookups)
+        results["chercher_etudiant"] = measure(
+            lambda i: expect(student_dll.chercher_etudiant(head, sample[i]), "search"), lookups)
+
+        # The whole sample at once, spread over a thread pool sharing the read lock
+        results["chercher_etudiant_parallele"] = measure(lambda _: parallel_lookup(head, sample), 1)
+
+        # Same lookups without the CNE index, on a smaller sample: they scan the list
+        student_dll.liberer_index_cne()
+        results["chercher_etudiant_sans_index"] = measure(
+            lambda i: expect(student_dll.chercher_etudiant(head, sample[i]), "search"),
+            max(1, lookups // 100))
+        expect(student_dll.construire_index_cne(head), "index")
+
+        # New CNEs are above every generated one
+        new_cnes = [count * 10 + 1 + i for i in range(lookups)]
+        results["ajouter_etudiant"] = measure(
+            lambda i: expect(student_dll.ajouter_etudiant(byref(head), filename, b"Bench", b"Ajout",
+                                                          new_cnes[i], notes), "add"), lookups)
+        results["supprimer_etudiant"] = measure(
+            lambda i: expect(student_dll.supprimer_etudiant(byref(head), filename, new_cnes[i]),
+                             "delete"), lookups)
+
+        # Alternate directions so every call really reorders the list
+        results["trier_etudiants_moyenne"] = measure(
+            lambda i: expect(student_dll.trier_etudiants_moyenne(byref(head), filename, i % 2),
+                             "sort"), 2)
+
+        results["afficher_liste_etudiants"] = measure(
+            lambda _: student_dll.afficher_liste_etudiants(head), 1)
+
+        queue_cnes = [count * 10 + lookups + 1 + i for i in range(queue_size)]
+        results["ajouter_file_attente"] = measure(
+            lambda i: expect(student_dll.ajouter_file_attente(b"Bench", b"File", queue_cnes[i], notes),
+                             "enqueue"), queue_size)
+        results["afficher_file_attente"] = measure(lambda _: student_dll.afficher_file_attente(), 1)
+        half = queue_size // 2
+        results["inscrire_etudiant_file"] = measure(
+            lambda _: expect(student_dll.inscrire_etudiant_file(byref(head), filename), "enroll"), half)
+        results["retirer_file_attente"] = measure(
+            lambda _: expect(student_dll.retirer_file_attente(), "dequeue"), queue_size - half)
+
+        # The same number of students again, enrolled in one batch
+        batch_cnes = [cne + queue_size for cne in queue_cnes]
+        for cne in batch_cnes:
+            expect(student_dll.ajouter_file_attente(b"Bench", b"Lot", cne, notes), "enqueue")
+        results["inscrire_file_attente"] = measure(
+            lambda _: expect(student_dll.inscrire_file_attente(byref(head), filename, 0), "enroll all"), 1)
+
+        results["liberer_liste"] = measure(lambda _: student_dll.liberer_liste(head), 1)
+    return results
+
+
+def environment():
+    """Describe the build and machine the timings belong to"""
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "dll": os.path.basename(DLL_PATH),
+        "dll_mtime": os.path.getmtime(DLL_PATH),
+        "dll_size": os.path.getsize(DLL_PATH),
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Print mean-time ratios against a baseline report; return the regressions"""
+    previous = {(row["students"], row["function"]): row for row in baseline["results"]}
+    regressions = []
+    for row in report["results"]:
+        old = previous.get((row["students"], row["function"]))
+        if old is None:
+            continue
+        ratio = row["mean_us"] / old["mean_us"] if old["mean_us"] else float("inf")
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  REGRESSION"
+            regressions.append(row)
+        print(f"{row['students']:>9} {row['function']:<28} {old['mean_us']:12.2f} -> "
+              f"{row['mean_us']:12.2f} us  x{ratio:5.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="roster sizes to generate")
+    parser.add_argument("--lookups", type=int, default=1_000,
+                        help="searches, additions and deletions per roster")
+    parser.add_argument("--queue", type=int, default=1_000, help="students pushed through the queue")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmark.json", help="JSON report path ('-' for stdout)")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown before a regression is reported")
+    args = parser.parse_args(argv)
+
+    report = {"environment": environment(), "seed": args.seed, "results": []}
+    for count in args.sizes:
+        print(f"{count} students...", file=sys.stderr)
+        for function, stats in bench_roster(count, args.lookups, args.queue, args.seed).items():
+            report["results"].append({"students": count, "function": function, **stats})
+            print(f"  {function:<28} {stats['mean_us']:12.2f} us/call", file=sys.stderr)
+
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
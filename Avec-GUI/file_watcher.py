@@ -0,0 +1,135 @@
+"""Watch roster files for changes made by other programs.
+
+On Linux the watcher uses inotify through libc, on the directories holding
+the files so that editors replacing a file by renaming are seen too.
+Elsewhere, or when inotify cannot be set up, it polls the size and
+modification time of each file. Either way a burst of writes is reported
+once, after the file has been quiet for `settle` seconds.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+
+# inotify masks and flags (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+# struct inotify_event: wd, mask, cookie, len, then len bytes of name
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def file_signature(path):
+    """(size, mtime_ns) of the file, None if it cannot be read"""
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    return info.st_size, info.st_mtime_ns
+
+
+class FileWatcher:
+    """Call on_change(path) from a background thread when a watched file changes"""
+
+    def __init__(self, paths, on_change, interval=1.0, settle=0.3):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.on_change = on_change
+        self.interval = interval
+        self.settle = settle
+        self.mode = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._fd = None
+        self._directories = {}
+
+    def start(self):
+        self._fd = self._open_inotify()
+        self.mode = "inotify" if self._fd is not None else "polling"
+        target = self._run_inotify if self._fd is not None else self._run_polling
+        self._thread = threading.Thread(target=target, name="file-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _open_inotify(self):
+        """inotify descriptor watching every directory, None if unavailable"""
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            init = libc.inotify_init1
+            add_watch = libc.inotify_add_watch
+        except (OSError, AttributeError, TypeError):
+            return None
+        add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+
+        fd = init(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return None
+        for directory in {os.path.dirname(path) for path in self.paths}:
+            wd = add_watch(fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                os.close(fd)
+                return None
+            self._directories[wd] = directory
+        return fd
+
+    def _run_inotify(self):
+        watched = set(self.paths)
+        pending = {}
+        while not self._stop.is_set():
+            now = time.monotonic()
+            timeout = min([deadline - now for deadline in pending.values()] + [0.5])
+            readable, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+            if readable:
+                for path in self._read_events():
+                    if path in watched:
+                        pending[path] = time.monotonic() + self.settle
+            now = time.monotonic()
+            for path in [path for path, deadline in pending.items() if deadline <= now]:
+                del pending[path]
+                self.on_change(path)
+
+    def _read_events(self):
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if wd in self._directories and name:
+                yield os.path.join(self._directories[wd], os.fsdecode(name))
+
+    def _run_polling(self):
+        known = {path: file_signature(path) for path in self.paths}
+        while not self._stop.wait(self.interval):
+            for path in self.paths:
+                signature = file_signature(path)
+                if signature == known[path] or signature is None:
+                    continue
+                # Wait for the writer to finish: the file must stop changing
+                while not self._stop.wait(self.settle):
+                    latest = file_signature(path)
+                    if latest == signature:
+                        break
+                    signature = latest
+                known[path] = signature
+                self.on_change(path)
@@ -1,102 +1,213 @@
-import tkinter as tk
-from tkinter import ttk, messagebox
-from ctypes import (CDLL, Structure, c_char, c_int, c_float, POINTER, 
-                    byref, c_void_p, cast, create_string_buffer, sizeof, c_char_p)
-import os
-import locale
 import sys
 
+# Any argument switches to the headless command line (see student_cli.py),
+# before Tk and the GUI-only modules are imported
+if __name__ == "__main__" and len(sys.argv) > 1:
+    try:
+        from student_cli import main
+    except OSError as e:
+        print(f"Failed to load DLL: {e}", file=sys.stderr)
+        sys.exit(1)
+    sys.exit(main())
 
-locale.setlocale(locale.LC_ALL, '')
-
-def safe_free(ptr):
-    if ptr and isinstance(ptr, (int, c_void_p, c_char_p)):
-        try:
-            free(cast(ptr, c_void_p))
-        except Exception as e:
-            print(f"Error freeing pointer: {e}")
-
-try:
-    libc = CDLL(None)
-    free = libc.free
-    free.argtypes = [c_void_p]
-    free.restype = None
-except Exception as e:
-    print(f"Failed to load libc: {e}")
-    sys.exit(1)
-
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from ctypes import byref, create_string_buffer, c_float, c_long
+from concurrent.futures import ThreadPoolExecutor
+import bisect
+import csv
+import os
+import queue
 
 try:
-    dll_path = os.path.abspath("student_management.dll")
-    student_dll = CDLL(dll_path)
-except Exception as e:
+    import student_bindings
+    from student_bindings import (
+        student_dll, safe_free, decode_c_string, StudentRecord, SORT_KEYS, NO_TIEBREAK,
+        import_students, read_students_csv, page_students, queue_students, active_sort,
+        top_students, student_rank, search_by_name, history_state,
+        load_partitions, load_errors, resync_file, memory_footprint, enable_instrumentation, disable_instrumentation, LATENCY_BUCKETS_US
+    )
+    import student_statistics
+    from student_statistics import NUMPY_AVAILABLE, SUBJECTS
+    from file_watcher import FileWatcher
+except OSError as e:
     messagebox.showerror("Error", f"Failed to load DLL: {e}")
     sys.exit(1)
 
 
-class Etudiant(Structure):
-    _fields_ = [
-        ("nom", c_char * 50),
-        ("prenom", c_char * 50),
-        ("CNE", c_int),
-        ("notes", c_float * 4),
-        ("moyenne", c_float),
-        ("suivant", POINTER('Etudiant'))
-    ]
-
-class OperationResult(Structure):
-    _fields_ = [
-        ("success", c_int),
-        ("message", c_char_p),
-        ("etudiant", POINTER(Etudiant)),
-        ("liste", POINTER(Etudiant))
-    ]
-
- 
-def setup_dll_functions():
-    student_dll.lire_fichier_etudiants.argtypes = [c_char_p]
-    student_dll.lire_fichier_etudiants.restype = OperationResult
-
-    student_dll.mettre_a_jour_fichier.argtypes = [POINTER(Etudiant), c_char_p]
-    student_dll.mettre_a_jour_fichier.restype = OperationResult
-
-    student_dll.afficher_etudiant.argtypes = [POINTER(Etudiant)]
-    student_dll.afficher_etudiant.restype = c_char_p
-
-    student_dll.afficher_liste_etudiants.argtypes = [POINTER(Etudiant)]
-    student_dll.afficher_liste_etudiants.restype = c_char_p
-
-    student_dll.ajouter_etudiant.argtypes = [POINTER(POINTER(Etudiant)), c_char_p, c_char_p, c_char_p, c_int, POINTER(c_float)]
-    student_dll.ajouter_etudiant.restype = OperationResult
-
-    student_dll.supprimer_etudiant.argtypes = [POINTER(POINTER(Etudiant)), c_char_p, c_int]
-    student_dll.supprimer_etudiant.restype = OperationResult
+# (identifier, heading, width) for the student list views
+STUDENT_COLUMNS = [
+    ("nom", "Nom", 140),
+    ("prenom", "Prénom", 140),
+    ("cne", "CNE", 100),
+    ("note1", "Note 1", 70),
+    ("note2", "Note 2", 70),
+    ("note3", "Note 3", 70),
+    ("note4", "Note 4", 70),
+    ("moyenne", "Moyenne", 80),
+]
 
-    student_dll.annuler_derniere_suppression.argtypes = [POINTER(POINTER(Etudiant)), c_char_p]
-    student_dll.annuler_derniere_suppression.restype = OperationResult
+def row_ids(rows, key_column):
+    """Treeview item id of each row: its key column, numbered when repeated"""
+    seen = {}
+    ids = []
+    for row in rows:
+        key = str(row[key_column])
+        count = seen.get(key, 0)
+        seen[key] = count + 1
+        ids.append(f"{key}#{count}" if count else key)
+    return ids
 
-    student_dll.chercher_etudiant.argtypes = [POINTER(Etudiant), c_int]
-    student_dll.chercher_etudiant.restype = OperationResult
-
-    student_dll.trier_etudiants_moyenne.argtypes = [POINTER(POINTER(Etudiant)), c_char_p, c_int]
-    student_dll.trier_etudiants_moyenne.restype = OperationResult
-
-    student_dll.ajouter_file_attente.argtypes = [c_char_p, c_char_p, c_int, POINTER(c_float)]
-    student_dll.ajouter_file_attente.restype = OperationResult
-
-    student_dll.retirer_file_attente.argtypes = []
-    student_dll.retirer_file_attente.restype = OperationResult
+def longest_ordered_run(ids, position):
+    """Largest subset of ids, taken in order, whose position[id] increase"""
+    tails, tail_index = [], []
+    previous = [None] * len(ids)
+    for i, item in enumerate(ids):
+        j = bisect.bisect_left(tails, position[item])
+        if j:
+            previous[i] = tail_index[j - 1]
+        if j == len(tails):
+            tails.append(position[item])
+            tail_index.append(i)
+        else:
+            tails[j] = position[item]
+            tail_index[j] = i
+    
+    run = set()
+    i = tail_index[-1] if tail_index else None
+    while i is not None:
+        run.add(ids[i])
+        i = previous[i]
+    return run
 
-    student_dll.afficher_file_attente.argtypes = []
-    student_dll.afficher_file_attente.restype = c_char_p
+def diff_rows(old, new):
+    """Row-level changes from `old` to `new`, both {item id: values} in display order.
+    
+    Returns the (inserted, removed, moved, updated) sets of item ids. The
+    longest run of rows that kept their relative order stays in place, so a
+    scroll or a single addition moves nothing.
+    """
+    position = {item: i for i, item in enumerate(old)}
+    kept = [item for item in new if item in position]
+    inserted = {item for item in new if item not in position}
+    removed = {item for item in old if item not in new}
+    moved = set(kept) - longest_ordered_run(kept, position)
+    updated = {item for item in kept if old[item] != new[item]}
+    return inserted, removed, moved, updated
 
-    student_dll.inscrire_etudiant_file.argtypes = [POINTER(POINTER(Etudiant)), c_char_p]
-    student_dll.inscrire_etudiant_file.restype = OperationResult
+class VirtualStudentList(ttk.Frame):
+    """Treeview that only holds the rows currently on screen.
 
-    student_dll.liberer_liste.argtypes = [POINTER(Etudiant)]
-    student_dll.liberer_liste.restype = None
+    count_rows() returns the total number of rows and fetch_rows(offset, limit)
+    returns the value tuples of one page, so redrawing costs the same for
+    ten students or a million. Rows are identified by their key column (the
+    CNE): a redraw only inserts, removes, moves or updates the rows that changed.
+    """
+    def __init__(self, parent, count_rows, fetch_rows, columns=STUDENT_COLUMNS, key_column=2):
+        super().__init__(parent)
+        self.count_rows = count_rows
+        self.fetch_rows = fetch_rows
+        self.key_column = key_column
+        self.offset = 0
+        self.total = 0
+        self.visible = 0
+        # {item id: values} of the rows in the Treeview, in display order
+        self.shown = {}
+        # (inserted, removed, moved, updated) row counts of the last redraw
+        self.last_diff = (0, 0, 0, 0)
+        # Set while a worker thread owns the list: nothing is fetched
+        self.suspended = False
+        
+        self.tree = ttk.Treeview(self, columns=[ident for ident, _, _ in columns],
+                                 show="headings", selectmode="browse", height=20)
+        for ident, heading, width in columns:
+            self.tree.heading(ident, text=heading)
+            self.tree.column(ident, width=width, anchor=tk.W)
+        
+        # The scrollbar drives the page offset instead of scrolling the Treeview
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+        
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<MouseWheel>", self.on_wheel)
+        self.tree.bind("<Button-4>", self.on_wheel)
+        self.tree.bind("<Button-5>", self.on_wheel)
+        self.tree.bind("<Prior>", lambda event: self.scroll_by(-self.visible))
+        self.tree.bind("<Next>", lambda event: self.scroll_by(self.visible))
+    
+    def row_height(self):
+        try:
+            return int(ttk.Style().lookup("Treeview", "rowheight")) or 20
+        except (ValueError, tk.TclError):
+            return 20
+    
+    def refresh(self):
+        """Re-read the row count and redraw the current window"""
+        if self.suspended:
+            return
+        self.total = self.count_rows()
+        self.render()
+    
+    def render(self):
+        if self.suspended:
+            return
+        self.offset = max(0, min(self.offset, self.total - self.visible))
+        rows = self.fetch_rows(self.offset, self.visible) if self.total and self.visible else []
+        rows = dict(zip(row_ids(rows, self.key_column), rows))
+        
+        # Moved rows are detached first: the rows left in place are then already
+        # in order and every other row goes in at its final index
+        inserted, removed, moved, updated = diff_rows(self.shown, rows)
+        if removed:
+            self.tree.delete(*removed)
+        if moved:
+            self.tree.detach(*moved)
+        for index, (item, row) in enumerate(rows.items()):
+            if item in inserted:
+                self.tree.insert("", index, iid=item, values=row)
+            elif item in moved:
+                self.tree.move(item, "", index)
+            if item in updated:
+                self.tree.item(item, values=row)
+        self.shown = rows
+        self.last_diff = (len(inserted), len(removed), len(moved), len(updated))
+        
+        if self.total:
+            self.scrollbar.set(self.offset / self.total, (self.offset + len(rows)) / self.total)
+        else:
+            self.scrollbar.set(0, 1)
+    
+    def scroll_by(self, rows):
+        self.offset += rows
+        self.render()
+    
+    def on_resize(self, event):
+        # One row height is taken by the headings
+        visible = max(1, event.height // self.row_height() - 1)
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
+    
+    def on_scroll(self, action, value, unit=None):
+        if action == "moveto":
+            self.offset = int(float(value) * self.total)
+            self.render()
+        elif action == "scroll":
+            self.scroll_by(int(value) * (self.visible if unit == "pages" else 1))
+    
+    def on_wheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.scroll_by(-3)
+        else:
+            self.scroll_by(3)
 
-setup_dll_functions()
+# How often a running background job is polled for progress, in milliseconds
+JOB_POLL_MS = 100
+# How often the Tk loop picks up files changed by other programs
+WATCH_POLL_MS = 500
+# Skipped lines listed after a load; the rest are only counted
+LOAD_ERRORS_SHOWN = 10
 
 class StudentManagementApp:
     def __init__(self, root):
@@ -109,10 +220,28 @@ class StudentManagementApp:
         self.student_list = None
         self.current_sort = None  
         
+        # Long DLL operations run on a single worker so they never overlap
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.job = None
+        self.cancel_requested = False
+        self.action_buttons = []
+        
+        # Roster files edited by other programs; filled by the watcher thread
+        self.watcher = None
+        self.file_changes = queue.SimpleQueue()
+        self.changed_files = set()
+        
+        # Views to redraw at the next idle cycle ("students", "queue")
+        self.pending_refresh = set()
+        self.refresh_after = None
+        self.queue_snapshot = []
+        
      
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         self.auto_load_file()
+        self.root.after(WATCH_POLL_MS, self.check_file_changes)
     
     def setup_ui(self):
         """Set up the main user interface"""
@@ -128,6 +257,17 @@ class StudentManagementApp:
         self.main_container = ttk.Frame(self.root)
         self.main_container.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
+        # Background job status bar
+        self.job_frame = ttk.Frame(self.main_container)
+        self.job_frame.pack(side=tk.BOTTOM, fill=tk.X, pady=(5, 0))
+        self.job_label = ttk.Label(self.job_frame, text="")
+        self.job_label.pack(side=tk.LEFT, padx=5)
+        self.job_progress = ttk.Progressbar(self.job_frame, mode="indeterminate", length=250)
+        self.job_progress.pack(side=tk.LEFT, padx=5)
+        self.job_cancel_button = ttk.Button(self.job_frame, text="Annuler", command=self.cancel_job,
+                                            state=tk.DISABLED)
+        self.job_cancel_button.pack(side=tk.LEFT, padx=5)
+        
         # Notebook for tabs
         self.notebook = ttk.Notebook(self.main_container)
         self.notebook.pack(fill=tk.BOTH, expand=True)
@@ -137,6 +277,9 @@ class StudentManagementApp:
         self.create_queue_tab()
         self.create_view_tab()
         self.create_sort_tab() 
+        self.create_class_stats_tab()
+        self.create_stats_tab()
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
     
     def create_sort_tab(self):
         """Create a dedicated tab for sorting operations"""
@@ -147,11 +290,23 @@ class StudentManagementApp:
         sort_control_frame = ttk.Frame(tab)
         sort_control_frame.pack(fill=tk.X, padx=5, pady=5)
         
+        # Sort key selection
+        ttk.Label(sort_control_frame, text="Clé:").pack(side=tk.LEFT, padx=(5, 2))
+        self.sort_key_var = tk.StringVar(value="Moyenne")
+        ttk.Combobox(sort_control_frame, textvariable=self.sort_key_var, values=list(SORT_KEYS),
+                     state="readonly", width=14).pack(side=tk.LEFT, padx=2)
+        
+        ttk.Label(sort_control_frame, text="Départage:").pack(side=tk.LEFT, padx=(10, 2))
+        self.sort_tiebreak_var = tk.StringVar(value=NO_TIEBREAK)
+        ttk.Combobox(sort_control_frame, textvariable=self.sort_tiebreak_var,
+                     values=[NO_TIEBREAK] + list(SORT_KEYS),
+                     state="readonly", width=14).pack(side=tk.LEFT, padx=2)
+        
         # Sort buttons
-        self.sort_asc_button = ttk.Button(sort_control_frame, text="Tri Croissant", 
-                                        command=lambda: self.sort_students(1, display=True))
-        self.sort_desc_button = ttk.Button(sort_control_frame, text="Tri Décroissant", 
-                                         command=lambda: self.sort_students(0, display=True))
+        self.sort_asc_button = self.action_button(sort_control_frame, "Tri Croissant", 
+                                                  lambda: self.sort_students(1, display=True))
+        self.sort_desc_button = self.action_button(sort_control_frame, "Tri Décroissant", 
+                                                   lambda: self.sort_students(0, display=True))
         self.sort_asc_button.pack(side=tk.LEFT, padx=5)
         self.sort_desc_button.pack(side=tk.LEFT, padx=5)
         
@@ -159,17 +314,43 @@ class StudentManagementApp:
         self.sort_status = ttk.Label(sort_control_frame, text="Non trié")
         self.sort_status.pack(side=tk.LEFT, padx=10)
         
+        # Read-only ranking by the selected key: the list order is not changed
+        ranking_frame = ttk.LabelFrame(tab, text="Classement (sans modifier l'ordre)", padding=10)
+        ranking_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        ranking_controls = ttk.Frame(ranking_frame)
+        ranking_controls.pack(fill=tk.X)
+        ttk.Label(ranking_controls, text="N:").pack(side=tk.LEFT, padx=(0, 2))
+        self.ranking_count_var = tk.StringVar(value="10")
+        ttk.Spinbox(ranking_controls, from_=1, to=1000, textvariable=self.ranking_count_var,
+                    width=6).pack(side=tk.LEFT, padx=2)
+        self.action_button(ranking_controls, "Meilleurs",
+                           lambda: self.show_top_students(False)).pack(side=tk.LEFT, padx=5)
+        self.action_button(ranking_controls, "Plus faibles",
+                           lambda: self.show_top_students(True)).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(ranking_controls, text="CNE:").pack(side=tk.LEFT, padx=(20, 2))
+        self.ranking_cne_entry = ttk.Entry(ranking_controls, width=12)
+        self.ranking_cne_entry.pack(side=tk.LEFT, padx=2)
+        self.action_button(ranking_controls, "Rang", self.show_student_rank_by_key).pack(side=tk.LEFT, padx=5)
+        self.ranking_status = ttk.Label(ranking_controls, text="")
+        self.ranking_status.pack(side=tk.LEFT, padx=10)
+        
+        ranking_columns = [("rang", "Rang", 50)] + STUDENT_COLUMNS
+        self.ranking_tree = ttk.Treeview(ranking_frame, columns=[ident for ident, _, _ in ranking_columns],
+                                         show="headings", height=6)
+        for ident, heading, width in ranking_columns:
+            self.ranking_tree.heading(ident, text=heading)
+            self.ranking_tree.column(ident, width=width, anchor=tk.W)
+        self.ranking_tree.pack(fill=tk.X, pady=(5, 0))
+        
         # Display frame for sorted results
         display_frame = ttk.LabelFrame(tab, text="Résultats du Tri", padding=10)
         display_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        # Text widget to display sorted students
-        self.sorted_display = tk.Text(display_frame, height=30, width=80, state=tk.DISABLED)
-        scrollbar = ttk.Scrollbar(display_frame, orient="vertical", command=self.sorted_display.yview)
-        self.sorted_display.configure(yscrollcommand=scrollbar.set)
-        
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.sorted_display.pack(fill=tk.BOTH, expand=True)
+        # Virtualized list of sorted students
+        self.sorted_view = VirtualStudentList(display_frame, self.count_students, self.fetch_student_rows)
+        self.sorted_view.pack(fill=tk.BOTH, expand=True)
         
         # Status label
         self.sort_tab_status = ttk.Label(tab, text="")
@@ -204,19 +385,50 @@ class StudentManagementApp:
             entry.grid(row=3, column=1+i, padx=2, pady=5)
             self.note_entries.append(entry)
         
+        # One roster file per class; additions, imports and enrollments go to the selected one
+        ttk.Label(form_frame, text="Classe:").grid(row=4, column=0, padx=5, pady=5, sticky=tk.W)
+        self.class_paths = []
+        self.class_combo = ttk.Combobox(form_frame, state="readonly", width=25)
+        self.class_combo.grid(row=4, column=1, columnspan=4, padx=5, pady=5, sticky=tk.W)
+        self.class_combo.bind("<<ComboboxSelected>>", self.on_class_selected)
+        
         # Buttons
         button_frame = ttk.Frame(tab)
         button_frame.pack(fill=tk.X, padx=5, pady=5)
         
-        ttk.Button(button_frame, text="Ajouter Étudiant", command=self.add_student).pack(side=tk.LEFT, padx=5)
-        ttk.Button(button_frame, text="Supprimer Étudiant", command=self.delete_student).pack(side=tk.LEFT, padx=5)
-        ttk.Button(button_frame, text="Rechercher Étudiant", command=self.search_student).pack(side=tk.LEFT, padx=5)
-        ttk.Button(button_frame, text="Annuler Suppression", command=self.undo_delete).pack(side=tk.LEFT, padx=5)
+        self.action_button(button_frame, "Ajouter Étudiant", self.add_student).pack(side=tk.LEFT, padx=5)
+        self.action_button(button_frame, "Supprimer Étudiant", self.delete_student).pack(side=tk.LEFT, padx=5)
+        self.action_button(button_frame, "Rechercher Étudiant", self.search_student).pack(side=tk.LEFT, padx=5)
+        self.undo_button = self.action_button(button_frame, "Annuler", self.undo_delete)
+        self.undo_button.pack(side=tk.LEFT, padx=5)
+        self.redo_button = self.action_button(button_frame, "Rétablir", self.redo_action)
+        self.redo_button.pack(side=tk.LEFT, padx=5)
+        self.action_button(button_frame, "Importer CSV", self.import_csv).pack(side=tk.LEFT, padx=5)
         
         # Status
         self.student_status = ttk.Label(tab, text="")
         self.student_status.pack(pady=5)
         self.student_status.config(foreground="green")
+        
+        # Search as you type on nom / prenom
+        search_frame = ttk.LabelFrame(tab, text="Recherche par nom ou prénom", padding=10)
+        search_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        self.name_search_var = tk.StringVar()
+        self.name_search_var.trace_add("write", lambda *args: self.schedule_name_search())
+        ttk.Entry(search_frame, textvariable=self.name_search_var, width=40).pack(anchor=tk.W)
+        self.name_search_after = None
+        
+        self.name_results = ttk.Treeview(search_frame, columns=[ident for ident, _, _ in STUDENT_COLUMNS],
+                                         show="headings", selectmode="browse", height=8)
+        for ident, heading, width in STUDENT_COLUMNS:
+            self.name_results.heading(ident, text=heading)
+            self.name_results.column(ident, width=width, anchor=tk.W)
+        self.name_results.pack(fill=tk.BOTH, expand=True, pady=(5, 0))
+        self.name_results.bind("<Double-1>", lambda event: self.fill_form_from_result())
+        
+        self.name_search_status = ttk.Label(search_frame, text="")
+        self.name_search_status.pack(anchor=tk.W)
     
     def create_queue_tab(self):
         """Tab for queue operations"""
@@ -251,18 +463,31 @@ class StudentManagementApp:
         button_frame = ttk.Frame(tab)
         button_frame.pack(fill=tk.X, padx=5, pady=5)
         
-        ttk.Button(button_frame, text="Ajouter à la File", command=self.add_to_queue).pack(side=tk.LEFT, padx=5)
-        ttk.Button(button_frame, text="Retirer de la File", command=self.remove_from_queue).pack(side=tk.LEFT, padx=5)
-        ttk.Button(button_frame, text="Inscrire depuis la File", command=self.enroll_from_queue).pack(side=tk.LEFT, padx=5)
+        self.action_button(button_frame, "Ajouter à la File", self.add_to_queue).pack(side=tk.LEFT, padx=5)
+        self.action_button(button_frame, "Retirer de la File", self.remove_from_queue).pack(side=tk.LEFT, padx=5)
+        self.action_button(button_frame, "Inscrire depuis la File", self.enroll_from_queue).pack(side=tk.LEFT, padx=5)
+        
+        # Batch enrollment: the first N students, or the whole queue
+        batch_frame = ttk.Frame(tab)
+        batch_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(batch_frame, text="Nombre:").pack(side=tk.LEFT, padx=5)
+        self.enroll_count_var = tk.StringVar(value="10")
+        ttk.Spinbox(batch_frame, from_=1, to=100000, width=7,
+                    textvariable=self.enroll_count_var).pack(side=tk.LEFT, padx=5)
+        self.action_button(batch_frame, "Inscrire N", self.enroll_batch).pack(side=tk.LEFT, padx=5)
+        self.action_button(batch_frame, "Inscrire Tout",
+                           lambda: self.enroll_from_queue(count=0)).pack(side=tk.LEFT, padx=5)
         
         # Queue display
         display_frame = ttk.LabelFrame(tab, text="Affichage de la File", padding=10)
         display_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        self.queue_text = tk.Text(display_frame, height=10, width=60, state=tk.DISABLED)
-        self.queue_text.pack(fill=tk.BOTH, expand=True)
+        self.queue_view = VirtualStudentList(display_frame, self.count_queue, self.fetch_queue_rows)
+        self.queue_view.pack(fill=tk.BOTH, expand=True)
+        self.queue_count_label = ttk.Label(display_frame, text="La file d'attente est vide")
+        self.queue_count_label.pack(pady=(5, 0))
         
-        ttk.Button(display_frame, text="Actualiser la File", command=self.refresh_queue).pack(pady=5)
+        self.action_button(display_frame, "Actualiser la File", self.refresh_queue).pack(pady=5)
     
     def create_view_tab(self):
         """Tab for viewing students"""
@@ -273,25 +498,361 @@ class StudentManagementApp:
         display_frame = ttk.LabelFrame(tab, text="Liste des Étudiants", padding=10)
         display_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        self.student_text = tk.Text(display_frame, height=30, width=80, state=tk.DISABLED)
-        self.student_text.pack(fill=tk.BOTH, expand=True)
+        self.student_view = VirtualStudentList(display_frame, self.count_students, self.fetch_student_rows)
+        self.student_view.pack(fill=tk.BOTH, expand=True)
+        
+        self.student_count_label = ttk.Label(display_frame, text="Aucune donnée étudiante chargée")
+        self.student_count_label.pack(pady=(5, 0))
+        
+        self.action_button(display_frame, "Actualiser la Liste", self.refresh_student_list).pack(pady=5)
+    
+    def create_class_stats_tab(self):
+        """Tab with class-wide statistics computed on a NumPy snapshot"""
+        tab = ttk.Frame(self.notebook)
+        self.notebook.add(tab, text="Statistiques")
+        
+        control_frame = ttk.Frame(tab, padding=10)
+        control_frame.pack(fill=tk.X)
+        
+        ttk.Label(control_frame, text="Seuil de réussite:").pack(side=tk.LEFT, padx=(5, 2))
+        self.pass_mark_var = tk.StringVar(value="10")
+        ttk.Spinbox(control_frame, from_=0, to=20, increment=0.5, textvariable=self.pass_mark_var,
+                    width=6).pack(side=tk.LEFT, padx=2)
+        compute_button = self.action_button(control_frame, "Calculer", self.compute_class_stats)
+        compute_button.pack(side=tk.LEFT, padx=10)
         
-        ttk.Button(display_frame, text="Actualiser la Liste", command=self.refresh_student_list).pack(pady=5)
+        self.class_stats_status = ttk.Label(control_frame, text="")
+        self.class_stats_status.pack(side=tk.LEFT, padx=10)
+        
+        table_frame = ttk.LabelFrame(tab, text="Par matière", padding=10)
+        table_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        columns = ["statistique"] + [f"col{i}" for i in range(len(SUBJECTS))]
+        self.class_stats_tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=11)
+        self.class_stats_tree.heading("statistique", text="Statistique")
+        self.class_stats_tree.column("statistique", width=140, anchor=tk.W)
+        for i, subject in enumerate(SUBJECTS):
+            self.class_stats_tree.heading(f"col{i}", text=subject)
+            self.class_stats_tree.column(f"col{i}", width=90, anchor=tk.E)
+        self.class_stats_tree.pack(fill=tk.BOTH, expand=True)
+        
+        detail_frame = ttk.Frame(tab)
+        detail_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        histogram_frame = ttk.LabelFrame(detail_frame, text="Histogramme", padding=10)
+        histogram_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.histogram_subject_var = tk.StringVar(value=SUBJECTS[-1])
+        subject_box = ttk.Combobox(histogram_frame, textvariable=self.histogram_subject_var,
+                                   values=list(SUBJECTS), state="readonly", width=12)
+        subject_box.pack(anchor=tk.W)
+        subject_box.bind("<<ComboboxSelected>>", lambda event: self.show_class_histogram())
+        self.class_histogram = tk.Text(histogram_frame, height=12, font=("Courier", 9), state=tk.DISABLED)
+        self.class_histogram.pack(fill=tk.X, pady=(5, 0))
+        
+        rank_frame = ttk.LabelFrame(detail_frame, text="Rang d'un étudiant", padding=10)
+        rank_frame.pack(side=tk.LEFT, fill=tk.Y, padx=(5, 0))
+        ttk.Label(rank_frame, text="CNE:").pack(anchor=tk.W)
+        self.rank_cne_entry = ttk.Entry(rank_frame, width=15)
+        self.rank_cne_entry.pack(anchor=tk.W)
+        ttk.Button(rank_frame, text="Afficher le rang", command=self.show_student_rank).pack(anchor=tk.W, pady=5)
+        self.rank_label = ttk.Label(rank_frame, text="", justify=tk.LEFT)
+        self.rank_label.pack(anchor=tk.W)
+        
+        self.class_stats = None
+        if not NUMPY_AVAILABLE:
+            compute_button.config(state=tk.DISABLED)
+            self.action_buttons.remove(compute_button)
+            self.class_stats_status.config(text="NumPy n'est pas installé : statistiques indisponibles")
+    
+    def compute_class_stats(self):
+        """Snapshot the list into columns, then compute the statistics on the worker"""
+        if not self.student_list:
+            messagebox.showerror("Erreur", "Veuillez charger un fichier d'abord")
+            return
+        try:
+            pass_mark = float(self.pass_mark_var.get())
+        except ValueError:
+            messagebox.showerror("Erreur", "Le seuil de réussite doit être un nombre")
+            return
+        
+        # The snapshot is one DLL call; the arrays it returns no longer touch the list
+        snapshot = student_statistics.snapshot_columns(self.student_list)
+        
+        def work():
+            return {
+                "snapshot": snapshot,
+                "summary": student_statistics.subject_statistics(snapshot, pass_mark),
+                "histograms": student_statistics.histograms(snapshot),
+                "ranks": student_statistics.ranks(snapshot),
+            }
+        
+        self.run_job("Calcul des statistiques...", work, self.show_class_stats)
+    
+    def show_class_stats(self, stats):
+        self.class_stats = stats
+        labels = [("mean", "Moyenne"), ("median", "Médiane"), ("std", "Écart-type"),
+                  ("min", "Minimum")]
+        labels += [(key, f"Percentile {key[1:]}") for key in stats["summary"] if key[1:].isdigit()]
+        labels += [("max", "Maximum"), ("pass_rate", "Taux de réussite")]
+        
+        self.class_stats_tree.delete(*self.class_stats_tree.get_children())
+        for key, label in labels:
+            row = stats["summary"][key]
+            if key == "pass_rate":
+                cells = [f"{value * 100:.1f} %" for value in row]
+            else:
+                cells = [f"{value:.2f}" for value in row]
+            self.class_stats_tree.insert("", tk.END, values=(label, *cells))
+        
+        self.class_stats_status.config(text=f"{len(stats['snapshot'])} étudiants")
+        self.show_class_histogram()
+        self.rank_label.config(text="")
+    
+    def show_class_histogram(self):
+        """Draw the histogram of the chosen subject as text bars"""
+        lines = []
+        if self.class_stats:
+            counts = self.class_stats["histograms"][SUBJECTS.index(self.histogram_subject_var.get())]
+            width = student_statistics.MAX_NOTE / len(counts)
+            peak = max(counts.max(), 1)
+            for i, count in enumerate(counts):
+                bar = "#" * int(count * 40 // peak)
+                lines.append(f"{i * width:5.1f}-{(i + 1) * width:4.1f} {bar} {count}")
+        
+        self.class_histogram.config(state=tk.NORMAL)
+        self.class_histogram.delete(1.0, tk.END)
+        self.class_histogram.insert(1.0, "\n".join(lines))
+        self.class_histogram.config(state=tk.DISABLED)
+    
+    def show_student_rank(self):
+        """Rank of one student in every subject, from the last computed statistics"""
+        if not self.class_stats:
+            messagebox.showinfo("Statistiques", "Calculez d'abord les statistiques")
+            return
+        try:
+            cne = int(self.rank_cne_entry.get())
+        except ValueError:
+            messagebox.showerror("Erreur", "Le CNE doit être un nombre")
+            return
+        
+        rows = (self.class_stats["snapshot"].cne == cne).nonzero()[0]
+        if not len(rows):
+            self.rank_label.config(text="Étudiant non trouvé")
+            return
+        total = len(self.class_stats["snapshot"])
+        ranks = self.class_stats["ranks"][rows[0]]
+        self.rank_label.config(text="\n".join(f"{subject}: {rank} / {total}"
+                                               for subject, rank in zip(SUBJECTS, ranks)))
+    
+    def create_stats_tab(self):
+        """Tab showing timings and counters of the DLL calls"""
+        tab = ttk.Frame(self.notebook)
+        self.notebook.add(tab, text="Stats")
+        self.stats_tab = tab
+        
+        control_frame = ttk.Frame(tab, padding=10)
+        control_frame.pack(fill=tk.X)
+        
+        recorder = student_bindings.instrumentation
+        self.stats_enabled = tk.BooleanVar(value=bool(recorder and recorder.active))
+        ttk.Checkbutton(control_frame, text="Mesurer les appels DLL", variable=self.stats_enabled,
+                        command=self.toggle_stats).pack(side=tk.LEFT, padx=5)
+        ttk.Button(control_frame, text="Actualiser", command=self.refresh_stats).pack(side=tk.LEFT, padx=5)
+        ttk.Button(control_frame, text="Réinitialiser", command=self.reset_stats).pack(side=tk.LEFT, padx=5)
+        ttk.Button(control_frame, text="Exporter JSON", command=self.export_stats).pack(side=tk.LEFT, padx=5)
+        
+        table_frame = ttk.LabelFrame(tab, text="Appels", padding=10)
+        table_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        columns = [
+            ("fonction", "Fonction", 200),
+            ("appels", "Appels", 70),
+            ("total", "Total (ms)", 90),
+            ("moyenne", "Moyenne (µs)", 100),
+            ("p95", "p95 (µs)", 80),
+            ("max", "Max (µs)", 90),
+            ("octets", "Octets écrits", 100),
+            ("chaines", "Chaînes", 70),
+        ]
+        self.stats_tree = ttk.Treeview(table_frame, columns=[ident for ident, _, _ in columns],
+                                       show="headings", selectmode="browse", height=10)
+        for ident, heading, width in columns:
+            self.stats_tree.heading(ident, text=heading)
+            self.stats_tree.column(ident, width=width, anchor=tk.W)
+        self.stats_tree.pack(fill=tk.BOTH, expand=True)
+        self.stats_tree.bind("<<TreeviewSelect>>", lambda event: self.show_stats_histogram())
+        
+        self.stats_summary = ttk.Label(tab, text="")
+        self.stats_summary.pack(anchor=tk.W, padx=10)
+        self.memory_summary = ttk.Label(tab, text="")
+        self.memory_summary.pack(anchor=tk.W, padx=10)
+        
+        histogram_frame = ttk.LabelFrame(tab, text="Histogramme des latences", padding=10)
+        histogram_frame.pack(fill=tk.X, padx=5, pady=5)
+        self.stats_histogram = tk.Text(histogram_frame, height=10, font=("Courier", 9), state=tk.DISABLED)
+        self.stats_histogram.pack(fill=tk.X)
+        
+        self.stats_report = None
+        self.refresh_stats()
+    
+    def on_tab_changed(self, event):
+        if self.notebook.select() == str(self.stats_tab):
+            self.refresh_stats()
+    
+    def toggle_stats(self):
+        if self.stats_enabled.get():
+            enable_instrumentation()
+        else:
+            disable_instrumentation()
+        self.refresh_stats()
+    
+    def reset_stats(self):
+        if student_bindings.instrumentation:
+            student_bindings.instrumentation.reset()
+        self.refresh_stats()
+    
+    def refresh_stats(self):
+        """Reload the instrumentation counters into the Stats tab"""
+        recorder = student_bindings.instrumentation
+        self.stats_report = recorder.report() if recorder else None
+        selected = self.stats_tree.selection()
+        
+        memory = memory_footprint()
+        self.memory_summary.config(
+            text=f"Mémoire : {memory['octets_total'] / 1024:.0f} Ko   "
+                 f"noeuds {memory['etudiants']} + {memory['en_attente']} en attente "
+                 f"/ {memory['noeuds_reserves']} réservés ({memory['blocs']} blocs)   "
+                 f"index {memory['octets_index'] / 1024:.0f} Ko   "
+                 f"historique {memory['octets_historique'] / 1024:.0f} Ko")
+        self.stats_tree.delete(*self.stats_tree.get_children())
+        
+        if not self.stats_report:
+            self.stats_summary.config(text="Instrumentation désactivée")
+            self.show_stats_histogram()
+            return
+        
+        for name, stats in self.stats_report["functions"].items():
+            p95 = stats["p95_us"]
+            self.stats_tree.insert("", tk.END, iid=name, values=(
+                name, stats["calls"], f"{stats['total_ms']:.2f}", f"{stats['mean_us']:.1f}",
+                f"≤ {p95}" if p95 is not None else "> 1 s", f"{stats['max_us']:.1f}",
+                stats["bytes_written"], stats["strings_allocated"]
+            ))
+        if selected and self.stats_tree.exists(selected[0]):
+            self.stats_tree.selection_set(selected[0])
+        
+        report = self.stats_report
+        self.stats_summary.config(
+            text=f"Chaînes allouées : {report['strings_allocated']}   "
+                 f"libérées : {report['strings_freed']}   "
+                 f"non libérées (copiées par ctypes) : {report['strings_not_freed']}")
+        self.show_stats_histogram()
+    
+    def show_stats_histogram(self):
+        """Draw the latency histogram of the selected function as text bars"""
+        lines = []
+        selected = self.stats_tree.selection()
+        if self.stats_report and selected:
+            histogram = self.stats_report["functions"][selected[0]]["histogram"]
+            peak = max(histogram) or 1
+            labels = [f"≤ {bound} µs" for bound in LATENCY_BUCKETS_US] + ["> 1 s"]
+            for label, count in zip(labels, histogram):
+                if count:
+                    lines.append(f"{label:>14} {'#' * max(1, count * 50 // peak)} {count}")
+        
+        self.stats_histogram.config(state=tk.NORMAL)
+        self.stats_histogram.delete(1.0, tk.END)
+        self.stats_histogram.insert(1.0, "\n".join(lines) or "Sélectionnez une fonction")
+        self.stats_histogram.config(state=tk.DISABLED)
+    
+    def export_stats(self):
+        """Save the instrumentation report as JSON"""
+        if not student_bindings.instrumentation:
+            messagebox.showinfo("Stats", "Activez d'abord la mesure des appels")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Exporter les statistiques",
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("Tous les fichiers", "*.*")]
+        )
+        if not path:
+            return
+        try:
+            student_bindings.instrumentation.dump(path)
+        except OSError as e:
+            messagebox.showerror("Error", f"Écriture impossible : {str(e)}")
+    
+    def action_button(self, parent, text, command):
+        """Create a button that is disabled while a background job runs"""
+        button = ttk.Button(parent, text=text, command=command)
+        self.action_buttons.append(button)
+        return button
+    
+    def run_job(self, description, work, on_done, cancellable=False):
+        """Run work() on the worker thread, then on_done(result) on the Tk thread.
+        
+        work must not touch Tk widgets; progress comes from lire_progression.
+        """
+        if self.job is not None:
+            messagebox.showwarning("Attention", "Une opération est déjà en cours")
+            return
+        
+        self.cancel_requested = False
+        self.set_busy(True, description, cancellable)
+        self.job = self.executor.submit(work)
+        self.root.after(JOB_POLL_MS, self.poll_job, on_done)
+    
+    def poll_job(self, on_done):
+        """Report progress of the running job and dispatch its result when done"""
+        done, total = c_long(), c_long()
+        student_dll.lire_progression(byref(done), byref(total))
+        if total.value > 0:
+            self.job_progress.stop()
+            self.job_progress.config(mode="determinate", maximum=total.value,
+                                     value=min(done.value, total.value))
+        
+        if not self.job.done():
+            self.root.after(JOB_POLL_MS, self.poll_job, on_done)
+            return
+        
+        job, self.job = self.job, None
+        self.set_busy(False)
+        if self.cancel_requested:
+            # A cancel that came after the job ended must not stop the next one
+            student_dll.effacer_annulation()
+        try:
+            result = job.result()
+        except Exception as e:
+            messagebox.showerror("Error", f"Erreur inattendue : {str(e)}")
+            return
+        on_done(result)
+    
+    def set_busy(self, busy, description="", cancellable=False):
+        """Lock or unlock the widgets that would race with a background job"""
+        state = tk.DISABLED if busy else tk.NORMAL
+        for button in self.action_buttons:
+            button.config(state=state)
+        self.student_view.suspended = busy
+        self.sorted_view.suspended = busy
+        self.queue_view.suspended = busy
+        
+        self.job_label.config(text=description)
+        self.job_cancel_button.config(state=tk.NORMAL if busy and cancellable else tk.DISABLED)
+        if busy:
+            self.job_progress.config(mode="indeterminate", value=0)
+            self.job_progress.start()
+        else:
+            self.job_progress.stop()
+            self.job_progress.config(mode="determinate", value=0)
+    
+    def cancel_job(self):
+        """Ask the running load or sort to stop"""
+        self.cancel_requested = True
+        student_dll.demander_annulation()
+        self.job_label.config(text="Annulation...")
     
     def safe_decode(self, text):
         """Safely decode text from C strings"""
-        if not text:
-            return ""
-        try:
-            return text.decode('utf-8')
-        except UnicodeDecodeError:
-            try:
-                return text.decode('latin-1')
-            except:
-                try:
-                    return text.decode(locale.getpreferredencoding())
-                except:
-                    return "Error decoding text"
+        return decode_c_string(text)
     
     def validate_input(self, first_name, last_name, cne, notes):
         """Validate input fields"""
@@ -311,7 +872,7 @@ class StudentManagementApp:
         try:
             for note in notes:
                 note_float = float(note)
-                if note_float < 0 or note_float > 20:
+                if not 0 <= note_float <= 20:
                     messagebox.showerror("Erreur", "Les notes doivent être entre 0 et 20")
                     return False
         except ValueError:
@@ -334,52 +895,141 @@ class StudentManagementApp:
                 messagebox.showwarning("Attention", "Aucun fichier .txt trouvé dans le répertoire")
                 return
             
-            # Try to load each file until one succeeds
-            for filename in txt_files:
-                try:
-                    full_path = os.path.join(current_dir, filename)
-                    print(f"Trying to load file: {full_path}")
-                    
-                    # Create a buffer for the filename
-                    filename_buffer = create_string_buffer(full_path.encode('utf-8'))
-                    
-                    # Call the DLL function
-                    result = student_dll.lire_fichier_etudiants(filename_buffer)
-                    
-                    if result.success:
-                        # Store the new list pointer
-                        self.student_list = result.liste
-                        
-                        # Store the current file path (Python-managed)
-                        self.current_file = create_string_buffer(full_path.encode('utf-8'))
-                        
-                        # Update UI
-                        self.refresh_student_list()
-                        print(f"Successfully loaded file: {full_path}")
-                        
-                        # Free the success message if it exists
-                        if result.message:
-                            safe_free(result.message)
-                        return
-                    else:
-                        # Handle error message
-                        if result.message:
-                            error_msg = self.safe_decode(result.message)
-                            print(f"Failed to load {filename}: {error_msg}")
-                            safe_free(result.message)
-                except Exception as e:
-                    print(f"Error loading {filename}: {str(e)}")
-                    continue
-            
-            # If we get here, no files could be loaded
-            messagebox.showerror("Erreur", "Impossible de charger les fichiers du répertoire")
+            paths = [os.path.join(current_dir, filename) for filename in sorted(txt_files)]
+            self.run_job("Chargement en cours...", lambda: load_partitions(paths),
+                         self.on_file_loaded, cancellable=True)
             
         except Exception as e:
-            messagebox.showerror("Error", f"Échec du chargement des fichiers : {str(e)}")
+            messagebox.showerror("Error", f"Échec du chargement des fichiers : {str(e)}")
             self.cleanup()
     
+    def on_file_loaded(self, loaded):
+        """Tk side of auto_load_file: every readable file is one class of the list"""
+        result, excluded = loaded
+        if not result.success:
+            if self.cancel_requested:
+                self.student_status.config(text="Chargement annulé")
+            else:
+                messagebox.showerror("Erreur", "Impossible de charger les fichiers du répertoire"
+                                     + "".join(f"\n{os.path.basename(path)} : {reason}"
+                                               for path, reason in excluded.items()))
+            safe_free(result.message)
+            self.refresh_student_list()
+            return
+        
+        # Store the new list pointer
+        self.student_list = result.liste
+        self.student_status.config(text=self.safe_decode(result.message))
+        safe_free(result.message)
+        
+        # Additions go to the first class until another one is picked
+        self.class_paths = student_bindings.partition_names()
+        self.class_combo.config(values=[os.path.basename(path) for path in self.class_paths])
+        self.class_combo.current(0)
+        self.on_class_selected()
+        
+        # A roster saved while sorted comes back with its sort still active
+        self.sync_sort_state()
+        
+        # Update UI; the waiting queue saved next to the roster was reloaded with it
+        self.refresh_student_list()
+        self.refresh_queue()
+        self.report_excluded_files(excluded)
+        self.report_load_errors()
+        
+        self.watcher = FileWatcher(self.class_paths, self.file_changes.put).start()
+    
+    def report_excluded_files(self, excluded):
+        """List the class files that were left out of the loaded list"""
+        if not excluded:
+            return
+        lines = [f"{os.path.basename(path)} : {reason}" for path, reason in excluded.items()]
+        messagebox.showwarning("Fichiers écartés",
+                               f"{len(excluded)} fichier(s) non chargé(s) :\n\n" + "\n".join(lines))
+    
+    def report_load_errors(self):
+        """List the lines of the loaded files that were left out"""
+        total, errors = load_errors(LOAD_ERRORS_SHOWN)
+        if not total:
+            return
+        lines = [f"{os.path.basename(path)}, ligne {line} : {reason}" for path, line, reason, _ in errors]
+        if total > len(errors):
+            lines.append(f"... et {total - len(errors)} autre(s)")
+        messagebox.showwarning("Lignes ignorées",
+                               f"{total} ligne(s) ignorée(s) au chargement :\n\n" + "\n".join(lines))
+    
+    def check_file_changes(self):
+        """Apply, between two jobs, the edits other programs made to the loaded files"""
+        while True:
+            try:
+                self.changed_files.add(self.file_changes.get_nowait())
+            except queue.Empty:
+                break
+        
+        if self.changed_files and self.job is None and self.student_list is not None:
+            paths = sorted(self.changed_files)
+            self.changed_files.clear()
+            student_list = self.student_list
+            
+            def work():
+                return [resync_file(byref(student_list), path.encode('utf-8')) for path in paths]
+            
+            self.run_job("Synchronisation avec le disque...", work, self.on_files_resynced)
+        self.root.after(WATCH_POLL_MS, self.check_file_changes)
+    
+    def on_files_resynced(self, outcomes):
+        """Tk side of check_file_changes"""
+        added = removed = changed = 0
+        failures = []
+        for result, (file_added, file_removed, file_changed) in outcomes:
+            if not result.success:
+                failures.append(self.safe_decode(result.message) or "Erreur de synchronisation")
+            safe_free(result.message)
+            added += file_added
+            removed += file_removed
+            changed += file_changed
+        if not (added or removed or changed or failures):
+            return
+        
+        if failures:
+            self.student_status.config(
+                text="Synchronisation avec le disque impossible : " + " ; ".join(failures),
+                foreground="red")
+        else:
+            self.student_status.config(
+                text=f"Fichier modifié sur le disque : {added} ajoutés, {removed} retirés, {changed} modifiés",
+                foreground="green")
+        self.sync_sort_state()
+        self.refresh_student_list()
+    
+    def on_class_selected(self, event=None):
+        """Point current_file at the class that receives additions and enrollments"""
+        index = self.class_combo.current()
+        if 0 <= index < len(self.class_paths):
+            # Python-managed buffer, kept alive as long as it is current
+            self.current_file = create_string_buffer(self.class_paths[index].encode('utf-8'))
+    
+    def on_close(self):
+        """Fold the change journal into the roster file before exiting"""
+        if self.refresh_after is not None:
+            self.root.after_cancel(self.refresh_after)
+            self.refresh_after = None
+        if self.job is not None:
+            self.cancel_job()
+        self.executor.shutdown(wait=True)
+        if self.current_file and student_dll.entrees_journal() > 0:
+            result = student_dll.compacter_partitions(self.student_list)
+            if not result.success and result.message:
+                print(f"Failed to compact journal: {self.safe_decode(result.message)}")
+        self.cleanup()
+        self.root.destroy()
+    
     def cleanup(self):
         """Clean up allocated resources"""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        self.changed_files.clear()
         if self.student_list:
             try:
                 student_dll.liberer_liste(self.student_list)
@@ -389,21 +1039,47 @@ class StudentManagementApp:
         
         # No need to free current_file - it's Python-managed
         self.current_file = None
+        self.class_paths = []
+        self.class_combo.config(values=[])
+        self.class_combo.set("")
         self.current_sort = None
         self.update_sort_buttons()
     
+    def sync_sort_state(self):
+        """Read the active sort back from the library.
+        
+        Additions, imports, enrollments and undos keep the list in this order,
+        so current_sort only changes on load, sort or cleanup.
+        """
+        sort = active_sort()
+        if sort is None:
+            self.current_sort = None
+        else:
+            key_names = {value: name for name, value in SORT_KEYS.items()}
+            key, order, tiebreak = sort
+            self.current_sort = (key_names[key], order, key_names.get(tiebreak, NO_TIEBREAK))
+        self.update_sort_buttons()
+    
     def update_sort_buttons(self):
         """Update the appearance of sort buttons based on current sort state"""
         self.sort_asc_button.config(style="TButton")
         self.sort_desc_button.config(style="TButton")
         self.sort_status.config(text="Non trié")
         
-        if self.current_sort == 1:
+        if self.current_sort is None:
+            return
+        
+        key_name, order, tiebreak_name = self.current_sort
+        status = f"Trié par {key_name.lower()}"
+        if order:
             self.sort_asc_button.config(style="ActiveSort.TButton")
-            self.sort_status.config(text="Trié par moyenne (croissant)")
-        elif self.current_sort == 0:
+            status += " (croissant)"
+        else:
             self.sort_desc_button.config(style="ActiveSort.TButton")
-            self.sort_status.config(text="Trié par moyenne (décroissant)")
+            status += " (décroissant)"
+        if tiebreak_name != NO_TIEBREAK:
+            status += f", puis {tiebreak_name.lower()}"
+        self.sort_status.config(text=status)
     
     def add_student(self):
         """Add a new student to the list"""
@@ -442,8 +1118,6 @@ class StudentManagementApp:
             # Handle the result
             if result.success:
                 self.student_status.config(text="Étudiant ajouté avec succès")
-                self.current_sort = None  # Adding a student invalidates the sort
-                self.update_sort_buttons()
                 self.refresh_student_list()
                 # Clear form
                 self.first_name_entry.delete(0, tk.END)
@@ -462,6 +1136,46 @@ class StudentManagementApp:
         except Exception as e:
             messagebox.showerror("Error", f"Unexpected error: {str(e)}")
     
+    def import_csv(self):
+        """Import students from a CSV file in one batch"""
+        if not self.current_file:
+            messagebox.showerror("Erreur", "Veuillez charger un fichier d'abord")
+            return
+        
+        path = filedialog.askopenfilename(
+            title="Importer des étudiants",
+            filetypes=[("Fichiers CSV", "*.csv"), ("Tous les fichiers", "*.*")]
+        )
+        if not path:
+            return
+        
+        try:
+            numbered_rows = read_students_csv(path)
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            messagebox.showerror("Error", f"Lecture du fichier impossible : {str(e)}")
+            return
+        
+        line_numbers = [line_number for line_number, _ in numbered_rows]
+        success, message, rejected = import_students(
+            byref(self.student_list),
+            self.current_file,
+            [row for _, row in numbered_rows]
+        )
+        
+        if not success:
+            messagebox.showerror("Error", message)
+            return
+        
+        self.student_status.config(text=message)
+        self.refresh_student_list()
+        
+        if rejected:
+            details = "\n".join(f"Ligne {line_numbers[position]} : {reason}"
+                                for position, reason in rejected[:20])
+            if len(rejected) > 20:
+                details += f"\n... et {len(rejected) - 20} autres"
+            messagebox.showwarning("Import", f"{message}\n\n{details}")
+    
     def delete_student(self):
         """Delete a student from the list"""
         if not self.current_file:
@@ -501,13 +1215,12 @@ class StudentManagementApp:
             result = student_dll.chercher_etudiant(self.student_list, cne)
             
             if result.success:
-                student_str = student_dll.afficher_etudiant(result.etudiant)
-                if student_str:
-                    try:
-                        decoded_text = self.safe_decode(student_str)
-                        messagebox.showinfo("Student Found", decoded_text)
-                    finally:
-                        safe_free(student_str)
+                student = StudentRecord.from_struct(result.etudiant.contents)
+                description = student.describe()
+                if len(self.class_paths) > 1:
+                    partition = student_dll.partition_etudiant(self.student_list, cne)
+                    description += f"\nClasse: {os.path.basename(self.class_paths[partition])}"
+                messagebox.showinfo("Student Found", description)
             else:
                 if result.message:
                     error_msg = self.safe_decode(result.message)
@@ -517,29 +1230,96 @@ class StudentManagementApp:
         except ValueError:
             messagebox.showerror("Error", "Veuillez saisir un CNE valide")
     
+    def schedule_name_search(self):
+        """Run the name search shortly after the last keystroke"""
+        if self.name_search_after is not None:
+            self.root.after_cancel(self.name_search_after)
+        self.name_search_after = self.root.after(150, self.run_name_search)
+    
+    def run_name_search(self):
+        """Show the students matching the text typed in the name search box"""
+        self.name_search_after = None
+        query = self.name_search_var.get()
+        self.name_results.delete(*self.name_results.get_children())
+        
+        if self.job is not None:
+            # The worker owns the list; search again once it is done
+            self.name_search_status.config(text="Opération en cours...")
+            return
+        if not self.student_list or not query.strip():
+            self.name_search_status.config(text="")
+            return
+        
+        students = search_by_name(self.student_list, query)
+        for student in students:
+            self.name_results.insert("", tk.END, values=(
+                student.nom, student.prenom, student.cne,
+                *(f"{note:.2f}" for note in student.notes), f"{student.moyenne:.2f}"))
+        self.name_search_status.config(text=f"{len(students)} résultat(s)" if students else "Aucun résultat")
+    
+    def fill_form_from_result(self):
+        """Copy the double-clicked search result into the student form"""
+        selected = self.name_results.selection()
+        if not selected:
+            return
+        nom, prenom, cne, *notes = self.name_results.item(selected[0], "values")
+        # Same field mapping as add_student, which sends the first field as nom
+        self.first_name_entry.delete(0, tk.END)
+        self.first_name_entry.insert(0, nom)
+        self.last_name_entry.delete(0, tk.END)
+        self.last_name_entry.insert(0, prenom)
+        self.cne_entry.delete(0, tk.END)
+        self.cne_entry.insert(0, cne)
+        for entry, note in zip(self.note_entries, notes):
+            entry.delete(0, tk.END)
+            entry.insert(0, note)
+    
     def undo_delete(self):
-        """Undo the last deletion"""
+        """Undo the last addition, deletion, sort, enrollment or import"""
+        self.run_history_step(student_dll.annuler_action, "Annulation...")
+    
+    def redo_action(self):
+        """Redo the last undone action"""
+        self.run_history_step(student_dll.retablir_action, "Rétablissement...")
+    
+    def run_history_step(self, function, status_text):
+        """Apply an undo or redo on the worker: undoing a sort rewrites the file"""
         if not self.current_file:
             messagebox.showerror("Error", "Veuillez d'abord charger un fichier")
             return
-            
-        result = student_dll.annuler_derniere_suppression(
-            byref(self.student_list),
-            self.current_file
-        )
         
-        if result.success:
-            self.student_status.config(text="Dernière suppression annulée")
+        student_list = self.student_list
+        current_file = self.current_file
+        
+        def work():
+            return function(byref(student_list), current_file)
+        
+        def on_done(result):
+            message = self.safe_decode(result.message)
+            safe_free(result.message)
+            self.sync_sort_state()
             self.refresh_student_list()
-        else:
-            if result.message:
-                error_msg = self.safe_decode(result.message)
-                messagebox.showerror("Error", error_msg)
-                safe_free(result.message)
+            self.refresh_queue()
+            if result.success:
+                self.student_status.config(text=message, foreground="green")
+            else:
+                messagebox.showerror("Error", message or "Opération impossible")
+        
+        self.run_job(status_text, work, on_done)
+    
+    def update_history_buttons(self):
+        """Show how many steps can be undone and redone"""
+        undoable, redoable, _ = history_state()
+        self.undo_button.config(text=f"Annuler ({undoable})" if undoable else "Annuler")
+        self.redo_button.config(text=f"Rétablir ({redoable})" if redoable else "Rétablir")
     
     def sort_students(self, order, display=False):
-        """Sort students by average"""
-        if self.current_sort == order:
+        """Sort students by the selected key"""
+        key_name = self.sort_key_var.get()
+        tiebreak_name = self.sort_tiebreak_var.get()
+        requested_sort = (key_name, order, tiebreak_name)
+        
+        if self.current_sort == requested_sort:
             if display:
                 self.sort_tab_status.config(text="Les étudiants sont déjà triés dans cet ordre")
             return
@@ -555,78 +1335,105 @@ class StudentManagementApp:
             self.sort_tab_status.config(text=status_text)
         else:
             self.student_status.config(text=status_text)
-            
-        self.root.update() 
         
-        try:
-            result = student_dll.trier_etudiants_moyenne(
-                byref(self.student_list),
-                self.current_file,
-                order
+        student_list = self.student_list
+        current_file = self.current_file
+        
+        def work():
+            return student_dll.trier_etudiants(
+                byref(student_list),
+                current_file,
+                SORT_KEYS[key_name],
+                order,
+                SORT_KEYS.get(tiebreak_name, -1)
             )
-            
+        
+        def on_done(result):
+            status_label = self.sort_tab_status if display else self.student_status
             if result.success:
-                self.current_sort = order
-                self.update_sort_buttons()
-                
-                success_text = f"Tri {sort_direction} terminé avec succès"
-                if display:
-                    self.sort_tab_status.config(text=success_text, foreground="green")
-                    self.display_sorted_students()
-                else:
-                    self.student_status.config(text=success_text, foreground="green")
-                    self.refresh_student_list()
+                self.sync_sort_state()
+                status_label.config(text=f"Tri {sort_direction} terminé avec succès", foreground="green")
             else:
-                if result.message:
-                    error_msg = self.safe_decode(result.message)
-                    if display:
-                        self.sort_tab_status.config(text=error_msg, foreground="red")
+                error_msg = self.safe_decode(result.message) or "Erreur de tri"
+                status_label.config(text=error_msg, foreground="red")
+                if not self.cancel_requested:
                     messagebox.showerror("Error", error_msg)
-                    safe_free(result.message)
-        except Exception as e:
-            error_text = f"Erreur de tri: {str(e)}"
-            if display:
-                self.sort_tab_status.config(text=error_text, foreground="red")
-            messagebox.showerror("Error", error_text)
-        finally:
-            # Ensure any intermediate results are cleaned up
-            if 'result' in locals() and hasattr(result, 'message'):
-                safe_free(result.message)
+                # A cancelled sort puts the list back in its previous order
+                self.sync_sort_state()
+            self.refresh_student_list()
+        
+        self.run_job(status_text, work, on_done, cancellable=True)
     
-    def display_sorted_students(self):
-        """Display sorted students in the sorting tab"""
+    def show_top_students(self, weakest):
+        """Fill the ranking table with the N best or weakest students by the selected key"""
         if not self.student_list:
-            self.sorted_display.config(state=tk.NORMAL)
-            self.sorted_display.delete(1.0, tk.END)
-            self.sorted_display.insert(1.0, "Aucune donnée étudiante chargée")
-            self.sorted_display.config(state=tk.DISABLED)
+            messagebox.showerror("Error", "Veuillez d'abord charger un fichier")
             return
-            
-        list_str = student_dll.afficher_liste_etudiants(self.student_list)
-        if list_str:
-            try:
-                decoded_text = self.safe_decode(list_str)
-                
-                # Process the text to show only names and averages
-                lines = decoded_text.split('\n')
-                filtered_lines = []
-                for line in lines:
-                    if "Nom:" in line or "Moyenne:" in line:
-                        filtered_lines.append(line)
-                
-                filtered_text = '\n'.join(filtered_lines)
-                
-                self.sorted_display.config(state=tk.NORMAL)
-                self.sorted_display.delete(1.0, tk.END)
-                self.sorted_display.insert(1.0, filtered_text)
-                self.sorted_display.config(state=tk.DISABLED)
-            finally:
-                safe_free(list_str)
+        try:
+            count = int(self.ranking_count_var.get())
+        except ValueError:
+            messagebox.showerror("Error", "N doit être un nombre entier")
+            return
+        
+        key_name = self.sort_key_var.get()
+        students = top_students(self.student_list, SORT_KEYS[key_name], count, weakest)
+        
+        self.ranking_tree.delete(*self.ranking_tree.get_children())
+        for position, student in enumerate(students, start=1):
+            self.ranking_tree.insert("", tk.END, values=(
+                position, student.nom, student.prenom, student.cne,
+                *(f"{note:.2f}" for note in student.notes), f"{student.moyenne:.2f}"))
+        
+        which = "plus faibles" if weakest else "meilleurs"
+        self.ranking_status.config(text=f"{len(students)} {which} par {key_name.lower()}")
+    
+    def show_student_rank_by_key(self):
+        """Show one student's rank by the selected key"""
+        if not self.student_list:
+            messagebox.showerror("Error", "Veuillez d'abord charger un fichier")
+            return
+        try:
+            cne = int(self.ranking_cne_entry.get())
+        except ValueError:
+            messagebox.showerror("Error", "Veuillez saisir un CNE valide")
+            return
+        
+        key_name = self.sort_key_var.get()
+        rank = student_rank(self.student_list, cne, SORT_KEYS[key_name])
+        if rank is None:
+            self.ranking_status.config(text="Étudiant non trouvé")
         else:
-            self.sorted_display.config(state=tk.NORMAL)
-            self.sorted_display.delete(1.0, tk.END)
-            self.sorted_display.insert(1.0, "Aucun étudiant dans la liste")
-            self.sorted_display.config(state=tk.DISABLED)
+            self.ranking_status.config(
+                text=f"Rang par {key_name.lower()} : {rank} / {self.count_students()}")
+    
+    def display_sorted_students(self):
+        """Display sorted students in the sorting tab"""
+        self.sorted_view.refresh()
+    
+    def count_students(self):
+        """Number of students in the loaded list"""
+        if not self.student_list:
+            return 0
+        return student_dll.nombre_etudiants(self.student_list)
+    
+    @staticmethod
+    def student_row(student):
+        """Treeview values of one StudentRecord"""
+        return (student.nom, student.prenom, student.cne,
+                *(f"{note:.2f}" for note in student.notes), f"{student.moyenne:.2f}")
+    
+    def fetch_student_rows(self, offset, limit):
+        """Fetch one page of students as Treeview rows"""
+        return [self.student_row(student) for student in page_students(self.student_list, offset, limit)]
+    
+    def count_queue(self):
+        """Number of students waiting; the queue is short, so it is copied whole"""
+        self.queue_snapshot = queue_students()
+        return len(self.queue_snapshot)
+    
+    def fetch_queue_rows(self, offset, limit):
+        """One page of the queue copied by the last count_queue"""
+        return [self.student_row(student) for student in self.queue_snapshot[offset:offset + limit]]
     
     def add_to_queue(self):
         """Add a student to the waiting queue"""
@@ -689,71 +1496,90 @@ class StudentManagementApp:
                 messagebox.showerror("Error", error_msg)
                 safe_free(result.message)
     
-    def enroll_from_queue(self):
-        """Enroll a student from the queue to the main list"""
+    def enroll_from_queue(self, count=1):
+        """Enroll the first `count` students of the queue (0 for all of them).
+        
+        Runs on the worker: a whole queue can mean thousands of insertions and
+        a journal compaction that rewrites the file.
+        """
         if not self.current_file:
             messagebox.showerror("Error", "Veuillez d'abord charger un fichier")
             return
-            
-        result = student_dll.inscrire_etudiant_file(
-            byref(self.student_list),
-            self.current_file
-        )
         
-        if result.success:
-            self.student_status.config(text="Étudiant inscrit depuis la file d'attente")
-            self.current_sort = None  # Adding a student invalidates the sort
-            self.update_sort_buttons()
-            self.refresh_student_list()
-            self.refresh_queue()
-        else:
-            if result.message:
-                error_msg = self.safe_decode(result.message)
-                messagebox.showerror("Error", error_msg)
-                safe_free(result.message)
+        student_list = self.student_list
+        current_file = self.current_file
+        
+        def work():
+            return student_dll.inscrire_file_attente(byref(student_list), current_file, count)
+        
+        def on_done(result):
+            message = self.safe_decode(result.message)
+            safe_free(result.message)
+            if result.success:
+                self.student_status.config(text=message)
+                self.refresh_student_list()
+                self.refresh_queue()
+            elif message:
+                messagebox.showerror("Error", message)
+        
+        self.run_job("Inscription en cours...", work, on_done)
+    
+    def enroll_batch(self):
+        """Enroll the number of students chosen next to the button"""
+        try:
+            count = int(self.enroll_count_var.get())
+        except ValueError:
+            count = 0
+        if count <= 0:
+            messagebox.showerror("Error", "Le nombre doit être un entier positif")
+            return
+        self.enroll_from_queue(count)
+    
+    def schedule_refresh(self, *views):
+        """Redraw `views` once the pending events are handled.
+        
+        However many changes ask for it in between, each view is redrawn once,
+        and only the rows that changed are touched.
+        """
+        self.pending_refresh.update(views)
+        if self.refresh_after is None:
+            self.refresh_after = self.root.after_idle(self.flush_refresh)
+    
+    def flush_refresh(self):
+        """Redraw the views scheduled since the last idle cycle"""
+        self.refresh_after = None
+        views, self.pending_refresh = self.pending_refresh, set()
+        if "students" in views:
+            self.redraw_student_list()
+        if "queue" in views:
+            self.redraw_queue()
     
     def refresh_queue(self):
-        """Refresh the queue display"""
-        queue_str = student_dll.afficher_file_attente()
-        if queue_str:
-            try:
-                decoded_text = self.safe_decode(queue_str)
-                self.queue_text.config(state=tk.NORMAL)
-                self.queue_text.delete(1.0, tk.END)
-                self.queue_text.insert(1.0, decoded_text)
-                self.queue_text.config(state=tk.DISABLED)
-            finally:
-                safe_free(queue_str)
-        else:
-            self.queue_text.config(state=tk.NORMAL)
-            self.queue_text.delete(1.0, tk.END)
-            self.queue_text.insert(1.0, "La file d'attente est vide")
-            self.queue_text.config(state=tk.DISABLED)
+        """Schedule a redraw of the queue display"""
+        self.schedule_refresh("queue")
     
     def refresh_student_list(self):
-        """Refresh the student list display"""
-        if not self.student_list:
-            self.student_text.config(state=tk.NORMAL)
-            self.student_text.delete(1.0, tk.END)
-            self.student_text.insert(1.0, "Aucune donnée étudiante chargée")
-            self.student_text.config(state=tk.DISABLED)
+        """Schedule a redraw of the student list displays"""
+        self.schedule_refresh("students")
+    
+    def redraw_queue(self):
+        self.queue_view.refresh()
+        if self.queue_view.suspended:
             return
-            
-        list_str = student_dll.afficher_liste_etudiants(self.student_list)
-        if list_str:
-            try:
-                decoded_text = self.safe_decode(list_str)
-                self.student_text.config(state=tk.NORMAL)
-                self.student_text.delete(1.0, tk.END)
-                self.student_text.insert(1.0, decoded_text)
-                self.student_text.config(state=tk.DISABLED)
-            finally:
-                safe_free(list_str)
+        count = self.queue_view.total
+        self.queue_count_label.config(
+            text=f"{count} étudiant(s) en attente" if count else "La file d'attente est vide")
+    
+    def redraw_student_list(self):
+        self.student_view.refresh()
+        self.sorted_view.refresh()
+        if self.name_search_var.get().strip():
+            self.run_name_search()
+        self.update_history_buttons()
+        if not self.student_list:
+            self.student_count_label.config(text="Aucune donnée étudiante chargée")
         else:
-            self.student_text.config(state=tk.NORMAL)
-            self.student_text.delete(1.0, tk.END)
-            self.student_text.insert(1.0, "Aucun étudiant dans la liste")
-            self.student_text.config(state=tk.DISABLED)
+            self.student_count_label.config(text=f"{self.student_view.total} étudiants")
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,157 @@
+"""Load-test a running student_server.py from many concurrent local clients.
+
+Each client keeps one connection open and sends a mix of searches by CNE,
+page reads and, for --write-ratio of the requests, an addition immediately
+followed by the deletion of the same student, so the roster ends as it
+started. Latencies are summarized per kind of request:
+
+    python server_load_test.py --port 8765 --clients 32 --requests 500
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+from student_server import DEFAULT_HOST, DEFAULT_PORT
+
+# New students get CNEs from here up, above any real one
+FIRST_TEST_CNE = 900_000_000
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection to the service"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def open(cls, host, port):
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, method, path, body=None):
+        """(status, decoded JSON answer)"""
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode("latin-1")
+            + data
+        )
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+def summarize(samples):
+    samples.sort()
+    count = len(samples)
+    return {
+        "calls": count,
+        "mean_ms": sum(samples) / count * 1e3,
+        "p50_ms": samples[count // 2] * 1e3,
+        "p95_ms": samples[min(count - 1, int(count * 0.95))] * 1e3,
+        "p99_ms": samples[min(count - 1, int(count * 0.99))] * 1e3,
+        "max_ms": samples[-1] * 1e3,
+    }
+
+
+async def run_client(number, args, cnes, timings, errors):
+    rng = random.Random(args.seed + number)
+    connection = await Connection.open(args.host, args.port)
+
+    async def timed(kind, method, path, body=None, expected=(200,)):
+        start = time.perf_counter()
+        status, answer = await connection.request(method, path, body)
+        timings.setdefault(kind, []).append(time.perf_counter() - start)
+        if status not in expected:
+            errors.append(f"{method} {path}: {status} {answer.get('message')}")
+
+    try:
+        for i in range(args.requests):
+            draw = rng.random()
+            if draw < args.write_ratio:
+                cne = FIRST_TEST_CNE + number * args.requests + i
+                await timed("add", "POST", "/students",
+                            {"nom": "Charge", "prenom": f"Client{number}", "cne": cne,
+                             "notes": [round(rng.uniform(0, 20), 2) for _ in range(4)]}, (201,))
+                await timed("delete", "DELETE", f"/students/{cne}")
+            elif draw < args.write_ratio + (1 - args.write_ratio) * 0.8:
+                await timed("search", "GET", f"/students/{rng.choice(cnes)}")
+            else:
+                await timed("page", "GET", f"/students?offset={rng.randrange(len(cnes))}&limit=50")
+    finally:
+        await connection.close()
+
+
+async def load_test(args):
+    connection = await Connection.open(args.host, args.port)
+    status, answer = await connection.request("GET", f"/students?limit={args.sample}")
+    await connection.close()
+    cnes = [student["cne"] for student in answer.get("students", [])]
+    if status != 200 or not cnes:
+        raise SystemExit("Le service n'a renvoyé aucun étudiant à chercher")
+
+    timings, errors = {}, []
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(number, args, cnes, timings, errors)
+                           for number in range(args.clients)))
+    elapsed = time.perf_counter() - start
+
+    total = sum(len(samples) for samples in timings.values())
+    return {
+        "clients": args.clients,
+        "requests": total,
+        "elapsed_s": elapsed,
+        "requests_per_s": total / elapsed,
+        "errors": len(errors),
+        "first_errors": errors[:10],
+        "timings": {kind: summarize(samples) for kind, samples in sorted(timings.items())},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--clients", type=int, default=16, help="concurrent connections")
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    parser.add_argument("--write-ratio", type=float, default=0.1,
+                        help="share of requests that add then delete a student")
+    parser.add_argument("--sample", type=int, default=1_000, help="existing CNEs to search among")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="-", help="JSON report path ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(load_test(args))
+    for kind, stats in report["timings"].items():
+        print(f"  {kind:<8} {stats['calls']:>7} calls  p50 {stats['p50_ms']:8.2f} ms  "
+              f"p99 {stats['p99_ms']:8.2f} ms", file=sys.stderr)
+    print(f"{report['requests']} requests in {report['elapsed_s']:.2f} s "
+          f"({report['requests_per_s']:.0f}/s), {report['errors']} errors", file=sys.stderr)
+
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,892 @@
+"""ctypes bindings for student_management.dll.
+
+Importing this module loads the library and declares every export; it does
+not need tkinter or a display, so batch scripts and servers can use it.
+"""
+from ctypes import (CDLL, CFUNCTYPE, Structure, c_char, c_int, c_float, POINTER, 
+                    byref, c_void_p, cast, create_string_buffer, sizeof, c_char_p, c_size_t, c_long)
+import csv
+import os
+import locale
+import json
+import mmap
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+locale.setlocale(locale.LC_ALL, '')
+
+def safe_free(ptr):
+    if ptr and isinstance(ptr, (int, c_void_p, c_char_p)):
+        try:
+            free(cast(ptr, c_void_p))
+            if instrumentation:
+                instrumentation.record_free(True)
+        except Exception as e:
+            print(f"Error freeing pointer: {e}")
+    elif ptr and instrumentation:
+        # ctypes already copied the string into a bytes object; the C copy is not freed
+        instrumentation.record_free(False)
+
+libc = CDLL(None)
+free = libc.free
+free.argtypes = [c_void_p]
+free.restype = None
+
+# The library sits next to this module, whatever the working directory
+DLL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "student_management.dll")
+student_dll = CDLL(DLL_PATH)
+
+
+class Etudiant(Structure):
+    pass
+
+Etudiant._fields_ = [
+    ("nom", c_char * 50),
+    ("prenom", c_char * 50),
+    ("CNE", c_int),
+    ("notes", c_float * 4),
+    ("moyenne", c_float),
+    ("suivant", POINTER(Etudiant)),
+    ("precedent", POINTER(Etudiant)),
+    ("partition", c_int)
+]
+
+# Fixed-width binary roster: an EnteteBinaire followed by EnregistrementEtudiant records
+class EnregistrementEtudiant(Structure):
+    _fields_ = [
+        ("nom", c_char * 50),
+        ("prenom", c_char * 50),
+        ("CNE", c_int),
+        ("notes", c_float * 4),
+        ("moyenne", c_float)
+    ]
+
+class EnteteBinaire(Structure):
+    _fields_ = [
+        ("magie", c_char * 4),
+        ("version", c_int),
+        ("nombre", c_int),
+        ("taille_enregistrement", c_int)
+    ]
+
+BINARY_MAGIC = b"ETUB"
+BINARY_VERSION = 1
+
+def map_binary_roster(path):
+    """Memory-map a binary roster and view its records in place.
+
+    Returns (mapping, header, records) where records is an
+    EnregistrementEtudiant array backed by the mapping: nothing is parsed
+    or copied. Drop header and records before closing the mapping.
+    """
+    with open(path, "rb") as f:
+        # ACCESS_COPY gives a writable private mapping, which from_buffer requires
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    header = EnteteBinaire.from_buffer(mapping)
+    if (header.magie != BINARY_MAGIC or header.version != BINARY_VERSION
+            or header.taille_enregistrement != sizeof(EnregistrementEtudiant)):
+        del header
+        mapping.close()
+        raise ValueError(f"{path} is not a binary roster")
+
+    expected = sizeof(EnteteBinaire) + header.nombre * sizeof(EnregistrementEtudiant)
+    if len(mapping) < expected:
+        del header
+        mapping.close()
+        raise ValueError(f"{path} is truncated")
+
+    records = (EnregistrementEtudiant * header.nombre).from_buffer(mapping, sizeof(EnteteBinaire))
+    return mapping, header, records
+
+# Rejection reasons reported by importer_etudiants (IMPORT_* in Student_file.c)
+IMPORT_REJECT_REASONS = {
+    1: "CNE invalide",
+    2: "Notes invalides",
+    3: "Nom ou prénom manquant",
+    4: "CNE déjà inscrit",
+    5: "CNE en double dans le fichier importé",
+    6: "Erreur d'allocation mémoire",
+}
+
+# Why assembler_partitions left a file out
+PARTITION_EXCLUDED_REASONS = {
+    1: "fichier illisible",
+    2: "CNE déjà présent dans un autre fichier",
+}
+
+def load_partitions(paths, max_workers=None):
+    """Load several roster files as partitions of one list.
+
+    Each file is parsed by lire_partition on its own pool thread (ctypes
+    releases the GIL, so the parsing runs in parallel), then
+    assembler_partitions replays the journals and joins them in `paths`
+    order. Progress over all the files is read with lire_progression and
+    demander_annulation stops the whole load. Returns (result, excluded)
+    where excluded maps a path to the reason it was left out.
+    """
+    encoded = [path.encode('utf-8') for path in paths]
+    names = (c_char_p * len(paths))(*encoded)
+    progress = student_dll.commencer_lecture(names, len(paths))
+    workers = max_workers or min(len(paths), os.cpu_count() or 1) or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        loaded = list(pool.map(lambda name: student_dll.lire_partition(name, progress), encoded))
+
+    handles = (c_void_p * len(paths))(*loaded)
+    excluded = (c_int * len(paths))()
+    result = student_dll.assembler_partitions(handles, names, len(paths), excluded)
+    return result, {path: PARTITION_EXCLUDED_REASONS[code]
+                    for path, code in zip(paths, excluded) if code}
+
+# Why a line of a text roster was skipped (LECTURE_* in Student_file.c)
+LOAD_ERROR_REASONS = {
+    1: "Format invalide (nom prénom CNE et 4 notes attendus)",
+    2: "CNE invalide",
+    3: "Notes invalides",
+    4: "CNE en double dans le fichier",
+}
+
+def load_errors(limit=100):
+    """Lines skipped by the last text load, as (total, [(path, line, reason, text)]).
+
+    Loading never stops on a bad line: it is left out and reported here, at
+    most `limit` of them, by file then line number.
+    """
+    errors = (ErreurLecture * limit)()
+    total = student_dll.erreurs_lecture(errors, limit)
+    names = partition_names()
+    return total, [
+        (names[error.partition] if error.partition < len(names) else "", error.ligne,
+         LOAD_ERROR_REASONS.get(error.code, "Erreur inconnue"), decode_c_string(error.extrait))
+        for error in errors[:min(total, limit)]
+    ]
+
+def partition_names():
+    """Files of the loaded list, in partition order"""
+    return [decode_c_string(student_dll.nom_partition(i)) for i in range(student_dll.nombre_partitions())]
+
+def resync_file(head_ref, filename):
+    """Apply the changes another program made to one loaded file.
+
+    Returns (result, (added, removed, changed)); an unchanged file is
+    detected from its size and modification time without being read.
+    """
+    counts = (c_int * 3)()
+    result = student_dll.resynchroniser_fichier(head_ref, filename, counts)
+    return result, tuple(counts)
+
+def import_students(head_ref, filename, rows):
+    """Insert (nom, prenom, cne, notes) rows with a single importer_etudiants call.
+
+    Rows whose CNE or notes are not numbers are rejected before reaching
+    the DLL. Returns (success, message, rejected) where rejected is a list
+    of (row_position, reason) pairs.
+    """
+    rejected = []
+    positions = []
+    records = []
+    for position, (nom, prenom, cne, notes) in enumerate(rows):
+        try:
+            cne = int(cne)
+        except (TypeError, ValueError):
+            rejected.append((position, IMPORT_REJECT_REASONS[1]))
+            continue
+        try:
+            notes = [float(note) for note in notes]
+            if len(notes) != 4:
+                raise ValueError(notes)
+        except (TypeError, ValueError):
+            rejected.append((position, IMPORT_REJECT_REASONS[2]))
+            continue
+        if not -2**31 <= cne < 2**31:
+            rejected.append((position, IMPORT_REJECT_REASONS[1]))
+            continue
+
+        record = EnregistrementEtudiant()
+        record.nom = nom.encode('utf-8')[:49]
+        record.prenom = prenom.encode('utf-8')[:49]
+        record.CNE = cne
+        record.notes[:] = notes
+        records.append(record)
+        positions.append(position)
+
+    array = (EnregistrementEtudiant * len(records))(*records)
+    codes = (c_int * len(records))()
+    result = student_dll.importer_etudiants(head_ref, filename, array, len(records), codes)
+
+    for position, code in zip(positions, codes):
+        if code:
+            rejected.append((position, IMPORT_REJECT_REASONS.get(code, "Rejeté")))
+    rejected.sort()
+    message = result.message.decode('utf-8', errors='replace') if result.message else ""
+    if result.success:
+        # The DLL only counts the rows it was given
+        message = f"{len(rows) - len(rejected)} étudiants importés, {len(rejected)} rejetés"
+    return bool(result.success), message, rejected
+
+def read_students_csv(path):
+    """Read nom, prenom, cne, note1..note4 rows from a CSV file.
+
+    The delimiter (comma or semicolon) is detected, and a header line is
+    skipped when its CNE column is not a number. Returns (line_number, row)
+    pairs where row is (nom, prenom, cne, notes).
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        rows = []
+        for line_number, fields in enumerate(csv.reader(f, dialect), start=1):
+            fields = [field.strip() for field in fields]
+            if not any(fields):
+                continue
+            if line_number == 1 and len(fields) > 2 and not fields[2].lstrip('-').isdigit():
+                continue
+            fields += [""] * (7 - len(fields))
+            rows.append((line_number, (fields[0], fields[1], fields[2], fields[3:7])))
+    return rows
+
+# Sort keys understood by trier_etudiants (CLE_* in Student_file.c)
+SORT_KEYS = {
+    "Nom / Prénom": 0,
+    "CNE": 1,
+    "Moyenne": 2,
+    "Note 1": 3,
+    "Note 2": 4,
+    "Note 3": 5,
+    "Note 4": 6,
+}
+NO_TIEBREAK = "Aucun"
+
+# int (*RappelEtudiant)(const Etudiant *etudiant, int position, void *contexte)
+STUDENT_CALLBACK = CFUNCTYPE(c_int, POINTER(Etudiant), c_int, c_void_p)
+
+class OperationResult(Structure):
+    _fields_ = [
+        ("success", c_int),
+        ("message", c_char_p),
+        ("etudiant", POINTER(Etudiant)),
+        ("liste", POINTER(Etudiant))
+    ]
+
+# Memory held by the library (EmpreinteMemoire in Student_file.c)
+class EmpreinteMemoire(Structure):
+    _fields_ = [
+        ("etudiants", c_long),
+        ("en_attente", c_long),
+        ("noeuds_reserves", c_long),
+        ("blocs", c_long),
+        ("octets_noeuds", c_long),
+        ("octets_index", c_long),
+        ("octets_historique", c_long)
+    ]
+
+# Line skipped while reading a text roster (ErreurLecture in Student_file.c)
+class ErreurLecture(Structure):
+    _fields_ = [
+        ("ligne", c_long),
+        ("code", c_int),
+        ("partition", c_int),
+        ("extrait", c_char * 50)
+    ]
+
+ 
+def setup_dll_functions():
+    student_dll.lire_fichier_etudiants.argtypes = [c_char_p]
+    student_dll.lire_fichier_etudiants.restype = OperationResult
+
+    student_dll.erreurs_lecture.argtypes = [POINTER(ErreurLecture), c_long]
+    student_dll.erreurs_lecture.restype = c_long
+
+    student_dll.mettre_a_jour_fichier.argtypes = [POINTER(Etudiant), c_char_p]
+    student_dll.mettre_a_jour_fichier.restype = OperationResult
+
+    student_dll.compacter_journal.argtypes = [POINTER(Etudiant), c_char_p]
+    student_dll.compacter_journal.restype = OperationResult
+
+    student_dll.entrees_journal.argtypes = []
+    student_dll.entrees_journal.restype = c_int
+
+    student_dll.compacter_partitions.argtypes = [POINTER(Etudiant)]
+    student_dll.compacter_partitions.restype = OperationResult
+
+    student_dll.commencer_lecture.argtypes = [POINTER(c_char_p), c_int]
+    student_dll.commencer_lecture.restype = c_void_p
+    student_dll.lire_partition.argtypes = [c_char_p, c_void_p]
+    student_dll.lire_partition.restype = c_void_p
+
+    student_dll.liberer_partition.argtypes = [c_void_p]
+    student_dll.liberer_partition.restype = None
+
+    student_dll.assembler_partitions.argtypes = [POINTER(c_void_p), POINTER(c_char_p), c_int, POINTER(c_int)]
+    student_dll.assembler_partitions.restype = OperationResult
+
+    student_dll.nombre_partitions.argtypes = []
+    student_dll.nombre_partitions.restype = c_int
+
+    student_dll.nom_partition.argtypes = [c_int]
+    student_dll.nom_partition.restype = c_char_p
+
+    student_dll.partition_etudiant.argtypes = [POINTER(Etudiant), c_int]
+    student_dll.partition_etudiant.restype = c_int
+
+    student_dll.resynchroniser_fichier.argtypes = [POINTER(POINTER(Etudiant)), c_char_p, POINTER(c_int)]
+    student_dll.resynchroniser_fichier.restype = OperationResult
+
+    student_dll.lire_fichier_binaire.argtypes = [c_char_p]
+    student_dll.lire_fichier_binaire.restype = OperationResult
+
+    student_dll.ecrire_fichier_binaire.argtypes = [POINTER(Etudiant), c_char_p]
+    student_dll.ecrire_fichier_binaire.restype = OperationResult
+
+    student_dll.convertir_texte_vers_binaire.argtypes = [c_char_p, c_char_p]
+    student_dll.convertir_texte_vers_binaire.restype = OperationResult
+
+    student_dll.convertir_binaire_vers_texte.argtypes = [c_char_p, c_char_p]
+    student_dll.convertir_binaire_vers_texte.restype = OperationResult
+
+    student_dll.importer_etudiants.argtypes = [POINTER(POINTER(Etudiant)), c_char_p,
+                                               POINTER(EnregistrementEtudiant), c_int, POINTER(c_int)]
+    student_dll.importer_etudiants.restype = OperationResult
+
+    student_dll.nombre_etudiants.argtypes = [POINTER(Etudiant)]
+    student_dll.nombre_etudiants.restype = c_int
+
+    student_dll.extraire_page.argtypes = [POINTER(Etudiant), c_int, c_int, POINTER(EnregistrementEtudiant)]
+    student_dll.extraire_page.restype = c_int
+
+    student_dll.extraire_colonnes.argtypes = [POINTER(Etudiant), POINTER(c_int), POINTER(c_float),
+                                              POINTER(c_float), c_int]
+    student_dll.extraire_colonnes.restype = c_int
+
+    student_dll.rendre_liste_etudiants.argtypes = [POINTER(Etudiant), c_char_p, c_size_t]
+    student_dll.rendre_liste_etudiants.restype = c_size_t
+
+    student_dll.rendre_file_attente.argtypes = [c_char_p, c_size_t]
+    student_dll.rendre_file_attente.restype = c_size_t
+
+    student_dll.parcourir_liste.argtypes = [POINTER(Etudiant), STUDENT_CALLBACK, c_void_p]
+    student_dll.parcourir_liste.restype = c_int
+
+    student_dll.parcourir_file_attente.argtypes = [STUDENT_CALLBACK, c_void_p]
+    student_dll.parcourir_file_attente.restype = c_int
+
+    student_dll.demander_annulation.argtypes = []
+    student_dll.demander_annulation.restype = None
+
+    student_dll.effacer_annulation.argtypes = []
+    student_dll.effacer_annulation.restype = None
+
+    student_dll.lire_progression.argtypes = [POINTER(c_long), POINTER(c_long)]
+    student_dll.lire_progression.restype = None
+
+    student_dll.afficher_etudiant.argtypes = [POINTER(Etudiant)]
+    student_dll.afficher_etudiant.restype = c_char_p
+
+    student_dll.afficher_liste_etudiants.argtypes = [POINTER(Etudiant)]
+    student_dll.afficher_liste_etudiants.restype = c_char_p
+
+    student_dll.ajouter_etudiant.argtypes = [POINTER(POINTER(Etudiant)), c_char_p, c_char_p, c_char_p, c_int, POINTER(c_float)]
+    student_dll.ajouter_etudiant.restype = OperationResult
+
+    student_dll.supprimer_etudiant.argtypes = [POINTER(POINTER(Etudiant)), c_char_p, c_int]
+    student_dll.supprimer_etudiant.restype = OperationResult
+
+    student_dll.annuler_derniere_suppression.argtypes = [POINTER(POINTER(Etudiant)), c_char_p]
+    student_dll.annuler_derniere_suppression.restype = OperationResult
+
+    student_dll.annuler_action.argtypes = [POINTER(POINTER(Etudiant)), c_char_p]
+    student_dll.annuler_action.restype = OperationResult
+
+    student_dll.retablir_action.argtypes = [POINTER(POINTER(Etudiant)), c_char_p]
+    student_dll.retablir_action.restype = OperationResult
+
+    student_dll.configurer_historique.argtypes = [c_int, c_long]
+    student_dll.configurer_historique.restype = None
+
+    student_dll.etat_historique.argtypes = [POINTER(c_int), POINTER(c_int), POINTER(c_long)]
+    student_dll.etat_historique.restype = c_int
+
+    student_dll.chercher_etudiant.argtypes = [POINTER(Etudiant), c_int]
+    student_dll.chercher_etudiant.restype = OperationResult
+
+    student_dll.trier_etudiants_moyenne.argtypes = [POINTER(POINTER(Etudiant)), c_char_p, c_int]
+    student_dll.trier_etudiants_moyenne.restype = OperationResult
+
+    student_dll.trier_etudiants.argtypes = [POINTER(POINTER(Etudiant)), c_char_p, c_int, c_int, c_int]
+    student_dll.trier_etudiants.restype = OperationResult
+
+    student_dll.meilleurs_etudiants.argtypes = [POINTER(Etudiant), c_int, c_int, c_int,
+                                                POINTER(EnregistrementEtudiant)]
+    student_dll.meilleurs_etudiants.restype = c_int
+
+    student_dll.rang_etudiant.argtypes = [POINTER(Etudiant), c_int, c_int, c_int]
+    student_dll.rang_etudiant.restype = c_int
+
+    student_dll.chercher_par_nom.argtypes = [POINTER(Etudiant), c_char_p, c_int, c_int,
+                                             POINTER(EnregistrementEtudiant)]
+    student_dll.chercher_par_nom.restype = c_int
+
+    student_dll.tri_actif.argtypes = [POINTER(c_int), POINTER(c_int), POINTER(c_int)]
+    student_dll.tri_actif.restype = c_int
+
+    student_dll.ajouter_file_attente.argtypes = [c_char_p, c_char_p, c_int, POINTER(c_float)]
+    student_dll.ajouter_file_attente.restype = OperationResult
+
+    student_dll.retirer_file_attente.argtypes = []
+    student_dll.retirer_file_attente.restype = OperationResult
+
+    student_dll.afficher_file_attente.argtypes = []
+    student_dll.afficher_file_attente.restype = c_char_p
+
+    student_dll.inscrire_etudiant_file.argtypes = [POINTER(POINTER(Etudiant)), c_char_p]
+    student_dll.inscrire_etudiant_file.restype = OperationResult
+
+    student_dll.inscrire_file_attente.argtypes = [POINTER(POINTER(Etudiant)), c_char_p, c_int]
+    student_dll.inscrire_file_attente.restype = OperationResult
+
+    student_dll.liberer_liste.argtypes = [POINTER(Etudiant)]
+    student_dll.liberer_liste.restype = None
+
+    student_dll.construire_index_cne.argtypes = [POINTER(Etudiant)]
+    student_dll.construire_index_cne.restype = OperationResult
+
+    student_dll.liberer_index_cne.argtypes = []
+    student_dll.liberer_index_cne.restype = None
+
+    student_dll.taille_index_cne.argtypes = []
+    student_dll.taille_index_cne.restype = c_int
+
+    student_dll.empreinte_memoire.argtypes = [POINTER(EmpreinteMemoire)]
+    student_dll.empreinte_memoire.restype = None
+
+    student_dll.contexte_creer.argtypes = []
+    student_dll.contexte_creer.restype = c_void_p
+
+    student_dll.contexte_utiliser.argtypes = [c_void_p]
+    student_dll.contexte_utiliser.restype = c_int
+
+    student_dll.contexte_actuel.argtypes = []
+    student_dll.contexte_actuel.restype = c_void_p
+
+    student_dll.contexte_liberer.argtypes = [c_void_p]
+    student_dll.contexte_liberer.restype = None
+
+setup_dll_functions()
+
+# Upper bounds of the latency histogram buckets, in microseconds (1 us .. ~1 s)
+LATENCY_BUCKETS_US = [2 ** i for i in range(21)]
+
+# Exports that rewrite a file, with the position of the file name argument
+FILE_WRITERS = {
+    "mettre_a_jour_fichier": 1,
+    "compacter_journal": 1,
+    "ecrire_fichier_binaire": 1,
+    "convertir_texte_vers_binaire": 1,
+    "convertir_binaire_vers_texte": 1,
+}
+
+class CallStats:
+    """Counters for one DLL export"""
+    __slots__ = ("calls", "total", "slowest", "histogram", "bytes_written", "strings")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_US) + 1)
+        self.bytes_written = 0
+        self.strings = 0
+
+    def record(self, elapsed, bytes_written, strings):
+        self.calls += 1
+        self.total += elapsed
+        self.slowest = max(self.slowest, elapsed)
+        micros = elapsed * 1e6
+        bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS_US) if micros <= bound),
+                      len(LATENCY_BUCKETS_US))
+        self.histogram[bucket] += 1
+        self.bytes_written += bytes_written
+        self.strings += strings
+
+    def percentile_us(self, fraction):
+        """Upper bound of the histogram bucket holding the given fraction of calls,
+        None when it falls in the overflow bucket"""
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_US, self.histogram):
+            seen += count
+            if seen >= fraction * self.calls:
+                return bound
+        return None
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "total_ms": self.total * 1e3,
+            "mean_us": self.total / self.calls * 1e6 if self.calls else 0.0,
+            "max_us": self.slowest * 1e6,
+            "p50_us": self.percentile_us(0.5),
+            "p95_us": self.percentile_us(0.95),
+            "histogram": self.histogram,
+            "bytes_written": self.bytes_written,
+            "strings_allocated": self.strings,
+        }
+
+class Instrumentation:
+    """Call counts, latencies and string traffic of the instrumented exports"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = False
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.functions = {}
+            self.strings_freed = 0
+            self.strings_not_freed = 0
+
+    def record(self, name, elapsed, bytes_written, strings):
+        with self.lock:
+            stats = self.functions.get(name)
+            if stats is None:
+                stats = self.functions[name] = CallStats()
+            stats.record(elapsed, bytes_written, strings)
+
+    def record_free(self, freed):
+        if not self.active:
+            return
+        with self.lock:
+            if freed:
+                self.strings_freed += 1
+            else:
+                self.strings_not_freed += 1
+
+    def report(self):
+        """Plain dict of every counter, ready for json.dump"""
+        with self.lock:
+            functions = {name: stats.as_dict() for name, stats in sorted(self.functions.items())}
+            return {
+                "started": self.started,
+                "duration_s": time.time() - self.started,
+                "histogram_bounds_us": LATENCY_BUCKETS_US,
+                "strings_allocated": sum(stats["strings_allocated"] for stats in functions.values()),
+                "strings_freed": self.strings_freed,
+                "strings_not_freed": self.strings_not_freed,
+                "functions": functions,
+            }
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+# Set by enable_instrumentation; None means calls go straight to the DLL
+instrumentation = None
+_original_functions = {}
+
+def _file_size(name):
+    if hasattr(name, "value"):
+        name = name.value
+    try:
+        return os.path.getsize(name)
+    except (OSError, TypeError):
+        return 0
+
+def _instrument(name, function):
+    file_argument = FILE_WRITERS.get(name)
+
+    def wrapper(*args):
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - start
+        
+        written = 0
+        if file_argument is not None and getattr(result, "success", 0):
+            written = _file_size(args[file_argument])
+        if isinstance(result, OperationResult):
+            strings = 1 if result.message else 0
+        else:
+            strings = 1 if isinstance(result, bytes) else 0
+        instrumentation.record(name, elapsed, written, strings)
+        return result
+
+    wrapper.__name__ = name
+    return wrapper
+
+def enable_instrumentation():
+    """Route every export declared in setup_dll_functions through a recorder"""
+    global instrumentation
+    if instrumentation is None:
+        instrumentation = Instrumentation()
+    instrumentation.active = True
+    if not _original_functions:
+        for name, function in list(vars(student_dll).items()):
+            if isinstance(function, student_dll._FuncPtr):
+                _original_functions[name] = function
+                setattr(student_dll, name, _instrument(name, function))
+    return instrumentation
+
+def disable_instrumentation():
+    """Restore direct calls; the collected counters are kept"""
+    for name, function in _original_functions.items():
+        setattr(student_dll, name, function)
+    _original_functions.clear()
+    if instrumentation:
+        instrumentation.active = False
+
+if os.environ.get("STUDENT_DLL_STATS"):
+    enable_instrumentation()
+
+def active_sort():
+    """(key, order, secondary key) the list is kept in, or None when unsorted"""
+    key, order, secondary = c_int(), c_int(), c_int()
+    if not student_dll.tri_actif(byref(key), byref(order), byref(secondary)):
+        return None
+    return key.value, order.value, secondary.value
+
+def history_state():
+    """(undoable, redoable, bytes held) for the undo/redo history"""
+    undoable, redoable, size = c_int(), c_int(), c_long()
+    student_dll.etat_historique(byref(undoable), byref(redoable), byref(size))
+    return undoable.value, redoable.value, size.value
+
+def memory_footprint():
+    """Node, index and history memory held by the library, as a dict.
+
+    Students live in slabs of nodes: noeuds_reserves counts every slot,
+    live or free, across `blocs` slabs.
+    """
+    footprint = EmpreinteMemoire()
+    student_dll.empreinte_memoire(byref(footprint))
+    values = {name: getattr(footprint, name) for name, _ in EmpreinteMemoire._fields_}
+    values["octets_total"] = (values["octets_noeuds"] + values["octets_index"]
+                              + values["octets_historique"])
+    return values
+
+class RosterContext:
+    """An independent roster state in the DLL: list, queue, history and indexes.
+
+    Exports act on the context bound to the calling thread, the shared
+    default one until bind() is called. Each context has its own
+    readers/writer lock, so lookups from several threads run together
+    while mutations wait for them.
+    """
+
+    def __init__(self):
+        self.handle = student_dll.contexte_creer()
+        if not self.handle:
+            raise MemoryError("contexte_creer failed")
+
+    def bind(self):
+        """Make this context the calling thread's one"""
+        if not student_dll.contexte_utiliser(self.handle):
+            raise RuntimeError("cannot switch context inside a DLL callback")
+
+    @staticmethod
+    def unbind():
+        """Return the calling thread to the default context"""
+        student_dll.contexte_utiliser(None)
+
+    def close(self):
+        """Free everything the context holds; no thread may use it afterwards"""
+        if self.handle:
+            student_dll.contexte_liberer(self.handle)
+            self.handle = None
+
+    def __enter__(self):
+        self.bind()
+        return self
+
+    def __exit__(self, *exc):
+        self.unbind()
+        self.close()
+
+def parallel_lookup(head, cnes, max_workers=None, context=None):
+    """chercher_etudiant for every CNE on a pool of threads.
+
+    The lookups only take the context's read lock and ctypes releases the
+    GIL, so they run in parallel. `context` is the RosterContext holding
+    `head`; by default the one bound to the calling thread. Returns a
+    StudentRecord, or None when not found, per CNE.
+    """
+    handle = context.handle if context is not None else student_dll.contexte_actuel()
+
+    def lookup(cne):
+        result = student_dll.chercher_etudiant(head, cne)
+        record = StudentRecord.from_struct(result.etudiant.contents) if result.success else None
+        safe_free(result.message)
+        return record
+
+    def lookup_slice(part):
+        return [lookup(cne) for cne in part]
+
+    cnes = list(cnes)
+    if not cnes:
+        return []
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(cnes)))
+    step = -(-len(cnes) // workers)
+    with ThreadPoolExecutor(max_workers=workers, initializer=student_dll.contexte_utiliser,
+                            initargs=(handle,)) as pool:
+        parts = pool.map(lookup_slice, [cnes[i:i + step] for i in range(0, len(cnes), step)])
+        return [record for part in parts for record in part]
+
+def decode_c_string(text):
+    """Safely decode text from C strings"""
+    if not text:
+        return ""
+    try:
+        return text.decode('utf-8')
+    except UnicodeDecodeError:
+        try:
+            return text.decode('latin-1')
+        except:
+            try:
+                return text.decode(locale.getpreferredencoding())
+            except:
+                return "Error decoding text"
+
+class StudentRecord:
+    """Plain Python copy of one student, detached from C memory"""
+    __slots__ = ("nom", "prenom", "cne", "notes", "moyenne")
+
+    def __init__(self, nom, prenom, cne, notes, moyenne):
+        self.nom = nom
+        self.prenom = prenom
+        self.cne = cne
+        self.notes = notes
+        self.moyenne = moyenne
+
+    @classmethod
+    def from_struct(cls, student):
+        """Build a record from an Etudiant or EnregistrementEtudiant"""
+        return cls(decode_c_string(student.nom), decode_c_string(student.prenom),
+                   student.CNE, tuple(student.notes), student.moyenne)
+
+    def __repr__(self):
+        return (f"StudentRecord(nom={self.nom!r}, prenom={self.prenom!r}, cne={self.cne}, "
+                f"notes={self.notes!r}, moyenne={self.moyenne:.2f})")
+
+    def describe(self):
+        """Multi-line description used in dialogs"""
+        notes = ", ".join(f"{note:.2f}" for note in self.notes)
+        return (f"Nom: {self.nom}\nPrenom: {self.prenom}\nCNE: {self.cne}\n"
+                f"Notes: {notes}\nMoyenne: {self.moyenne:.2f}")
+
+def iter_students(head):
+    """Yield a StudentRecord for each node by following suivant from Python.
+
+    Cheap to start and lazy, but pays one ctypes hop per node; prefer
+    snapshot_students or page_students for whole-list work.
+    """
+    node = head
+    while node:
+        student = node.contents
+        yield StudentRecord.from_struct(student)
+        node = student.suivant
+
+# Byte layout of EnregistrementEtudiant, for unpacking whole pages at once
+RECORD_LAYOUT = struct.Struct("=50s50si4ff")
+
+def unpack_records(buffer, count):
+    """Decode `count` EnregistrementEtudiant records from a raw buffer"""
+    raw = memoryview(buffer).cast("B")[:count * RECORD_LAYOUT.size]
+    return [
+        StudentRecord(decode_c_string(nom.split(b"\0", 1)[0]), decode_c_string(prenom.split(b"\0", 1)[0]),
+                      cne, (n1, n2, n3, n4), moyenne)
+        for nom, prenom, cne, n1, n2, n3, n4, moyenne in RECORD_LAYOUT.iter_unpack(raw)
+    ]
+
+def page_students(head, offset, limit):
+    """Copy up to `limit` students starting at `offset` with one DLL call"""
+    if not head or limit <= 0:
+        return []
+    page = (EnregistrementEtudiant * limit)()
+    count = student_dll.extraire_page(head, offset, limit, page)
+    return unpack_records(page, count)
+
+def snapshot_students(head):
+    """Copy the whole list into StudentRecords through one contiguous DLL export"""
+    if not head:
+        return []
+    return page_students(head, 0, student_dll.nombre_etudiants(head))
+
+def top_students(head, key, k, weakest=False):
+    """The k best students by `key` (the k weakest if weakest), best first.
+
+    The list order is left untouched; ties keep list order.
+    """
+    if not head or k <= 0:
+        return []
+    records = (EnregistrementEtudiant * k)()
+    count = student_dll.meilleurs_etudiants(head, key, k, int(weakest), records)
+    if count < 0:
+        raise MemoryError("meilleurs_etudiants failed")
+    return unpack_records(records, count)
+
+def student_rank(head, cne, key, weakest=False):
+    """Competition rank of a student by `key` (1 = best), or None if absent"""
+    if not head:
+        return None
+    rank = student_dll.rang_etudiant(head, cne, key, int(weakest))
+    return rank if rank > 0 else None
+
+def name_tolerance(query):
+    """Typos allowed for a search: none for short queries, where almost
+    everything would match, then one, then two from six letters"""
+    length = len(query.split()[0]) if query.split() else 0
+    if length < 3:
+        return 0
+    return 1 if length < 6 else 2
+
+def search_by_name(head, query, limit=50, tolerance=None):
+    """Students whose nom or prenom starts with `query`, ignoring accents and
+    case and tolerating typos; exact prefix matches come first"""
+    if not head or not query.strip() or limit <= 0:
+        return []
+    if tolerance is None:
+        tolerance = name_tolerance(query)
+    records = (EnregistrementEtudiant * limit)()
+    count = student_dll.chercher_par_nom(head, query.encode("utf-8"), tolerance, limit, records)
+    return unpack_records(records, count)
+
+def render_into_buffer(render, size_hint=64 * 1024):
+    """Call a rendre_* export with a caller-owned buffer, growing it once if needed"""
+    buffer = create_string_buffer(size_hint)
+    needed = render(buffer, size_hint)
+    if needed >= size_hint:
+        buffer = create_string_buffer(needed + 1)
+        render(buffer, needed + 1)
+    return decode_c_string(buffer.value)
+
+def render_students(head):
+    """Full text listing of the roster, rendered in linear time"""
+    return render_into_buffer(lambda buffer, size: student_dll.rendre_liste_etudiants(head, buffer, size))
+
+def render_queue():
+    """Full text listing of the waiting queue, never truncated"""
+    return render_into_buffer(student_dll.rendre_file_attente)
+
+def visit_students(visit, head=None):
+    """Call visit(StudentRecord, position) for each student of `head`, or of the
+    waiting queue when head is None. visit may return True to stop early."""
+    def callback(student, position, _context):
+        return 1 if visit(StudentRecord.from_struct(student.contents), position) else 0
+
+    # Keep a reference to the ctypes callback for the duration of the call
+    c_callback = STUDENT_CALLBACK(callback)
+    if head is None:
+        return student_dll.parcourir_file_attente(c_callback, None)
+    return student_dll.parcourir_liste(head, c_callback, None)
+
+def queue_students():
+    """StudentRecords of the waiting queue, in order"""
+    students = []
+    visit_students(lambda student, position: students.append(student))
+    return students
@@ -0,0 +1,386 @@
+"""Command-line front end for student_management.dll.
+
+Runs one operation, or a whole script of operations in a single process:
+
+    python student_cli.py -f etudiants.txt add Alaoui Sara 1234 12 14 15 16
+    python student_cli.py -f etudiants.txt sort --key moyenne --desc
+    python student_cli.py run operations.txt
+
+A script holds one command per line, written exactly as on the command line;
+blank lines and lines starting with # are ignored.
+"""
+import argparse
+import csv
+import shlex
+import sys
+from ctypes import POINTER, byref, c_float, create_string_buffer
+
+import student_bindings
+from student_bindings import (
+    student_dll, Etudiant, StudentRecord, decode_c_string, import_students, read_students_csv,
+    snapshot_students, render_students, queue_students, top_students, student_rank, search_by_name,
+    load_partitions, resync_file
+)
+
+# Sort key names accepted on the command line (CLE_* in Student_file.c)
+CLI_SORT_KEYS = {
+    "nom": 0,
+    "cne": 1,
+    "moyenne": 2,
+    "note1": 3,
+    "note2": 4,
+    "note3": 5,
+    "note4": 6,
+}
+
+
+# Skipped lines listed after a load; the rest are only counted
+LOAD_ERRORS_SHOWN = 20
+
+
+class CommandError(Exception):
+    """An operation failed; the message is shown to the user"""
+
+
+class Session:
+    """The roster currently loaded in the library and the file it belongs to"""
+
+    def __init__(self):
+        self.head = POINTER(Etudiant)()
+        self.filename = None
+
+    def require_roster(self):
+        if self.filename is None:
+            raise CommandError("Aucun fichier chargé (utilisez -f ou la commande load)")
+
+    def close(self):
+        """Fold the journals into the roster files and release the list"""
+        if self.filename is not None and student_dll.entrees_journal() > 0:
+            student_dll.compacter_partitions(self.head)
+        if self.head:
+            student_dll.liberer_liste(self.head)
+        self.head = POINTER(Etudiant)()
+        self.filename = None
+
+
+def check(result):
+    """Return the message of a successful OperationResult, raise otherwise"""
+    message = decode_c_string(result.message)
+    if not result.success:
+        raise CommandError(message or "Opération échouée")
+    return message
+
+
+def notes_array(notes):
+    array = (c_float * 4)()
+    for i, note in enumerate(notes):
+        array[i] = note
+    return array
+
+
+def cmd_load(session, args):
+    session.close()
+    paths = [args.path] if isinstance(args.path, str) else args.path
+    if len(paths) == 1:
+        filename = paths[0].encode("utf-8")
+        result = student_dll.lire_fichier_etudiants(filename)
+        message = check(result)
+        message = f"{message} ({student_dll.nombre_etudiants(result.liste)} étudiants)"
+    else:
+        result, excluded = load_partitions(paths)
+        message = "\n".join([check(result)] + [f"{path} : {reason}" for path, reason in excluded.items()])
+        filename = student_bindings.partition_names()[0].encode("utf-8")
+    session.head = result.liste
+    session.filename = create_string_buffer(filename)
+
+    total, errors = student_bindings.load_errors(LOAD_ERRORS_SHOWN)
+    lines = [message]
+    lines += [f"{path}, ligne {line} : {reason} ({text})" for path, line, reason, text in errors]
+    if total > len(errors):
+        lines.append(f"... et {total - len(errors)} autre(s) ligne(s) ignorée(s)")
+    return "\n".join(lines)
+
+
+def cmd_use(session, args):
+    session.require_roster()
+    if args.path not in student_bindings.partition_names():
+        raise CommandError(f"{args.path} n'est pas un fichier chargé")
+    session.filename = create_string_buffer(args.path.encode("utf-8"))
+    return f"Ajouts et inscriptions vers {args.path}"
+
+
+def cmd_sync(session, args):
+    session.require_roster()
+    lines = []
+    for path in student_bindings.partition_names():
+        result, _ = resync_file(byref(session.head), path.encode("utf-8"))
+        lines.append(f"{path} : {check(result)}")
+    return "\n".join(lines)
+
+
+def cmd_add(session, args):
+    session.require_roster()
+    return check(student_dll.ajouter_etudiant(
+        byref(session.head), session.filename,
+        args.nom.encode("utf-8"), args.prenom.encode("utf-8"),
+        args.cne, notes_array(args.notes)
+    ))
+
+
+def cmd_import(session, args):
+    session.require_roster()
+    try:
+        numbered_rows = read_students_csv(args.path)
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        raise CommandError(f"Lecture du fichier impossible : {e}")
+    success, message, rejected = import_students(
+        byref(session.head), session.filename, [row for _, row in numbered_rows])
+    if not success:
+        raise CommandError(message)
+    lines = [message]
+    lines += [f"Ligne {numbered_rows[position][0]} : {reason}" for position, reason in rejected]
+    return "\n".join(lines)
+
+
+def cmd_delete(session, args):
+    session.require_roster()
+    return check(student_dll.supprimer_etudiant(byref(session.head), session.filename, args.cne))
+
+
+def cmd_undo(session, args):
+    session.require_roster()
+    return check(student_dll.annuler_action(byref(session.head), session.filename))
+
+
+def cmd_redo(session, args):
+    session.require_roster()
+    return check(student_dll.retablir_action(byref(session.head), session.filename))
+
+
+def cmd_search(session, args):
+    session.require_roster()
+    result = student_dll.chercher_etudiant(session.head, args.cne)
+    check(result)
+    description = StudentRecord.from_struct(result.etudiant.contents).describe()
+    if student_dll.nombre_partitions() > 1:
+        partition = student_dll.partition_etudiant(session.head, args.cne)
+        description += f"\nFichier: {decode_c_string(student_dll.nom_partition(partition))}"
+    return description
+
+
+def cmd_find(session, args):
+    session.require_roster()
+    students = search_by_name(session.head, " ".join(args.query), args.limit, args.tolerance)
+    return "\n".join(f"{student.nom} {student.prenom} {student.cne} {student.moyenne:.2f}"
+                     for student in students) or "Aucun résultat"
+
+
+def cmd_sort(session, args):
+    session.require_roster()
+    tiebreak = CLI_SORT_KEYS[args.then] if args.then else -1
+    return check(student_dll.trier_etudiants(
+        byref(session.head), session.filename,
+        CLI_SORT_KEYS[args.key], 0 if args.desc else 1, tiebreak
+    ))
+
+
+def cmd_top(session, args):
+    session.require_roster()
+    students = top_students(session.head, CLI_SORT_KEYS[args.key], args.count, args.weakest)
+    return "\n".join(f"{position:>4}. {student.nom} {student.prenom} {student.cne} {student.moyenne:.2f}"
+                     for position, student in enumerate(students, start=1)) or "Aucun étudiant"
+
+
+def cmd_rank(session, args):
+    session.require_roster()
+    rank = student_rank(session.head, args.cne, CLI_SORT_KEYS[args.key])
+    if rank is None:
+        raise CommandError("Étudiant non trouvé")
+    return f"Rang {rank} / {student_dll.nombre_etudiants(session.head)}"
+
+
+def cmd_list(session, args):
+    session.require_roster()
+    return render_students(session.head) if session.head else "Aucun étudiant"
+
+
+def cmd_export(session, args):
+    session.require_roster()
+    fmt = args.format
+    if fmt is None:
+        fmt = {"bin": "binary", "csv": "csv"}.get(args.path.rsplit(".", 1)[-1].lower(), "text")
+
+    if fmt == "binary":
+        return check(student_dll.ecrire_fichier_binaire(session.head, args.path.encode("utf-8")))
+
+    students = snapshot_students(session.head)
+    try:
+        with open(args.path, "w", newline="", encoding="utf-8") as f:
+            if fmt == "csv":
+                writer = csv.writer(f)
+                writer.writerow(["nom", "prenom", "cne", "note1", "note2", "note3", "note4"])
+                for student in students:
+                    writer.writerow([student.nom, student.prenom, student.cne,
+                                     *(f"{note:.2f}" for note in student.notes)])
+            else:
+                for student in students:
+                    notes = " ".join(f"{note:.2f}" for note in student.notes)
+                    f.write(f"{student.nom} {student.prenom} {student.cne} {notes}\n")
+    except OSError as e:
+        raise CommandError(f"Écriture impossible : {e}")
+    return f"{len(students)} étudiants exportés vers {args.path}"
+
+
+def cmd_queue(session, args):
+    return check(student_dll.ajouter_file_attente(
+        args.nom.encode("utf-8"), args.prenom.encode("utf-8"), args.cne, notes_array(args.notes)))
+
+
+def cmd_enroll_queue(session, args):
+    session.require_roster()
+    return check(student_dll.inscrire_file_attente(byref(session.head), session.filename, args.count or 0))
+
+
+def cmd_show_queue(session, args):
+    students = queue_students()
+    if not students:
+        return "La file d'attente est vide"
+    return "\n".join(f"{student.nom} {student.prenom} {student.cne} {student.moyenne:.2f}"
+                     for student in students)
+
+
+def cmd_memory(session, args):
+    memory = student_bindings.memory_footprint()
+    return (f"Étudiants : {memory['etudiants']} (+ {memory['en_attente']} en attente)\n"
+            f"Noeuds réservés : {memory['noeuds_reserves']} en {memory['blocs']} blocs, "
+            f"{memory['octets_noeuds']} octets\n"
+            f"Index : {memory['octets_index']} octets\n"
+            f"Historique : {memory['octets_historique']} octets\n"
+            f"Total : {memory['octets_total']} octets")
+
+
+def cmd_run(session, args):
+    source = sys.stdin if args.script == "-" else open(args.script, encoding="utf-8")
+    failures = 0
+    with source:
+        for line_number, line in enumerate(source, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                command = PARSER.parse_args(shlex.split(line))
+                if command.handler is cmd_run:
+                    raise CommandError("run ne peut pas être imbriqué")
+                if command.file:
+                    cmd_load(session, argparse.Namespace(path=command.file))
+                print(command.handler(session, command))
+            except (CommandError, ValueError, SystemExit) as e:
+                failures += 1
+                print(f"{args.script}:{line_number}: {describe_error(e)}", file=sys.stderr)
+                if not args.keep_going:
+                    raise CommandError("Script interrompu")
+    if failures:
+        raise CommandError(f"{failures} commande(s) en échec")
+    return "Script terminé"
+
+
+def describe_error(error):
+    if isinstance(error, SystemExit):
+        return "commande invalide"
+    return str(error)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="student_cli",
+        description=__doc__.split("\n\n")[0],
+    )
+    parser.add_argument("-f", "--file", help="fichier étudiants à charger avant la commande")
+    parser.add_argument("--stats", metavar="JSON", help="mesurer les appels DLL et écrire le rapport")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def command(name, handler, help_text):
+        sub = commands.add_parser(name, help=help_text)
+        sub.set_defaults(handler=handler)
+        return sub
+
+    def student_arguments(sub):
+        sub.add_argument("nom")
+        sub.add_argument("prenom")
+        sub.add_argument("cne", type=int)
+        sub.add_argument("notes", type=float, nargs=4, metavar="NOTE")
+
+    command("load", cmd_load, "charger un ou plusieurs fichiers étudiants (en parallèle)").add_argument(
+        "path", nargs="+")
+    command("use", cmd_use, "choisir le fichier qui reçoit les ajouts").add_argument("path")
+    command("sync", cmd_sync, "appliquer les modifications faites sur le disque par un autre programme")
+    student_arguments(command("add", cmd_add, "ajouter un étudiant"))
+    command("import", cmd_import, "importer un fichier CSV").add_argument("path")
+    command("delete", cmd_delete, "supprimer un étudiant").add_argument("cne", type=int)
+    command("undo", cmd_undo, "annuler la dernière action (ajout, suppression, tri, inscription, import)")
+    command("redo", cmd_redo, "rétablir la dernière action annulée")
+    command("search", cmd_search, "chercher un étudiant par CNE").add_argument("cne", type=int)
+
+    find = command("find", cmd_find, "chercher par nom ou prénom (sans accents, fautes tolérées)")
+    find.add_argument("query", nargs="+")
+    find.add_argument("--limit", type=int, default=50)
+    find.add_argument("--tolerance", type=int, help="fautes tolérées (automatique par défaut)")
+
+    sort = command("sort", cmd_sort, "trier la liste")
+    sort.add_argument("--key", choices=CLI_SORT_KEYS, default="moyenne")
+    sort.add_argument("--then", choices=CLI_SORT_KEYS, help="clé secondaire")
+    sort.add_argument("--desc", action="store_true", help="ordre décroissant")
+
+    top = command("top", cmd_top, "meilleurs (ou plus faibles) étudiants, sans trier")
+    top.add_argument("-n", "--count", type=int, default=10)
+    top.add_argument("--key", choices=CLI_SORT_KEYS, default="moyenne")
+    top.add_argument("--weakest", action="store_true", help="les plus faibles")
+
+    rank = command("rank", cmd_rank, "rang d'un étudiant, sans trier")
+    rank.add_argument("cne", type=int)
+    rank.add_argument("--key", choices=CLI_SORT_KEYS, default="moyenne")
+
+    command("list", cmd_list, "afficher la liste")
+
+    export = command("export", cmd_export, "exporter la liste")
+    export.add_argument("path")
+    export.add_argument("--format", choices=["text", "csv", "binary"],
+                        help="par défaut, déduit de l'extension")
+
+    student_arguments(command("queue", cmd_queue, "ajouter à la file d'attente"))
+    command("show-queue", cmd_show_queue, "afficher la file d'attente")
+    command("enroll-queue", cmd_enroll_queue, "inscrire depuis la file d'attente").add_argument(
+        "--count", type=int, help="nombre d'étudiants à inscrire (toute la file par défaut)")
+
+    command("memory", cmd_memory, "mémoire tenue par la bibliothèque")
+
+    run = command("run", cmd_run, "exécuter un script de commandes ('-' pour stdin)")
+    run.add_argument("script")
+    run.add_argument("--keep-going", action="store_true", help="continuer après une erreur")
+    return parser
+
+
+PARSER = build_parser()
+
+
+def main(argv=None):
+    args = PARSER.parse_args(argv)
+    if args.stats:
+        student_bindings.enable_instrumentation()
+    session = Session()
+    try:
+        if args.file:
+            cmd_load(session, argparse.Namespace(path=args.file))
+        print(args.handler(session, args))
+    except (CommandError, OSError) as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        return 1
+    finally:
+        session.close()
+        if args.stats:
+            student_bindings.instrumentation.dump(args.stats)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,445 @@
+"""Serve one loaded roster to many clients over HTTP/JSON on localhost.
+
+The roster is loaded once through the ctypes bindings and every office talks
+to this process instead of opening its own copy of the file:
+
+    python student_server.py etudiants.txt --port 8765
+    python server_load_test.py --port 8765 --clients 32
+
+Routes (bodies and answers are JSON):
+
+    GET    /students?offset=0&limit=100    page of the list
+    GET    /students/<cne>                 one student
+    GET    /students/search?q=...&limit=   by nom or prenom, typos tolerated
+    GET    /students/top?key=moyenne&n=10  best students, without sorting
+    POST   /students                       {"nom", "prenom", "cne", "notes": [4]}
+    DELETE /students/<cne>
+    POST   /sort                           {"key", "desc", "then"}
+    POST   /undo, /redo
+    GET    /queue
+    POST   /queue                          {"nom", "prenom", "cne", "notes": [4]}
+    POST   /queue/enroll                   {"count"} (0 or absent: everyone)
+    GET    /stats
+
+Requests that change the roster run one at a time; reads run together on a
+thread pool (the DLL calls release the GIL and share the library's read lock).
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import re
+import signal
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from ctypes import byref
+from urllib.parse import parse_qs, urlsplit
+
+import student_bindings
+from student_bindings import (
+    student_dll, StudentRecord, decode_c_string, page_students, search_by_name, top_students,
+    queue_students, history_state, active_sort
+)
+from student_cli import CLI_SORT_KEYS, CommandError, Session, cmd_load, notes_array
+import student_statistics
+from student_statistics import NUMPY_AVAILABLE, SUBJECTS
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY = 64 * 1024
+MAX_PAGE = 10_000
+
+STATUS_TEXT = {
+    200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error",
+}
+
+
+class HttpError(Exception):
+    """Answer the request with `status` and {"success": false, "message": message}"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ReadWriteLock:
+    """asyncio lock shared by readers and held alone by a writer.
+
+    A waiting writer stops new readers from entering, so a steady stream of
+    searches cannot starve additions and deletions.
+    """
+
+    def __init__(self):
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+        self._changed = asyncio.Condition()
+
+    @contextlib.asynccontextmanager
+    async def read(self):
+        async with self._changed:
+            await self._changed.wait_for(lambda: not self._writer and not self._waiting_writers)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            async with self._changed:
+                self._readers -= 1
+                self._changed.notify_all()
+
+    @contextlib.asynccontextmanager
+    async def write(self):
+        async with self._changed:
+            self._waiting_writers += 1
+            try:
+                await self._changed.wait_for(lambda: not self._writer and not self._readers)
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            async with self._changed:
+                self._writer = False
+                self._changed.notify_all()
+
+
+def student_json(record):
+    return {"nom": record.nom, "prenom": record.prenom, "cne": record.cne,
+            "notes": [round(note, 2) for note in record.notes], "moyenne": round(record.moyenne, 2)}
+
+
+def json_number(value):
+    """NaN (empty roster statistics) has no JSON form"""
+    value = float(value)
+    return None if math.isnan(value) else round(value, 4)
+
+
+def operation(result):
+    """JSON answer for an OperationResult; a failure becomes a 409"""
+    message = decode_c_string(result.message)
+    if not result.success:
+        raise HttpError(409, message or "Opération échouée")
+    return {"success": True, "message": message}
+
+
+def student_fields(body):
+    """(nom, prenom, cne, notes array) from a request body, checked for types"""
+    try:
+        nom, prenom, cne, notes = body["nom"], body["prenom"], int(body["cne"]), body["notes"]
+        notes = [float(note) for note in notes]
+    except (KeyError, TypeError, ValueError):
+        raise HttpError(400, "Champs attendus : nom, prenom, cne, notes (4 nombres)")
+    if (not isinstance(nom, str) or not isinstance(prenom, str) or len(notes) != 4
+            or not all(math.isfinite(note) for note in notes)):
+        raise HttpError(400, "Champs attendus : nom, prenom, cne, notes (4 nombres)")
+    return nom.encode("utf-8"), prenom.encode("utf-8"), cne, notes_array(notes)
+
+
+def int_argument(query, name, default, minimum=0, maximum=None):
+    try:
+        value = int(query.get(name, [default])[0])
+    except ValueError:
+        raise HttpError(400, f"{name} doit être un entier")
+    if value < minimum or (maximum is not None and value > maximum):
+        raise HttpError(400, f"{name} hors limites")
+    return value
+
+
+def sort_key(name, default=None):
+    if name is None and default is not None:
+        name = default
+    if not isinstance(name, str) or name not in CLI_SORT_KEYS:
+        raise HttpError(400, f"Clé de tri inconnue : {name} (choix : {', '.join(CLI_SORT_KEYS)})")
+    return CLI_SORT_KEYS[name]
+
+
+class RosterService:
+    """The loaded roster and the handlers of every route"""
+
+    def __init__(self, session, workers=None):
+        self.session = session
+        self.lock = ReadWriteLock()
+        self.pool = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                       thread_name_prefix="roster")
+        self.routes = [
+            ("GET", re.compile(r"/students"), self.list_students),
+            ("GET", re.compile(r"/students/search"), self.find_students),
+            ("GET", re.compile(r"/students/top"), self.best_students),
+            ("GET", re.compile(r"/students/(\d+)"), self.get_student),
+            ("POST", re.compile(r"/students"), self.add_student),
+            ("DELETE", re.compile(r"/students/(\d+)"), self.delete_student),
+            ("POST", re.compile(r"/sort"), self.sort_students),
+            ("POST", re.compile(r"/undo"), self.undo),
+            ("POST", re.compile(r"/redo"), self.redo),
+            ("GET", re.compile(r"/queue"), self.show_queue),
+            ("POST", re.compile(r"/queue"), self.enqueue),
+            ("POST", re.compile(r"/queue/enroll"), self.enroll_queue),
+            ("GET", re.compile(r"/stats"), self.stats),
+        ]
+
+    async def reading(self, call, *args):
+        """Run a read-only call on the pool, alongside other reads"""
+        async with self.lock.read():
+            return await asyncio.get_running_loop().run_in_executor(self.pool, call, *args)
+
+    async def writing(self, call, *args):
+        """Run a call that changes the roster once every other request is done"""
+        async with self.lock.write():
+            return await asyncio.get_running_loop().run_in_executor(self.pool, call, *args)
+
+    def close(self):
+        self.pool.shutdown()
+        self.session.close()
+
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.fullmatch(url.path)
+            if not match:
+                continue
+            allowed = True
+            if route_method == method:
+                return await handler(query, body, *match.groups())
+        if allowed:
+            raise HttpError(405, f"{method} non permis sur {url.path}")
+        raise HttpError(404, f"Route inconnue : {url.path}")
+
+    # Reads
+
+    async def list_students(self, query, body):
+        offset = int_argument(query, "offset", 0)
+        limit = int_argument(query, "limit", 100, maximum=MAX_PAGE)
+
+        def page():
+            head = self.session.head
+            return student_dll.nombre_etudiants(head), page_students(head, offset, limit)
+        total, students = await self.reading(page)
+        return 200, {"success": True, "total": total, "offset": offset,
+                     "students": [student_json(student) for student in students]}
+
+    async def get_student(self, query, body, cne):
+        def search():
+            result = student_dll.chercher_etudiant(self.session.head, int(cne))
+            if not result.success:
+                raise HttpError(404, "Étudiant non trouvé")
+            answer = {"success": True, "student": student_json(StudentRecord.from_struct(result.etudiant.contents))}
+            if student_dll.nombre_partitions() > 1:
+                partition = student_dll.partition_etudiant(self.session.head, int(cne))
+                answer["fichier"] = decode_c_string(student_dll.nom_partition(partition))
+            return answer
+        return 200, await self.reading(search)
+
+    async def find_students(self, query, body):
+        text = query.get("q", [""])[0]
+        limit = int_argument(query, "limit", 50, maximum=MAX_PAGE)
+        tolerance = int_argument(query, "tolerance", -1, minimum=-1)
+        students = await self.reading(search_by_name, self.session.head, text, limit,
+                                      None if tolerance < 0 else tolerance)
+        return 200, {"success": True, "students": [student_json(student) for student in students]}
+
+    async def best_students(self, query, body):
+        key = sort_key(query.get("key", ["moyenne"])[0])
+        count = int_argument(query, "n", 10, maximum=MAX_PAGE)
+        weakest = query.get("weakest", ["0"])[0] in ("1", "true")
+        students = await self.reading(top_students, self.session.head, key, count, weakest)
+        return 200, {"success": True, "students": [student_json(student) for student in students]}
+
+    async def show_queue(self, query, body):
+        students = await self.reading(queue_students)
+        return 200, {"success": True, "students": [student_json(student) for student in students]}
+
+    async def stats(self, query, body):
+        def collect():
+            head = self.session.head
+            answer = {
+                "success": True,
+                "etudiants": student_dll.nombre_etudiants(head) if head else 0,
+                "fichiers": student_bindings.partition_names(),
+                "memoire": student_bindings.memory_footprint(),
+            }
+            undoable, redoable, _ = history_state()
+            answer["historique"] = {"annulables": undoable, "retablissables": redoable}
+            sort = active_sort()
+            answer["tri"] = None if sort is None else dict(zip(("cle", "ordre", "secondaire"), sort))
+            if NUMPY_AVAILABLE:
+                summary = student_statistics.subject_statistics(student_statistics.snapshot_columns(head))
+                answer["matieres"] = {subject: {name: json_number(values[column])
+                                                for name, values in summary.items()}
+                                      for column, subject in enumerate(SUBJECTS)}
+            return answer
+        return 200, await self.reading(collect)
+
+    # Writes
+
+    async def add_student(self, query, body):
+        nom, prenom, cne, notes = student_fields(body)
+        result = await self.writing(lambda: student_dll.ajouter_etudiant(
+            byref(self.session.head), self.session.filename, nom, prenom, cne, notes))
+        return 201, operation(result)
+
+    async def delete_student(self, query, body, cne):
+        result = await self.writing(lambda: student_dll.supprimer_etudiant(
+            byref(self.session.head), self.session.filename, int(cne)))
+        return 200, operation(result)
+
+    async def sort_students(self, query, body):
+        key = sort_key(body.get("key"), "moyenne")
+        then = sort_key(body["then"]) if body.get("then") else -1
+        order = 0 if body.get("desc") else 1
+        result = await self.writing(lambda: student_dll.trier_etudiants(
+            byref(self.session.head), self.session.filename, key, order, then))
+        return 200, operation(result)
+
+    async def undo(self, query, body):
+        result = await self.writing(lambda: student_dll.annuler_action(
+            byref(self.session.head), self.session.filename))
+        return 200, operation(result)
+
+    async def redo(self, query, body):
+        result = await self.writing(lambda: student_dll.retablir_action(
+            byref(self.session.head), self.session.filename))
+        return 200, operation(result)
+
+    async def enqueue(self, query, body):
+        nom, prenom, cne, notes = student_fields(body)
+        result = await self.writing(student_dll.ajouter_file_attente, nom, prenom, cne, notes)
+        return 201, operation(result)
+
+    async def enroll_queue(self, query, body):
+        try:
+            count = int(body.get("count") or 0)
+        except (TypeError, ValueError):
+            raise HttpError(400, "count doit être un entier")
+        result = await self.writing(lambda: student_dll.inscrire_file_attente(
+            byref(self.session.head), self.session.filename, count))
+        return 200, operation(result)
+
+
+async def read_request(reader):
+    """(method, target, parsed JSON body, keep_alive), or None at end of stream"""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, version = line.decode("latin-1").split()
+    except ValueError:
+        raise HttpError(400, "Ligne de requête invalide")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HttpError(400, "Content-Length invalide")
+    if length > MAX_BODY:
+        raise HttpError(413, "Corps de requête trop grand")
+    body = {}
+    if length:
+        try:
+            body = json.loads(await reader.readexactly(length))
+        except ValueError:
+            raise HttpError(400, "JSON invalide")
+        if not isinstance(body, dict):
+            raise HttpError(400, "Le corps doit être un objet JSON")
+
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+    return method.upper(), target, body, keep_alive
+
+
+def write_response(writer, status, payload, keep_alive):
+    data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    writer.write(
+        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+        f"Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(data)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data
+    )
+
+
+async def handle_connection(service, reader, writer):
+    """Answer the requests of one keep-alive connection in order"""
+    try:
+        while True:
+            try:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, target, body, keep_alive = request
+                status, payload = await service.dispatch(method, target, body)
+            except HttpError as e:
+                # After a malformed request the rest of the stream cannot be trusted
+                status, payload = e.status, {"success": False, "message": e.message}
+                keep_alive = e.status not in (400, 413)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            except Exception as e:
+                status, payload, keep_alive = 500, {"success": False, "message": str(e)}, False
+            write_response(writer, status, payload, keep_alive)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+        with contextlib.suppress(ConnectionError):
+            await writer.wait_closed()
+
+
+async def serve(service, host, port):
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_connection(service, reader, writer), host, port)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        with contextlib.suppress(NotImplementedError):
+            loop.add_signal_handler(sig, stop.set)
+
+    address = ", ".join(str(sock.getsockname()[:2]) for sock in server.sockets)
+    print(f"Service étudiants à l'écoute sur {address}", file=sys.stderr)
+    async with server:
+        await stop.wait()
+    # Let the requests in progress finish before the roster is released
+    async with service.lock.write():
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("path", nargs="+", help="fichier(s) étudiants à charger")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, help="threads servant les lectures")
+    args = parser.parse_args(argv)
+
+    session = Session()
+    try:
+        print(cmd_load(session, argparse.Namespace(path=args.path)), file=sys.stderr)
+    except CommandError as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        return 1
+
+    service = RosterService(session, args.workers)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
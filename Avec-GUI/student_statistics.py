@@ -0,0 +1,101 @@
+"""Class-wide statistics on a columnar NumPy snapshot of the roster.
+
+NumPy is optional: this module imports without it and NUMPY_AVAILABLE tells
+callers whether the snapshot and statistics functions can be used.
+"""
+from ctypes import POINTER, c_float, c_int
+
+from student_bindings import student_dll
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Columns of ColumnSnapshot.matrix(): the four notes, then the average
+SUBJECTS = ("Note 1", "Note 2", "Note 3", "Note 4", "Moyenne")
+DEFAULT_PERCENTILES = (10, 25, 75, 90)
+MAX_NOTE = 20.0
+
+
+class ColumnSnapshot:
+    """Copy of the roster as three arrays: cne (n,), notes (n, 4) and moyenne (n,)"""
+    __slots__ = ("cne", "notes", "moyenne")
+
+    def __init__(self, cne, notes, moyenne):
+        self.cne = cne
+        self.notes = notes
+        self.moyenne = moyenne
+
+    def __len__(self):
+        return len(self.cne)
+
+    def matrix(self):
+        """(n, 5) float32 matrix of the notes followed by the average"""
+        return np.column_stack((self.notes, self.moyenne))
+
+
+def snapshot_columns(head):
+    """Fill a ColumnSnapshot of the list starting at `head` with one DLL call"""
+    count = student_dll.nombre_etudiants(head) if head else 0
+    cne = np.empty(count, dtype=np.int32)
+    notes = np.empty((count, 4), dtype=np.float32)
+    moyenne = np.empty(count, dtype=np.float32)
+    if count:
+        filled = student_dll.extraire_colonnes(
+            head,
+            cne.ctypes.data_as(POINTER(c_int)),
+            notes.ctypes.data_as(POINTER(c_float)),
+            moyenne.ctypes.data_as(POINTER(c_float)),
+            count
+        )
+        cne, notes, moyenne = cne[:filled], notes[:filled], moyenne[:filled]
+    return ColumnSnapshot(cne, notes, moyenne)
+
+
+def subject_statistics(snapshot, pass_mark=10.0, percentiles=DEFAULT_PERCENTILES):
+    """Per-subject summary as {statistic: array of len(SUBJECTS)}.
+
+    Everything is computed column-wise over the whole matrix; an empty
+    snapshot yields NaN everywhere.
+    """
+    values = snapshot.matrix().astype(np.float64)
+    if not len(values):
+        nan = np.full(len(SUBJECTS), np.nan)
+        summary = {"mean": nan, "median": nan, "std": nan, "min": nan, "max": nan, "pass_rate": nan}
+        summary.update({f"p{p}": nan for p in percentiles})
+        return summary
+
+    summary = {
+        "mean": values.mean(axis=0),
+        "median": np.median(values, axis=0),
+        "std": values.std(axis=0),
+        "min": values.min(axis=0),
+        "max": values.max(axis=0),
+        "pass_rate": (values >= pass_mark).mean(axis=0),
+    }
+    for p, row in zip(percentiles, np.percentile(values, percentiles, axis=0)):
+        summary[f"p{p}"] = row
+    return summary
+
+
+def histograms(snapshot, bins=20):
+    """(len(SUBJECTS), bins) counts of each subject over [0, MAX_NOTE]"""
+    values = snapshot.matrix()
+    indices = np.clip((values * (bins / MAX_NOTE)).astype(np.int64), 0, bins - 1)
+    # Offset each column into its own block of bins so one bincount covers all of them
+    offsets = np.arange(values.shape[1]) * bins
+    counts = np.bincount((indices + offsets).ravel(), minlength=values.shape[1] * bins)
+    return counts.reshape(values.shape[1], bins)
+
+
+def ranks(snapshot):
+    """(n, len(SUBJECTS)) competition ranks, 1 for the best mark; ties share a rank"""
+    descending = -snapshot.matrix()
+    ordered = np.sort(descending, axis=0)
+    result = np.empty(descending.shape, dtype=np.int64)
+    for column in range(descending.shape[1]):
+        result[:, column] = np.searchsorted(ordered[:, column], descending[:, column], side="left") + 1
+    return result